@@ -0,0 +1,127 @@
+"""
+Shared, thread-safe clients for the Bluesky API.
+
+Every atproto client built here sends its requests through one process-wide
+``httpx.Client``, whose keep-alive pool is sized by ``HTTP_POOL_SIZE``. Code
+that runs many operations in the same process, such as a job runner
+importing these modules, therefore reuses open TCP/TLS connections (and the
+DNS lookups behind them) instead of handshaking again for every client.
+Logged-in clients are cached per (service, handle, app password).
+
+This module imports httpx and the atproto SDK, so import it where it is
+first needed.
+"""
+import threading
+import httpx
+from atproto import Client
+from atproto_client import exceptions
+from atproto_client.models.common import XrpcError
+from atproto_client.models.utils import get_or_create, load_json
+from atproto_client.request import Request, RequestBase, Response
+import config
+import resilience
+
+_lock = threading.Lock()
+_http = None
+# (service, handle, password) -> Client
+_clients = {}
+# Error statuses and the exceptions atproto's own Request raises for them (anything else: RequestException)
+_STATUS_ERRORS = {
+    400: exceptions.BadRequestError,
+    401: exceptions.UnauthorizedError,
+    403: exceptions.UnauthorizedError,
+    409: exceptions.NetworkError,
+    413: exceptions.NetworkError,
+    429: exceptions.RateLimitExceededError,
+    502: exceptions.NetworkError,
+}
+
+def http_client():
+    """Return the process-wide httpx client; it is shared, so don't close it."""
+    global _http
+    with _lock:
+        if _http is None:
+            limits = httpx.Limits(max_connections=config.HTTP_POOL_SIZE,
+                                  max_keepalive_connections=config.HTTP_POOL_SIZE,
+                                  keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY)
+            _http = httpx.Client(follow_redirects=True, limits=limits)
+        return _http
+
+def raise_for_status(response):
+    """Return a 2xx httpx response; raise the atproto exception the SDK would for any other.
+
+    Built on the SDK's public exception and model classes, so failures are
+    classified alike without depending on its private response handler.
+    """
+    if 200 <= response.status_code <= 299:
+        return response
+    error = Response(success=False, status_code=response.status_code, content=response.content,
+                     headers={key.lower(): value for key, value in response.headers.items()})
+    content = load_json(response.content, strict=False)
+    if content:
+        error.content = get_or_create(content, XrpcError, strict=False)
+    raise _STATUS_ERRORS.get(response.status_code, exceptions.RequestException)(error)
+
+class PooledRequest(Request):
+    """An atproto Request that sends through the shared httpx client.
+
+    httpx event hooks belong to a client, so hooks given here are called
+    for this Request's own calls only. With ``timed`` every call is recorded
+    by instrumentation.timed_send().
+    """
+
+    def __init__(self, event_hooks=None, timed=False):
+        RequestBase.__init__(self)
+        self._event_hooks = event_hooks or {}
+        self._timed = timed
+        self._client = http_client()
+
+    def _new_instance(self):
+        return type(self)(self._event_hooks, self._timed)
+
+    def _send_request(self, method, url, **kwargs):
+        headers = self.get_headers(kwargs.pop('headers', None))
+        try:
+            request = self._client.build_request(method, url, headers=headers, **kwargs)
+            for hook in self._event_hooks.get('request', ()):
+                hook(request)
+            if self._timed:
+                import instrumentation
+                response = instrumentation.timed_send(self._client, request)
+            else:
+                response = self._client.send(request)
+            for hook in self._event_hooks.get('response', ()):
+                hook(response)
+        except httpx.TimeoutException as e:
+            raise exceptions.InvokeTimeoutError from e
+        except httpx.NetworkError as e:
+            raise exceptions.NetworkError from e
+        return raise_for_status(response)
+
+    def close(self):
+        # The connection pool outlives any one client
+        pass
+
+def client(service=None, handle=None, password=None, login=True):
+    """Return the cached atproto Client for an account (default: the configured one).
+
+    The first call for an account logs in (resuming a stored session when
+    possible, see session_store.py). With ``login=False`` an unauthenticated
+    client for public endpoints is returned.
+    """
+    import instrumentation
+    service = service or config.BLUESKY_SERVICE
+    if login:
+        handle = handle or config.BLUESKY_HANDLE
+        password = password or config.BLUESKY_PASSWORD
+    key = (service, handle, password) if login else (service, None, None)
+    with _lock:
+        if key in _clients:
+            return _clients[key]
+    new = Client(base_url=service, request=instrumentation.make_request())
+    if login:
+        import session_store
+        resilience.call(lambda: session_store.login(new, service, handle, password), service)
+    with _lock:
+        # Another thread may have logged in first; keep a single client per account
+        return _clients.setdefault(key, new)
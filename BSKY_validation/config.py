@@ -1,23 +1,89 @@
 """
 Configuration module for loading environment variables.
+
+The .env file is parsed on first access to a setting, so importing this
+module (e.g. for --help) stays cheap.
 """
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+_loaded = False
+
+def load():
+    """Load environment variables and populate the settings (only once)."""
+    global _loaded, BLUESKY_HANDLE, BLUESKY_PASSWORD, BLUESKY_SERVICE, BLUESKY_SESSION_PATH
+    global BLUESKY_BLOB_CACHE_PATH, BLUESKY_NOTIFICATION_STATE_PATH
+    global VALIDATION_CACHE_PATH, VALIDATION_CACHE_TTL, VALIDATION_CACHE_MAX_ENTRIES, VALIDATION_HISTORY_PATH
+    global RETRY_ATTEMPTS, RETRY_MAX_DELAY, HEDGE_AFTER, CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN
+    global HANDLE_CACHE_TTL, HANDLE_CACHE_MAX_ENTRIES, HTTP_POOL_SIZE, HTTP_KEEPALIVE_EXPIRY
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Bluesky configuration
+    BLUESKY_HANDLE = os.getenv('BLUESKY_HANDLE', 'sallocat.bsky.social')
+    BLUESKY_PASSWORD = os.getenv('BLUESKY_PASSWORD')  # App password, not regular password
+    BLUESKY_SERVICE = os.getenv('BLUESKY_SERVICE', 'https://bsky.social')
+    BLUESKY_SESSION_PATH = os.getenv(
+        'BLUESKY_SESSION_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'bluesky-sessions.json'),
+    )
+    BLUESKY_BLOB_CACHE_PATH = os.getenv(
+        'BLUESKY_BLOB_CACHE_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'bluesky-blobs.json'),
+    )
+    BLUESKY_NOTIFICATION_STATE_PATH = os.getenv(
+        'BLUESKY_NOTIFICATION_STATE_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'bluesky-notifications.json'),
+    )
+
+    # Validation result cache
+    VALIDATION_CACHE_PATH = os.getenv(
+        'VALIDATION_CACHE_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'cache.sqlite3'),
+    )
+    VALIDATION_CACHE_TTL = int(os.getenv('VALIDATION_CACHE_TTL', '300'))  # seconds
+    VALIDATION_CACHE_MAX_ENTRIES = int(os.getenv('VALIDATION_CACHE_MAX_ENTRIES', '1000'))
 
-# Bluesky configuration
-BLUESKY_HANDLE = os.getenv('BLUESKY_HANDLE', 'sallocat.bsky.social')
-BLUESKY_PASSWORD = os.getenv('BLUESKY_PASSWORD')  # App password, not regular password
-BLUESKY_SERVICE = os.getenv('BLUESKY_SERVICE', 'https://bsky.social')
+    # Append-only history of validation results (empty: don't record)
+    VALIDATION_HISTORY_PATH = os.getenv(
+        'VALIDATION_HISTORY_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'history.sqlite3'),
+    )
+
+    # In-memory handle -> DID resolution cache
+    HANDLE_CACHE_TTL = int(os.getenv('HANDLE_CACHE_TTL', '3600'))  # seconds
+    HANDLE_CACHE_MAX_ENTRIES = int(os.getenv('HANDLE_CACHE_MAX_ENTRIES', '10000'))
+
+    # Process-wide keep-alive connection pool (see clients.py)
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60'))  # seconds
+
+    # Retries, request hedging and per-host circuit breaking (see resilience.py)
+    RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', '3'))
+    RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '30'))  # seconds
+    # Send a second copy of a slow idempotent request after this many seconds (unset: off)
+    HEDGE_AFTER = float(os.getenv('HEDGE_AFTER')) if os.getenv('HEDGE_AFTER') else None
+    CIRCUIT_BREAKER_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5'))
+    CIRCUIT_BREAKER_COOLDOWN = float(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '30'))  # seconds
+    _loaded = True
+
+def __getattr__(name):
+    """Load the configuration when a setting is first accessed."""
+    if name.isupper() and not _loaded:
+        load()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def validate_config():
     """Validate that required configuration is present."""
+    load()
     if not BLUESKY_PASSWORD:
         raise ValueError(
             "BLUESKY_PASSWORD not found in environment variables. "
             "Please create a .env file with your Bluesky app password."
         )
     return True
-
@@ -1,19 +1,17 @@
 """
 Example usage of Bluesky API with the configured credentials.
 """
-from atproto import Client
-from config import BLUESKY_HANDLE, BLUESKY_PASSWORD, BLUESKY_SERVICE, validate_config
+import config
+from config import validate_config
 
 def main():
     # Validate configuration
     validate_config()
     
-    # Initialize Bluesky client
-    client = Client(base_url=BLUESKY_SERVICE)
-    
-    # Login
+    # Shared, logged-in client for the configured account
+    import clients
     try:
-        client.login(login=BLUESKY_HANDLE, password=BLUESKY_PASSWORD)
+        client = clients.client()
         print(f"Successfully connected to Bluesky as: {client.me.handle}")
         print(f"DID: {client.me.did}")
         print(f"Display Name: {getattr(client.me, 'display_name', 'N/A')}")
@@ -23,7 +21,7 @@ def main():
     
     # Example: Get your profile
     try:
-        profile = client.get_profile(actor=BLUESKY_HANDLE)
+        profile = client.get_profile(actor=config.BLUESKY_HANDLE)
         print(f"\nProfile Information:")
         print(f"  Handle: {profile.handle}")
         print(f"  Display Name: {profile.display_name or 'N/A'}")
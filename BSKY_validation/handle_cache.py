@@ -0,0 +1,82 @@
+"""
+In-memory handle -> DID cache with LRU and TTL eviction.
+
+Handles are normalized (leading '@' stripped, lowercased) before lookup,
+and handles the server can't resolve are remembered as well. Entries expire
+after ``ttl`` seconds and the least recently used entry is dropped once
+``max_entries`` is reached. The cache is thread-safe, so one instance can be
+shared by every worker in a process (see ``shared_cache``).
+"""
+import threading
+import time
+from collections import OrderedDict
+import config
+
+def normalize_handle(handle):
+    """Return ``handle`` without a leading '@', lowercased."""
+    return handle.strip().lstrip('@').lower()
+
+class HandleCache:
+    """Size-bounded LRU cache of handle -> DID with per-entry expiry."""
+
+    def __init__(self, max_entries=10000, ttl=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # handle -> (did, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, handle):
+        """Return the cached DID for ``handle``, or None if missing, unresolvable or expired."""
+        return self._get(normalize_handle(handle)) or None
+
+    def _get(self, handle):
+        """Return the cached DID, '' for a cached failure or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None or entry[1] <= self._clock():
+                if entry is not None:
+                    del self._entries[handle]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(handle)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, handle, did):
+        """Store the DID for ``handle``, evicting the least recently used entries."""
+        handle = normalize_handle(handle)
+        with self._lock:
+            self._entries[handle] = (did, self._clock() + self.ttl)
+            self._entries.move_to_end(handle)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def resolve(self, client, handle):
+        """Return the DID for ``handle`` (None if it doesn't resolve), asking the server only on a cache miss."""
+        from atproto.exceptions import BadRequestError
+        handle = normalize_handle(handle)
+        did = self._get(handle)
+        if did is None:
+            try:
+                did = client.resolve_handle(handle).did
+            except BadRequestError:
+                did = ''
+            self.put(handle, did)
+        return did or None
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_cache():
+    """Return the process-wide cache, sized from configuration."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HandleCache(config.HANDLE_CACHE_MAX_ENTRIES, config.HANDLE_CACHE_TTL)
+        return _shared
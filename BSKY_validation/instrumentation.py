@@ -0,0 +1,142 @@
+"""
+Per-request and per-step timing for the validation scripts.
+
+When enabled, every HTTP call made by an atproto client built with
+:func:`make_request` is recorded with endpoint, status, bytes,
+connect/TLS/response-header/total time and rate-limit headers (or the
+error, for calls that fail), and each validation step is timed. The results
+are available as a JSON report and can be streamed to an NDJSON trace file
+as they happen. Timings come from httpx's ``trace`` request extension.
+"""
+import json
+import threading
+import time
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+class Recorder:
+    """Collects step timings and HTTP call records for one run."""
+
+    def __init__(self):
+        self.enabled = False
+        self.steps = []
+        self.requests = []
+        self._step_start = None
+        self._run_start = time.perf_counter()
+        self._trace = None
+        self._lock = threading.Lock()
+
+    def _emit(self, event):
+        if self._trace is not None:
+            self._trace.write(json.dumps(event) + '\n')
+            self._trace.flush()
+
+    def step(self, name):
+        """Start timing a step, ending the previous one."""
+        if not self.enabled:
+            return
+        self.end_step()
+        self.steps.append({'name': name, 'ms': None})
+        self._step_start = time.perf_counter()
+
+    def end_step(self):
+        """End the current step, if any."""
+        if self._step_start is None:
+            return
+        with self._lock:
+            self.steps[-1]['ms'] = _ms(time.perf_counter() - self._step_start)
+            self._emit({'event': 'step', **self.steps[-1]})
+        self._step_start = None
+
+    def record_request(self, entry):
+        """Record one HTTP call."""
+        with self._lock:
+            entry['step'] = self.steps[-1]['name'] if self.steps else None
+            self.requests.append(entry)
+            self._emit({'event': 'request', **entry})
+
+    def report(self, **extra):
+        """Return the run's report as a dict."""
+        self.end_step()
+        return {
+            **extra,
+            'total_ms': _ms(time.perf_counter() - self._run_start),
+            'steps': self.steps,
+            'requests': self.requests,
+        }
+
+    def close(self):
+        """Close the trace file."""
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+recorder = Recorder()
+
+def step(name):
+    """Start timing a step on the module recorder (no-op when disabled)."""
+    recorder.step(name)
+
+def enable(trace_path=None):
+    """Start recording, optionally streaming events to an NDJSON trace file."""
+    recorder.enabled = True
+    if trace_path:
+        recorder._trace = open(trace_path, 'a', encoding='utf-8')
+
+def _rate_limit_headers(headers):
+    return {
+        key.lower(): value for key, value in headers.items()
+        if key.lower().startswith(('x-ratelimit-', 'ratelimit-', 'retry-after'))
+    }
+
+def _between(timings, start_event, end_event):
+    if start_event in timings and end_event in timings:
+        return _ms(timings[end_event] - timings[start_event])
+    return 0.0
+
+def timed_send(client, request):
+    """Send ``request`` with the httpx ``client`` and record the call, including failed ones."""
+    timings = {}
+
+    def trace(event_name, info):
+        timings[event_name] = time.perf_counter()
+
+    request.extensions['trace'] = trace
+    url = request.url
+    entry = {'method': request.method, 'host': url.netloc.decode('ascii'), 'endpoint': url.path}
+    start = time.perf_counter()
+    try:
+        response = client.send(request)
+        # Read the body here so the total includes the download
+        response.read()
+        entry.update(status=response.status_code, bytes=len(response.content),
+                     rate_limit=_rate_limit_headers(response.headers))
+        return response
+    except Exception as e:
+        entry.update(status=None, error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        end = time.perf_counter()
+        headers_done = next(
+            (timings[name] for name in ('http11.receive_response_headers.complete',
+                                        'http2.receive_response_headers.complete') if name in timings),
+            end,
+        )
+        entry.update(
+            connect_ms=_between(timings, 'connection.connect_tcp.started', 'connection.connect_tcp.complete'),
+            tls_ms=_between(timings, 'connection.start_tls.started', 'connection.start_tls.complete'),
+            total_ms=_ms(end - start),
+        )
+        if entry['status'] is not None:
+            # From sending the request (including connect) to the end of the response headers
+            entry['headers_ms'] = _ms(headers_done - start)
+        recorder.record_request(entry)
+
+def make_request(event_hooks=None):
+    """Return an atproto Request on the shared connection pool that records its calls when recording is enabled.
+
+    ``event_hooks`` takes httpx-style ``request``/``response`` hook lists.
+    """
+    from clients import PooledRequest
+    return PooledRequest(event_hooks, timed=recorder.enabled)
@@ -0,0 +1,223 @@
+"""
+Parallel, de-duplicating image uploads for Bluesky posts.
+
+Images are hashed as they are read, so the same bytes are only uploaded
+once: blob references are reused within a run and, once a post that uses
+them has been published, across runs through a small JSON cache. Images
+over the size limit are downscaled and recompressed in a process pool when
+Pillow is installed, and uploads run concurrently in a thread pool.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import config
+
+# Bluesky rejects image blobs over this size
+MAX_IMAGE_BYTES = 1000000
+MAX_IMAGES_PER_POST = 4
+# Longest side images are scaled down to when they have to be recompressed
+MAX_IMAGE_DIMENSION = 2000
+SUPPORTED_TYPES = ('image/jpeg', 'image/png', 'image/webp', 'image/gif')
+DEFAULT_WORKERS = 4
+# Blob references kept in the on-disk cache
+MAX_CACHE_ENTRIES = 10000
+
+class MediaError(Exception):
+    """Raised when an image can't be prepared for upload."""
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def prepare_image(path):
+    """Return (data, mime_type, (width, height)) ready for uploadBlob.
+
+    Runs in a worker process. Images within the size limit are sent as they
+    are; larger ones are downscaled and re-encoded as JPEG until they fit.
+    Without Pillow the size is unknown and oversized images are rejected.
+    """
+    size = os.path.getsize(path)
+    mime = mimetypes.guess_type(path)[0]
+    try:
+        from PIL import Image
+    except ImportError:
+        if size > MAX_IMAGE_BYTES:
+            raise MediaError(f"{path} is {size} bytes (limit {MAX_IMAGE_BYTES}); install Pillow to downscale it")
+        if mime not in SUPPORTED_TYPES:
+            raise MediaError(f"{path} is not a supported image type ({mime})")
+        with open(path, 'rb') as f:
+            return f.read(), mime, None
+
+    import io
+    try:
+        # Only the header is read until the image has to be re-encoded
+        with Image.open(path) as image:
+            mime = Image.MIME.get(image.format, mime)
+            if size <= MAX_IMAGE_BYTES and mime in SUPPORTED_TYPES:
+                with open(path, 'rb') as f:
+                    return f.read(), mime, image.size
+            image.load()
+    except Exception as e:
+        raise MediaError(f"{path} is not a readable image: {e}")
+
+    image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    quality = 90
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=quality, optimize=True)
+        if buffer.tell() <= MAX_IMAGE_BYTES:
+            return buffer.getvalue(), 'image/jpeg', image.size
+        if quality > 50:
+            quality -= 10
+        else:
+            image.thumbnail((image.width * 3 // 4, image.height * 3 // 4))
+
+class BlobCache:
+    """Content hash -> blob reference cache for one account.
+
+    Blobs uploaded in this run are reused straight away, but only blobs
+    referenced by a published post are persisted: the PDS deletes
+    unreferenced blobs after a few minutes.
+    """
+
+    def __init__(self, service, did, path=None):
+        self.path = path or config.BLUESKY_BLOB_CACHE_PATH
+        self._prefix = f"{service.rstrip('/')}|{did}|"
+        self._lock = threading.Lock()
+        self._pending = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._stored = json.load(f)
+        except (OSError, ValueError):
+            self._stored = {}
+
+    def get(self, digest):
+        """Return the {'blob', 'size'} entry for a content hash, or None."""
+        key = self._prefix + digest
+        with self._lock:
+            return self._pending.get(key) or self._stored.get(key)
+
+    def put(self, digest, blob, size=None):
+        """Remember a blob (and the image's width and height) uploaded in this run."""
+        with self._lock:
+            self._pending[self._prefix + digest] = {'blob': blob, 'size': size}
+
+    def commit(self, digests):
+        """Persist the blobs for ``digests`` now that a post references them."""
+        with self._lock:
+            changed = False
+            for digest in digests:
+                key = self._prefix + digest
+                if key in self._pending and key not in self._stored:
+                    self._stored[key] = self._pending[key]
+                    changed = True
+            if not changed:
+                return
+            while len(self._stored) > MAX_CACHE_ENTRIES:
+                del self._stored[next(iter(self._stored))]
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._stored, f)
+            os.replace(tmp_path, self.path)
+
+class ImageUploader:
+    """Prepares images in a process pool and uploads them concurrently.
+
+    Use as a context manager so the pools are shut down.
+    """
+
+    def __init__(self, client, service, workers=DEFAULT_WORKERS, cache=None):
+        self.client = client
+        self.cache = cache if cache is not None else BlobCache(service, client.me.did)
+        self._prepare_pool = ProcessPoolExecutor(max_workers=workers)
+        self._upload_pool = ThreadPoolExecutor(max_workers=workers)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.uploaded = self.reused = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pools."""
+        self._prepare_pool.shutdown()
+        self._upload_pool.shutdown()
+
+    def _upload(self, path, digest):
+        data, mime, size = self._prepare_pool.submit(prepare_image, path).result()
+        response = self.client.com.atproto.repo.upload_blob(data, headers={'Content-Type': mime})
+        self.cache.put(digest, response.blob.model_dump(by_alias=True), size)
+        with self._lock:
+            self.uploaded += 1
+        return self.cache.get(digest)
+
+    def _submit(self, path):
+        """Return (digest, future) for one image, sharing uploads of identical bytes."""
+        digest = file_digest(path)
+        with self._lock:
+            future = self._in_flight.get(digest)
+            if future is not None:
+                self.reused += 1
+                return digest, future
+            cached = self.cache.get(digest)
+            if cached is not None:
+                self.reused += 1
+                future = Future()
+                future.set_result(cached)
+            else:
+                future = self._upload_pool.submit(self._upload, path, digest)
+            self._in_flight[digest] = future
+        return digest, future
+
+    def submit(self, images):
+        """Start uploading (path, alt) pairs and return a handle for ``collect``."""
+        if len(images) > MAX_IMAGES_PER_POST:
+            raise MediaError(f"A post can have at most {MAX_IMAGES_PER_POST} images")
+        return [(alt, *self._submit(path)) for path, alt in images]
+
+    def collect(self, submitted):
+        """Wait for submitted uploads and return (embed, digests).
+
+        ``embed`` is an ``app.bsky.embed.images`` model; pass ``digests`` to
+        ``commit`` once the post using it is published.
+        """
+        from atproto import models
+        embeds = []
+        for alt, digest, future in submitted:
+            try:
+                entry = future.result()
+            except Exception:
+                # Let a later post try this image again
+                with self._lock:
+                    self._in_flight.pop(digest, None)
+                raise
+            size = entry['size']
+            embeds.append(models.AppBskyEmbedImages.Image(
+                alt=alt or '',
+                image=models.blob_ref.BlobRef.model_validate(entry['blob']),
+                aspect_ratio=models.AppBskyEmbedDefs.AspectRatio(width=size[0], height=size[1]) if size else None,
+            ))
+        return models.AppBskyEmbedImages.Main(images=embeds), [digest for _, digest, _ in submitted]
+
+    def upload(self, images):
+        """Upload (path, alt) pairs concurrently and return (embed, digests)."""
+        return self.collect(self.submit(images))
+
+    def commit(self, digests):
+        """Persist blob references used by a published post."""
+        self.cache.commit(digests)
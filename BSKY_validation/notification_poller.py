@@ -0,0 +1,288 @@
+"""
+Script to poll Bluesky notifications (mentions, replies, likes, ...) incrementally.
+
+Each poll first lists just the newest notification, which is a tiny
+request, and only reads full pages when it is newer than the newest one
+already handled, stopping at notifications it has seen. That watermark is
+the server's ``indexedAt`` and is kept per account in a state file, so a
+restarted poller neither misses nor repeats notifications, whatever the
+local clock says.
+
+The polling interval drops to the minimum while notifications keep
+arriving and grows while the account is quiet. It is stretched further when
+the ``ratelimit-*`` response headers show the request budget running low.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+import config
+import resilience
+from config import validate_config
+
+PAGE_SIZE = 50
+MIN_INTERVAL = 5.0  # seconds
+MAX_INTERVAL = 300.0  # seconds
+# Interval growth per poll without new notifications
+BACKOFF_FACTOR = 1.5
+# Share of the remaining rate-limit budget the poller may spend before the reset
+BUDGET_SHARE = 0.1
+
+def _timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+class AdaptiveInterval:
+    """Polling interval that tightens on activity and backs off when idle or short of budget."""
+
+    def __init__(self, minimum=MIN_INTERVAL, maximum=MAX_INTERVAL, factor=BACKOFF_FACTOR,
+                 budget_share=BUDGET_SHARE, clock=time.time):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.budget_share = budget_share
+        self.interval = minimum
+        self.remaining = None
+        self.reset = None
+        self._clock = clock
+
+    def update(self, headers):
+        """Record the rate-limit budget from a response's ``ratelimit-*`` headers."""
+        if 'ratelimit-remaining' not in headers:
+            return
+        self.remaining = int(headers['ratelimit-remaining'])
+        if 'ratelimit-reset' in headers:
+            self.reset = int(headers['ratelimit-reset'])
+
+    def record(self, new_count):
+        """Adjust the interval after a poll that found ``new_count`` notifications."""
+        if new_count:
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.maximum, self.interval * self.factor)
+
+    def next_delay(self):
+        """Return the seconds to wait before the next poll."""
+        delay = self.interval
+        if self.remaining is not None and self.reset:
+            # Spread this poller's share of the remaining budget over the window
+            window = max(self.reset - self._clock(), 0)
+            spare = self.remaining * self.budget_share
+            delay = max(delay, window / spare if spare >= 1 else window)
+        return delay
+
+def notification_row(notification):
+    """Flatten a notification into an NDJSON row."""
+    return {
+        'uri': notification.uri,
+        'cid': notification.cid,
+        'reason': notification.reason,
+        'reason_subject': notification.reason_subject,
+        'author_did': notification.author.did,
+        'author_handle': notification.author.handle,
+        'text': getattr(notification.record, 'text', None),
+        'indexed_at': notification.indexed_at,
+    }
+
+def _load_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(path, state):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+class NotificationPoller:
+    """Fetches the notifications of one account that are newer than a persisted watermark.
+
+    The watermark is the ``indexedAt`` of the newest notification handled,
+    plus the URIs sharing that timestamp. It is only saved after the handler
+    has returned, so delivery is at-least-once across crashes.
+    """
+
+    def __init__(self, client, did, service, state_path=None, page_size=PAGE_SIZE, reasons=None,
+                 interval=None):
+        self.client = client
+        self.did = did
+        self.service = service
+        self.state_path = state_path or config.BLUESKY_NOTIFICATION_STATE_PATH
+        self.page_size = page_size
+        self.reasons = set(reasons) if reasons else None
+        self.interval = interval or AdaptiveInterval()
+        state = _load_state(self.state_path).get(did, {})
+        self.seen_at = state.get('seen_at')
+        self.seen_uris = set(state.get('seen_uris', []))
+        # Set once a poll has run: a poll without a watermark after that found an empty account
+        self.started = False
+        self.requests = self.polls = self.delivered = 0
+
+    def _call(self, func, idempotent=False):
+        self.requests += 1
+        return resilience.call(func, self.service, idempotent=idempotent)
+
+    def _is_seen(self, notification):
+        indexed_at = _timestamp(notification.indexed_at)
+        seen_at = _timestamp(self.seen_at)
+        return indexed_at < seen_at or (indexed_at == seen_at and notification.uri in self.seen_uris)
+
+    def fetch_new(self):
+        """Return the notifications after the watermark, newest first.
+
+        On the first run only the newest page is read. After a first run
+        that found no notifications at all, every notification is new.
+        """
+        notifications = self.client.app.bsky.notification
+        if self.seen_at is not None:
+            newest = self._call(lambda: notifications.list_notifications({'limit': 1}), idempotent=True)
+            if not newest.notifications or self._is_seen(newest.notifications[0]):
+                return []
+        first_run = self.seen_at is None and not self.started
+        new = []
+        cursor = None
+        while True:
+            params = {'limit': self.page_size, 'cursor': cursor}
+            page = self._call(lambda: notifications.list_notifications(params), idempotent=True)
+            for notification in page.notifications:
+                if self.seen_at is not None and self._is_seen(notification):
+                    return new
+                new.append(notification)
+            if first_run or not page.cursor:
+                return new
+            cursor = page.cursor
+
+    def poll(self, backfill=None):
+        """Return (rows, new_count): rows for new notifications, oldest first, and how many were new.
+
+        The in-memory watermark moves past them; call save() once they have
+        been handled. On the first run only the ``backfill`` newest are
+        returned (none by default), so the poller starts from now. If the
+        account has no notifications yet, the watermark stays unset and the
+        first ones to arrive are delivered.
+        """
+        first_run = self.seen_at is None and not self.started
+        new = self.fetch_new()
+        self.started = True
+        if not new:
+            return [], 0
+        newest = max(_timestamp(n.indexed_at) for n in new)
+        uris = {n.uri for n in new if _timestamp(n.indexed_at) == newest}
+        if self.seen_at is not None and newest == _timestamp(self.seen_at):
+            uris |= self.seen_uris
+        self.seen_at = next(n.indexed_at for n in new if _timestamp(n.indexed_at) == newest)
+        self.seen_uris = uris
+        delivered = new[:backfill or 0] if first_run else new
+        rows = [notification_row(n) for n in reversed(delivered)
+                if self.reasons is None or n.reason in self.reasons]
+        return rows, len(new)
+
+    def save(self, mark_read=False):
+        """Persist the watermark, and with ``mark_read`` also mark the notifications read in the app."""
+        if self.seen_at is None:
+            return
+        state = _load_state(self.state_path)
+        state[self.did] = {'seen_at': self.seen_at, 'seen_uris': sorted(self.seen_uris)}
+        _save_state(self.state_path, state)
+        if mark_read:
+            notifications = self.client.app.bsky.notification
+            self._call(lambda: notifications.update_seen({'seen_at': self.seen_at}))
+
+    def run(self, handler, max_polls=None, backfill=None, mark_read=False, sleep=time.sleep):
+        """Poll ``max_polls`` times (forever by default), passing each new row to ``handler``.
+
+        Poll, row and request counts are kept in ``polls``, ``delivered`` and
+        ``requests``.
+        """
+        start = self.polls
+        while max_polls is None or self.polls - start < max_polls:
+            watermark = self.seen_at
+            rows, new_count = self.poll(backfill if self.polls == start else None)
+            for row in rows:
+                handler(row)
+                self.delivered += 1
+            if new_count or self.seen_at != watermark:
+                self.save(mark_read and new_count > 0)
+            self.interval.record(new_count)
+            self.polls += 1
+            if max_polls is None or self.polls - start < max_polls:
+                sleep(self.interval.next_delay())
+
+def make_client(service, interval):
+    """Create a Client whose responses feed their ratelimit headers to ``interval``."""
+    from atproto import Client
+    import instrumentation
+
+    def on_response(response):
+        interval.update(response.headers)
+    return Client(base_url=service, request=instrumentation.make_request({'response': [on_response]}))
+
+def main(argv=None):
+    """Parse command-line arguments and poll notifications, writing new ones as NDJSON."""
+    parser = argparse.ArgumentParser(description="Poll Bluesky notifications and write new ones as NDJSON.")
+    parser.add_argument('--output', '-o', default='-', help="append to this file ('-' for stdout, the default)")
+    parser.add_argument('--reasons', help="only write these reasons, e.g. mention,reply,quote (default: all)")
+    parser.add_argument('--state', help="watermark file (default: BLUESKY_NOTIFICATION_STATE_PATH)")
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL,
+                        help=f"seconds between polls while notifications arrive (default: {MIN_INTERVAL:g})")
+    parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL,
+                        help=f"longest wait while the account is quiet (default: {MAX_INTERVAL:g})")
+    parser.add_argument('--backfill', type=int, default=0,
+                        help="on the first run, also write up to this many existing notifications")
+    parser.add_argument('--max-polls', type=int, help="stop after this many polls (default: run until interrupted)")
+    parser.add_argument('--mark-read', action='store_true',
+                        help="mark handled notifications as read (updateSeen)")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_config()
+    except ValueError as e:
+        print(f"Configuration error: {e}", file=sys.stderr)
+        return False
+
+    import session_store
+    interval = AdaptiveInterval(args.min_interval, max(args.min_interval, args.max_interval))
+    client = make_client(config.BLUESKY_SERVICE, interval)
+    try:
+        resilience.call(
+            lambda: session_store.login(client, config.BLUESKY_SERVICE, config.BLUESKY_HANDLE,
+                                        config.BLUESKY_PASSWORD),
+            config.BLUESKY_SERVICE,
+        )
+    except Exception as e:
+        print(f"[ERROR] Login failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+
+    reasons = [reason.strip() for reason in args.reasons.split(',') if reason.strip()] if args.reasons else None
+    poller = NotificationPoller(client, client.me.did, config.BLUESKY_SERVICE, args.state, reasons=reasons,
+                                interval=interval)
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+
+    def write(row):
+        output.write(json.dumps(row) + '\n')
+        output.flush()
+
+    try:
+        poller.run(write, args.max_polls, args.backfill, args.mark_read)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"[ERROR] Polling failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        print(f"Wrote {poller.delivered} notifications in {poller.polls} polls ({poller.requests} requests)",
+              file=sys.stderr)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
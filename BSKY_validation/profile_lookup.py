@@ -0,0 +1,161 @@
+"""
+Script to look up many Bluesky profiles in bulk.
+
+Handles (or DIDs) are read one per line and sent in
+``app.bsky.actor.getProfiles`` batches of up to 25 actors, with several
+batches in flight at once. Handles already resolved to a DID are looked up
+by DID, and every returned profile refreshes the handle -> DID cache.
+Profiles are written as NDJSON as each batch completes; malformed and
+unresolvable handles are reported on a separate stream.
+"""
+import argparse
+import json
+import re
+import sys
+from itertools import islice
+from config import validate_config
+from handle_cache import normalize_handle, shared_cache
+
+BATCH_SIZE = 25  # getProfiles limit
+DEFAULT_WORKERS = 8
+
+HANDLE_RE = re.compile(
+    r'^([a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]([a-z0-9-]{0,61}[a-z0-9])?$'
+)
+DID_RE = re.compile(r'^did:[a-z]+:[a-zA-Z0-9._:%-]*[a-zA-Z0-9._-]$')
+
+def parse_actor(line):
+    """Return the normalized handle or DID on ``line``, or None if it is malformed."""
+    actor = line.strip()
+    if actor.startswith('did:'):
+        return actor if DID_RE.match(actor) else None
+    actor = normalize_handle(actor)
+    return actor if len(actor) <= 253 and HANDLE_RE.match(actor) else None
+
+def profile_row(actor, profile):
+    """Flatten a ProfileViewDetailed into an NDJSON row."""
+    return {
+        'actor': actor,
+        'did': profile.did,
+        'handle': profile.handle,
+        'display_name': profile.display_name,
+        'followers': profile.followers_count,
+        'follows': profile.follows_count,
+        'posts': profile.posts_count,
+        'created_at': profile.created_at,
+    }
+
+def lookup_batch(client, actors, cache):
+    """Fetch up to 25 actors with one getProfiles call and return a result per actor."""
+    # Cached DIDs spare the server a handle resolution per actor
+    keys = [actor if actor.startswith('did:') else cache.get(actor) or actor for actor in actors]
+    try:
+        response = client.get_profiles(keys)
+    except Exception as e:
+        return [{'actor': actor, 'error': f"{type(e).__name__}: {e}"} for actor in actors]
+    found = {}
+    for profile in response.profiles:
+        cache.put(profile.handle, profile.did)
+        found[profile.did] = found[profile.handle.lower()] = profile
+    results = []
+    for actor, key in zip(actors, keys):
+        profile = found.get(key) or found.get(actor)
+        if profile is None:
+            results.append({'actor': actor, 'error': 'Profile not found or handle could not be resolved'})
+        else:
+            results.append(profile_row(actor, profile))
+    return results
+
+def lookup_profiles(client, lines, output=None, errors=None, workers=DEFAULT_WORKERS, cache=None):
+    """Look up the actors in ``lines`` concurrently, streaming results as NDJSON.
+
+    Profiles go to ``output`` and malformed or unresolvable actors to
+    ``errors``. At most ``workers * 2`` batches are in flight, so the input
+    is consumed lazily. Returns (found, total).
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    output = output or sys.stdout
+    errors = errors or sys.stderr
+    if cache is None:
+        cache = shared_cache()
+    found = total = 0
+
+    def valid_actors():
+        nonlocal total
+        for line in lines:
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            actor = parse_actor(line)
+            if actor is None:
+                total += 1
+                errors.write(json.dumps({'actor': line.strip(), 'error': 'Malformed handle or DID'}) + '\n')
+                continue
+            yield actor
+
+    actors = valid_actors()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                batch = list(islice(actors, BATCH_SIZE))
+                if not batch:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(lookup_batch, client, batch, cache))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    total += 1
+                    if 'error' in result:
+                        errors.write(json.dumps(result) + '\n')
+                    else:
+                        found += 1
+                        output.write(json.dumps(result) + '\n')
+            output.flush()
+            errors.flush()
+    return found, total
+
+def main(argv=None):
+    """Parse command-line arguments and run the lookup."""
+    parser = argparse.ArgumentParser(description="Look up Bluesky profiles in bulk with batched getProfiles calls.")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="file with one handle or DID per line ('-' for stdin, the default)")
+    parser.add_argument('--output', '-o', default='-', help="profiles NDJSON file ('-' for stdout, the default)")
+    parser.add_argument('--errors', default=None,
+                        help="NDJSON file for malformed or unresolvable handles (default: stderr)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent getProfiles requests (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_config()
+    except ValueError as e:
+        print(f"Configuration error: {e}", file=sys.stderr)
+        return False
+
+    import clients
+    try:
+        client = clients.client()
+    except Exception as e:
+        print(f"[ERROR] Login failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+
+    lines = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    errors = sys.stderr if args.errors is None else open(args.errors, 'w', encoding='utf-8')
+    try:
+        found, total = lookup_profiles(client, lines, output, errors, max(1, args.workers))
+    finally:
+        for stream in (lines, output, errors):
+            if stream not in (sys.stdin, sys.stdout, sys.stderr):
+                stream.close()
+    print(f"Found {found} of {total} profiles", file=sys.stderr)
+    # Some misses are expected in bulk input; none found at all means the run failed
+    return found > 0 or total == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,233 @@
+"""
+Batch publishing pipeline for Bluesky posts.
+
+Posts are read lazily from a queue file or NDJSON stream, grouped into
+``com.atproto.repo.applyWrites`` batches and paced against the PDS write
+rate-limit points budget using the ``ratelimit-*`` response headers.
+"""
+import itertools
+import json
+import sys
+import time
+
+# Points charged per write by the PDS (creates cost the most)
+CREATE_POINTS = 3
+# Default PDS write budget when no ratelimit headers have been seen yet
+DEFAULT_POINTS_PER_HOUR = 5000
+# The PDS accepts at most 200 writes per applyWrites call
+MAX_BATCH_SIZE = 200
+DEFAULT_BATCH_SIZE = 50
+
+def read_posts(stream):
+    """Yield (line_number, post) pairs from a queue stream.
+
+    Each non-blank line is either a JSON object with a ``text`` field (and
+    optional ``langs`` and ``images``) or plain text used as the post text.
+    ``images`` is a list of file paths or ``{"path": ..., "alt": ...}``
+    objects.
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.rstrip('\n')
+        if not line.strip():
+            continue
+        if line.lstrip().startswith('{'):
+            try:
+                post = json.loads(line)
+            except ValueError:
+                post = {'text': line}
+        else:
+            post = {'text': line}
+        yield line_number, post
+
+class WritePointsScheduler:
+    """Paces writes against the PDS write rate-limit points budget.
+
+    The local estimate of remaining points is replaced by the server's view
+    whenever a response carries ``ratelimit-*`` headers.
+    """
+
+    def __init__(self, points_per_hour=DEFAULT_POINTS_PER_HOUR, clock=time.time, sleep=time.sleep):
+        self.limit = points_per_hour
+        self.remaining = points_per_hour
+        self.reset = None
+        self._clock = clock
+        self._sleep = sleep
+
+    def update(self, headers):
+        """Update the budget from a response's ratelimit headers."""
+        if 'ratelimit-remaining' not in headers:
+            return
+        self.remaining = int(headers['ratelimit-remaining'])
+        self.limit = int(headers.get('ratelimit-limit', self.limit))
+        if 'ratelimit-reset' in headers:
+            self.reset = int(headers['ratelimit-reset'])
+
+    def wait_for_reset(self):
+        """Sleep until the rate-limit window resets and restore the full budget."""
+        now = self._clock()
+        reset = self.reset if self.reset and self.reset > now else now + 60
+        print(f"Write budget exhausted, waiting {reset - now:.0f}s for rate-limit reset", file=sys.stderr)
+        self._sleep(reset - now)
+        self.remaining = self.limit
+        self.reset = None
+
+    def acquire(self, wanted):
+        """Return how many creates may be sent now (at most ``wanted``), waiting if needed."""
+        while self.remaining < CREATE_POINTS:
+            self.wait_for_reset()
+        count = min(wanted, self.remaining // CREATE_POINTS)
+        self.remaining -= count * CREATE_POINTS
+        return count
+
+def make_client(service, scheduler):
+    """Create a Client whose responses feed their ratelimit headers to ``scheduler``."""
+    from atproto import Client
+    import instrumentation
+
+    def on_response(response):
+        if 'applyWrites' in response.request.url.path:
+            scheduler.update(response.headers)
+    # Not cached like clients.client(): the hook belongs to this scheduler
+    return Client(base_url=service, request=instrumentation.make_request({'response': [on_response]}))
+
+def _make_write(client, post):
+    from atproto import models
+    from rich_text import build_facets
+    text = post.get('text')
+    if not isinstance(text, str):
+        raise ValueError("post needs a 'text' string")
+    record = models.AppBskyFeedPost.Record(
+        text=text,
+        facets=build_facets(client, text),
+        created_at=post.get('created_at') or client.get_current_time_iso(),
+        langs=post.get('langs'),
+        embed=post.get('embed'),
+    )
+    return models.ComAtprotoRepoApplyWrites.Create(collection=models.ids.AppBskyFeedPost, value=record)
+
+def _build_writes(client, chunk):
+    """Build the applyWrites create of every post in ``chunk``.
+
+    Returns (writes, errors): (line_number, write) pairs, and error results
+    for posts that can't be turned into a record (no text, invalid fields).
+    """
+    from atproto.exceptions import AtProtocolError
+    writes = []
+    errors = []
+    for line, post in chunk:
+        try:
+            writes.append((line, _make_write(client, post)))
+        except (KeyError, TypeError, ValueError, AtProtocolError) as e:
+            errors.append({'line': line, 'error': f"{type(e).__name__}: {e}"})
+    return writes, errors
+
+def _apply_batch(client, scheduler, writes):
+    """Send one batch of (line_number, write) pairs, retrying after rate-limit waits.
+
+    Returns per-post results. applyWrites is atomic, so when the PDS
+    rejects a batch outright the posts are sent one by one and only the
+    rejected ones fail. The batch is given up after config.RETRY_ATTEMPTS
+    rate-limit waits.
+    """
+    from atproto import models
+    from atproto.exceptions import AtProtocolError, RateLimitExceededError
+    import config
+    import resilience
+    data = models.ComAtprotoRepoApplyWrites.Data(repo=client.me.did, writes=[write for _, write in writes])
+    attempts = max(config.RETRY_ATTEMPTS, 1)
+    for attempt in range(attempts):
+        try:
+            # Not idempotent: a batch that may have reached the PDS is not resent
+            response = resilience.call(lambda: client.com.atproto.repo.apply_writes(data), idempotent=False)
+        except RateLimitExceededError as e:
+            if attempt == attempts - 1:
+                error = f"{type(e).__name__}: {e}"
+                return [{'line': line, 'error': error} for line, _ in writes]
+            scheduler.wait_for_reset()
+            continue
+        except (AtProtocolError, resilience.CircuitOpenError) as e:
+            if len(writes) > 1 and resilience.classify(e)[0] == resilience.PERMANENT:
+                return [result for write in writes for result in _apply_batch(client, scheduler, [write])]
+            # Every post in the batch failed
+            error = f"{type(e).__name__}: {e}"
+            return [{'line': line, 'error': error} for line, _ in writes]
+        results = list(response.results or [])
+        # Results are in write order; posts past the end got none, so their outcome is unknown
+        return [
+            {'line': line, 'uri': results[i].uri, 'cid': results[i].cid} if i < len(results) else
+            {'line': line, 'error': f"unknown: the PDS returned {len(results)} results for {len(writes)} writes"}
+            for i, (line, _) in enumerate(writes)
+        ]
+
+def image_specs(images):
+    """Return (path, alt) pairs from a post's ``images`` list."""
+    return [(image, None) if isinstance(image, str) else (image['path'], image.get('alt')) for image in images]
+
+def _attach_images(uploader, chunk):
+    """Upload the images of every post in ``chunk`` concurrently.
+
+    Sets each post's ``embed`` and returns (ready, errors): the posts to
+    publish and error results for posts whose images failed. Without an
+    ``uploader``, posts with images are reported as errors.
+    """
+    from media_upload import MediaError
+    submitted = []
+    errors = []
+    for line, post in chunk:
+        if not post.get('images'):
+            submitted.append((line, post, None))
+            continue
+        if uploader is None:
+            errors.append({'line': line, 'error': "Post has images but no image uploader was given"})
+            continue
+        try:
+            submitted.append((line, post, uploader.submit(image_specs(post['images']))))
+        except (OSError, KeyError, TypeError, MediaError) as e:
+            errors.append({'line': line, 'error': f"{type(e).__name__}: {e}"})
+    ready = []
+    for line, post, pending in submitted:
+        if pending is not None:
+            try:
+                post['embed'], post['blob_digests'] = uploader.collect(pending)
+            except Exception as e:
+                errors.append({'line': line, 'error': f"{type(e).__name__}: {e}"})
+                continue
+        ready.append((line, post))
+    return ready, errors
+
+def publish_stream(client, posts, output=None, batch_size=DEFAULT_BATCH_SIZE, scheduler=None, uploader=None):
+    """Publish (line_number, post) pairs in applyWrites batches.
+
+    Only one batch is held in memory at a time. One JSON result per post is
+    written to ``output`` as each batch completes. Posts with ``images``
+    need an ``uploader`` (a media_upload.ImageUploader); the images of a
+    batch are uploaded concurrently before it is sent.
+    Returns (published, total).
+    """
+    output = output or sys.stdout
+    scheduler = scheduler or WritePointsScheduler()
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    published = total = 0
+    posts = iter(posts)
+    while True:
+        batch = list(itertools.islice(posts, batch_size))
+        if not batch:
+            break
+        while batch:
+            # Shrink the batch to what the remaining budget allows
+            count = scheduler.acquire(len(batch))
+            chunk, batch = batch[:count], batch[count:]
+            chunk, results = _attach_images(uploader, chunk)
+            writes, errors = _build_writes(client, chunk)
+            results += errors
+            if writes:
+                results += _apply_batch(client, scheduler, writes)
+            posts_by_line = dict(chunk)
+            for result in results:
+                total += 1
+                published += 'uri' in result
+                if 'uri' in result and uploader is not None:
+                    uploader.commit(posts_by_line[result['line']].get('blob_digests', ()))
+                output.write(json.dumps(result) + '\n')
+            output.flush()
+    return published, total
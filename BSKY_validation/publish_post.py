@@ -1,11 +1,17 @@
 """
 Script to publish a post to Bluesky.
 """
-from atproto import Client
-from config import BLUESKY_HANDLE, BLUESKY_PASSWORD, BLUESKY_SERVICE, validate_config
+import argparse
+import sys
+import publish_pipeline
+import resilience
+import session_store
+from rich_text import build_facets
+import config
+from config import validate_config
 
-def publish_post():
-    """Publish a post to Bluesky."""
+def publish_post(images=None):
+    """Publish a post to Bluesky, optionally with (path, alt) image pairs."""
     # Validate configuration
     try:
         validate_config()
@@ -15,13 +21,13 @@ def publish_post():
         print("Please ensure BLUESKY_PASSWORD is set in your .env file")
         return False
     
-    # Initialize Bluesky client
-    client = Client(base_url=BLUESKY_SERVICE)
+    from atproto import models
+    import clients
     
     try:
-        # Login
-        print(f"Connecting to Bluesky as {BLUESKY_HANDLE}...")
-        client.login(login=BLUESKY_HANDLE, password=BLUESKY_PASSWORD)
+        # Shared, logged-in client for the configured account
+        print(f"Connecting to Bluesky as {config.BLUESKY_HANDLE}...")
+        client = clients.client()
         print(f"Successfully authenticated as: {client.me.handle}")
         
         # Message to post
@@ -29,46 +35,116 @@ def publish_post():
         
         # Publish the post
         print(f"\nPublishing post: '{message}'")
-        from atproto import models
+        
+        # Upload the images, if any
+        embed = digests = None
+        if images:
+            from media_upload import ImageUploader
+            with ImageUploader(client, config.BLUESKY_SERVICE) as uploader:
+                embed, digests = uploader.upload(images)
+                print(f"Uploaded {uploader.uploaded} image(s), reused {uploader.reused}")
         
         # Create the post record
         post_record = models.AppBskyFeedPost.Record(
             text=message,
+            facets=build_facets(client, message),
+            embed=embed,
             created_at=client.get_current_time_iso()
         )
         
-        # Create the post using the repo API with data parameter
-        response = client.com.atproto.repo.create_record(
-            data=models.ComAtprotoRepoCreateRecord.Data(
-                repo=client.me.did,
-                collection=models.ids.AppBskyFeedPost,
-                record=post_record
-            )
+        # Create the post using the repo API with data parameter. Creating a
+        # record isn't idempotent, so it is only retried if it never reached the PDS.
+        response = resilience.call(
+            lambda: client.com.atproto.repo.create_record(
+                data=models.ComAtprotoRepoCreateRecord.Data(
+                    repo=client.me.did,
+                    collection=models.ids.AppBskyFeedPost,
+                    record=post_record
+                )
+            ),
+            config.BLUESKY_SERVICE, idempotent=False,
         )
         
+        if digests:
+            uploader.commit(digests)
+        
         print(f"\n[SUCCESS] Post published successfully!")
         print(f"Post URI: {response.uri}")
         print(f"Post CID: {response.cid}")
-        print(f"\nView your post at: https://bsky.app/profile/{BLUESKY_HANDLE}")
+        print(f"\nView your post at: https://bsky.app/profile/{config.BLUESKY_HANDLE}")
         
         return True
         
     except Exception as e:
-        error_msg = str(e)
-        if 'Invalid identifier or password' in error_msg or '401' in error_msg:
+        kind, _ = resilience.classify(e)
+        if kind == resilience.AUTH:
             print(f"\n[ERROR] Authentication failed: Invalid handle or app password")
             print("\nPlease check:")
             print("1. Your Bluesky handle is correct")
             print("2. You're using an App Password, not your regular password")
             print("3. The app password hasn't been revoked")
-        elif 'Connection' in error_msg or 'Network' in error_msg:
+        elif kind in (resilience.UNREACHABLE, resilience.TRANSIENT):
             print(f"\n[ERROR] Connection failed: Could not reach Bluesky")
             print("Please check your internet connection")
         else:
             print(f"\n[ERROR] Failed to publish post: {type(e).__name__}: {e}")
         return False
 
+def publish_queue(path, batch_size=publish_pipeline.DEFAULT_BATCH_SIZE):
+    """Publish every post from a queue file ('-' for stdin) in applyWrites batches."""
+    try:
+        validate_config()
+    except ValueError as e:
+        print(f"Configuration error: {e}", file=sys.stderr)
+        return False
+    
+    scheduler = publish_pipeline.WritePointsScheduler()
+    client = publish_pipeline.make_client(config.BLUESKY_SERVICE, scheduler)
+    try:
+        resilience.call(
+            lambda: session_store.login(client, config.BLUESKY_SERVICE, config.BLUESKY_HANDLE,
+                                        config.BLUESKY_PASSWORD),
+            config.BLUESKY_SERVICE,
+        )
+    except Exception as e:
+        print(f"[ERROR] Failed to connect to Bluesky: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    
+    from media_upload import ImageUploader
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        with ImageUploader(client, config.BLUESKY_SERVICE) as uploader:
+            published, total = publish_pipeline.publish_stream(
+                client, publish_pipeline.read_posts(stream), batch_size=batch_size, scheduler=scheduler,
+                uploader=uploader,
+            )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"{published}/{total} posts published", file=sys.stderr)
+    return published == total
+
+def main(argv=None):
+    """Parse command-line arguments and publish a single post or a queue."""
+    parser = argparse.ArgumentParser(description="Publish posts to Bluesky.")
+    parser.add_argument('--queue', metavar='FILE',
+                        help="publish every post in FILE ('-' for stdin): plain text or NDJSON with a 'text' field per line")
+    parser.add_argument('--batch-size', type=int, default=publish_pipeline.DEFAULT_BATCH_SIZE,
+                        help=f"posts per applyWrites call (default: {publish_pipeline.DEFAULT_BATCH_SIZE}, "
+                             f"max: {publish_pipeline.MAX_BATCH_SIZE})")
+    parser.add_argument('--image', action='append', metavar='PATH',
+                        help="attach an image to the single post (repeatable, up to 4)")
+    parser.add_argument('--alt', action='append', default=[],
+                        help="alt text for the images, in the same order as --image")
+    args = parser.parse_args(argv)
+    if args.queue:
+        return publish_queue(args.queue, args.batch_size)
+    images = None
+    if args.image:
+        images = [(path, args.alt[i] if i < len(args.alt) else None) for i, path in enumerate(args.image)]
+    return publish_post(images)
+
 if __name__ == "__main__":
-    success = publish_post()
+    success = main()
     exit(0 if success else 1)
 
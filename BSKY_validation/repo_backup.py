@@ -0,0 +1,373 @@
+"""
+Script to back up a Bluesky account's repository incrementally.
+
+The first run downloads the whole repository with
+``com.atproto.sync.getRepo`` as a CAR file. Later runs pass the stored
+revision as ``since``, so the PDS only sends the blocks written after it.
+Each CAR file is streamed to disk and indexed block by block through
+``mmap``; block data is never loaded in bulk. An SQLite index maps every CID
+to its CAR file and offset and records the backed-up revision. Only the
+parts of the record tree (MST) that changed are walked. Records are exported
+as one NDJSON file per collection, and only collections with changes are
+rewritten.
+"""
+import argparse
+import base64
+import itertools
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import time
+import config
+import resilience
+
+INDEX_FILE = 'backup.sqlite3'
+CAR_DIR = 'car'
+RECORDS_DIR = 'records'
+DOWNLOAD_CHUNK = 1024 * 1024
+REQUEST_TIMEOUT = 60
+
+def read_varint(buf, pos):
+    """Decode an unsigned LEB128 varint at ``pos`` and return (value, next_pos)."""
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+def cid_length(buf, pos):
+    """Return the length in bytes of the binary CID starting at ``pos``."""
+    if buf[pos] == 0x12 and buf[pos + 1] == 0x20:
+        # CIDv0: a bare sha2-256 multihash
+        return 34
+    end = pos
+    for _ in range(3):  # version, codec, multihash code
+        _, end = read_varint(buf, end)
+    digest_length, end = read_varint(buf, end)
+    return end + digest_length - pos
+
+def iter_car(buf):
+    """Yield (cid, data_offset, data_length) for every block of a CARv1 buffer.
+
+    The header (with the root CIDs) is available from car_roots().
+    """
+    header_length, pos = read_varint(buf, 0)
+    pos += header_length
+    while pos < len(buf):
+        section_length, pos = read_varint(buf, pos)
+        length = cid_length(buf, pos)
+        yield bytes(buf[pos:pos + length]), pos + length, section_length - length
+        pos += section_length
+
+def car_roots(buf):
+    """Return the root CIDs from a CARv1 header."""
+    import libipld
+    header_length, pos = read_varint(buf, 0)
+    return libipld.decode_dag_cbor(bytes(buf[pos:pos + header_length]))['roots']
+
+def cid_str(cid):
+    """Return the base32 string form of a binary CID."""
+    import libipld
+    return libipld.encode_cid(cid)
+
+def cid_bytes(cid):
+    """Return the binary form of a CID string."""
+    import libipld
+    return libipld.decode_multibase(cid)[1]
+
+class BlockStore:
+    """Index of the blocks in a backup's CAR files, read through mmap."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._conn = sqlite3.connect(os.path.join(directory, INDEX_FILE))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            " cid BLOB PRIMARY KEY, car TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL)"
+        )
+        # CIDs of the MST nodes of the backed-up revision, and that revision
+        self._conn.execute("CREATE TABLE IF NOT EXISTS mst_nodes (cid BLOB PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._maps = {}
+
+    def _map(self, name):
+        if name not in self._maps:
+            with open(os.path.join(self.directory, CAR_DIR, name), 'rb') as f:
+                self._maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[name]
+
+    def add_car(self, name):
+        """Index the blocks of a CAR file and return how many it holds."""
+        count = 0
+        with self._conn:
+            for cid, offset, length in iter_car(self._map(name)):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blocks (cid, car, offset, length) VALUES (?, ?, ?, ?)",
+                    (cid, name, offset, length),
+                )
+                count += 1
+        return count
+
+    def has_node(self, cid):
+        """Return True if ``cid`` is an MST node of the backed-up revision."""
+        return self._conn.execute("SELECT 1 FROM mst_nodes WHERE cid = ?", (cid,)).fetchone() is not None
+
+    def state(self):
+        """Return the backed-up revision (did, rev, commit, data), or None for an empty backup."""
+        row = self._conn.execute("SELECT value FROM state WHERE name = 'revision'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def commit(self, state, removed, added):
+        """Record a new backed-up revision and its MST node changes in one transaction."""
+        with self._conn:
+            self._conn.executemany("DELETE FROM mst_nodes WHERE cid = ?", ((cid,) for cid in removed))
+            self._conn.executemany("INSERT OR IGNORE INTO mst_nodes (cid) VALUES (?)", ((cid,) for cid in added))
+            self._conn.execute("INSERT OR REPLACE INTO state (name, value) VALUES ('revision', ?)",
+                               (json.dumps(state),))
+
+    def get(self, cid):
+        """Return the decoded DAG-CBOR block for a binary CID."""
+        import libipld
+        row = self._conn.execute("SELECT car, offset, length FROM blocks WHERE cid = ?", (cid,)).fetchone()
+        if row is None:
+            raise KeyError(f"Block {cid_str(cid)} is missing from the backup (run with --full)")
+        name, offset, length = row
+        return libipld.decode_dag_cbor(self._map(name)[offset:offset + length])
+
+    def close(self):
+        for buf in self._maps.values():
+            buf.close()
+        self._maps.clear()
+        self._conn.close()
+
+def walk_mst(store, root, skip=None, reached=None, expanded=None):
+    """Yield (key, record_cid) from the MST rooted at ``root`` in key order.
+
+    Subtrees whose node CID satisfies ``skip(cid)`` aren't descended into.
+    Every node reached is added to ``reached``, and every node read (not
+    skipped) to ``expanded``.
+    """
+    stack = [('node', root)]
+    while stack:
+        kind, value = stack.pop()
+        if kind == 'leaf':
+            yield value
+            continue
+        if reached is not None:
+            reached.add(value)
+        if skip is not None and skip(value):
+            continue
+        if expanded is not None:
+            expanded.add(value)
+        node = store.get(value)
+        items = []
+        if node.get('l'):
+            items.append(('node', node['l']))
+        key = b''
+        for entry in node['e']:
+            key = key[:entry['p']] + entry['k']
+            items.append(('leaf', (key.decode('utf-8'), entry['v'])))
+            if entry.get('t'):
+                items.append(('node', entry['t']))
+        stack.extend(reversed(items))
+
+def diff_mst(store, old_root, new_root):
+    """Return (changes, removed_nodes, added_nodes) between the stored MST and ``new_root``.
+
+    ``changes`` maps each changed record key to its new CID (None when
+    deleted). MST nodes are content-addressed, so a subtree whose node is
+    already in the stored tree is unchanged and isn't read. Only the new
+    nodes and the old nodes they replace are walked.
+    """
+    new_reached, new_expanded, old_expanded = set(), set(), set()
+    if old_root is None:
+        new_entries, old_entries = dict(walk_mst(store, new_root, expanded=new_expanded)), {}
+    else:
+        new_entries = dict(walk_mst(store, new_root, store.has_node, new_reached, new_expanded))
+        old_entries = dict(walk_mst(store, old_root, new_reached.__contains__, expanded=old_expanded))
+    changes = {key: None for key in old_entries if key not in new_entries}
+    changes.update((key, cid) for key, cid in new_entries.items() if old_entries.get(key) != cid)
+    return changes, old_expanded, new_expanded
+
+def to_json(value):
+    """Convert a decoded DAG-CBOR value to the atproto JSON form ($link/$bytes)."""
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    if isinstance(value, bytes):
+        # DAG-CBOR links decode to their binary CID (CIDv1, dag-cbor or raw codec, sha2-256)
+        if len(value) == 36 and value[0] == 1 and value[1] in (0x55, 0x71) and value[2:4] == b'\x12\x20':
+            return {'$link': cid_str(value)}
+        return {'$bytes': base64.b64encode(value).decode('ascii').rstrip('=')}
+    return value
+
+def update_exports(store, records_dir, did, changes):
+    """Rewrite the NDJSON file of each collection touched by ``changes``."""
+    by_collection = {}
+    for key, cid in changes.items():
+        collection, _, rkey = key.partition('/')
+        by_collection.setdefault(collection, {})[rkey] = cid
+    os.makedirs(records_dir, exist_ok=True)
+    for collection, rkeys in sorted(by_collection.items()):
+        path = os.path.join(records_dir, f"{collection}.ndjson")
+        prefix = f"at://{did}/{collection}/"
+        tmp_path = f"{path}.tmp"
+        written = 0
+        with open(tmp_path, 'w', encoding='utf-8') as output:
+            if os.path.exists(path):
+                # Stream the previous export, dropping changed and deleted records
+                with open(path, encoding='utf-8') as previous:
+                    for line in previous:
+                        if json.loads(line)['uri'][len(prefix):] not in rkeys:
+                            output.write(line)
+                            written += 1
+            for rkey, cid in sorted(rkeys.items()):
+                if cid is not None:
+                    row = {'uri': f"{prefix}{rkey}", 'cid': cid_str(cid), 'value': to_json(store.get(cid))}
+                    output.write(json.dumps(row, ensure_ascii=False) + '\n')
+                    written += 1
+        if written:
+            os.replace(tmp_path, path)
+        else:
+            # Every record of the collection was deleted
+            os.remove(tmp_path)
+            if os.path.exists(path):
+                os.remove(path)
+    return by_collection
+
+def download_repo(pds, did, since, path):
+    """Stream getRepo (a diff after revision ``since``, if given) to ``path``; return the bytes written."""
+    import clients
+    params = {'did': did}
+    if since:
+        params['since'] = since
+
+    attempts = itertools.count()
+
+    def fetch():
+        # Each attempt writes its own file, so a failed attempt never leaves bytes behind
+        part_path = f"{path}.{next(attempts)}"
+        written = 0
+        try:
+            with clients.http_client().stream('GET', f"{pds.rstrip('/')}/xrpc/com.atproto.sync.getRepo",
+                                              params=params, timeout=REQUEST_TIMEOUT) as response:
+                if response.status_code >= 400:
+                    # Raise the same exceptions as the SDK, so failures are classified alike
+                    response.read()
+                    clients.raise_for_status(response)
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_bytes(DOWNLOAD_CHUNK):
+                        f.write(chunk)
+                        written += len(chunk)
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        return written
+
+    # Retried like any read, but never hedged: a second copy of a large
+    # download only competes with the first for bandwidth
+    return resilience.call(fetch, pds, idempotent=True, hedge_after=0)
+
+def resolve_pds(did):
+    """Return the PDS endpoint from a DID document, or None if it can't be resolved."""
+    from atproto import IdResolver
+    try:
+        return IdResolver(timeout=10).did.resolve_atproto_data(did).pds
+    except Exception:
+        return None
+
+def _reset(directory):
+    """Remove the CAR files, index and exports of a previous backup."""
+    import shutil
+    for name in (CAR_DIR, RECORDS_DIR):
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    if os.path.exists(os.path.join(directory, INDEX_FILE)):
+        os.remove(os.path.join(directory, INDEX_FILE))
+
+def backup(did, directory, pds, full=False):
+    """Bring the backup in ``directory`` up to date and return a summary dict."""
+    os.makedirs(directory, exist_ok=True)
+    store = BlockStore(directory)
+    state = store.state()
+    if state is not None and state['did'] != did:
+        store.close()
+        raise ValueError(f"{directory} holds a backup of {state['did']}, not {did}")
+    if full or state is None:
+        # Start over: blocks and exports of an older backup can't be reused
+        store.close()
+        _reset(directory)
+        store, state = BlockStore(directory), None
+    os.makedirs(os.path.join(directory, CAR_DIR), exist_ok=True)
+    tmp_path = os.path.join(directory, CAR_DIR, f"download-{os.getpid()}.part")
+    try:
+        size = download_repo(pds, did, state['rev'] if state else None, tmp_path)
+        with open(tmp_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            import libipld
+            commit_cid = car_roots(buf)[0]
+            commit = next(libipld.decode_dag_cbor(buf[offset:offset + length])
+                          for cid, offset, length in iter_car(buf) if cid == commit_cid)
+        summary = {'did': did, 'rev': commit['rev'], 'bytes': size, 'changed': 0, 'deleted': 0, 'collections': []}
+        if state and commit['rev'] == state['rev']:
+            return summary
+        name = f"{commit['rev']}.car"
+        os.replace(tmp_path, os.path.join(directory, CAR_DIR, name))
+        store.add_car(name)
+        changes, removed, added = diff_mst(store, cid_bytes(state['data']) if state else None, commit['data'])
+        collections = update_exports(store, os.path.join(directory, RECORDS_DIR), did, changes)
+        # Applying the same changes twice gives the same exports, so a run
+        # interrupted before this point is simply repeated from the stored revision
+        store.commit({
+            'did': did,
+            'rev': commit['rev'],
+            'commit': cid_str(commit_cid),
+            'data': cid_str(commit['data']),
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }, removed, added)
+    finally:
+        store.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    summary['deleted'] = sum(1 for cid in changes.values() if cid is None)
+    summary['changed'] = len(changes) - summary['deleted']
+    summary['collections'] = sorted(collections)
+    return summary
+
+def main(argv=None):
+    """Parse command-line arguments and run the backup."""
+    parser = argparse.ArgumentParser(description="Incrementally back up a Bluesky repository.")
+    parser.add_argument('actor', nargs='?', help="handle or DID to back up (default: BLUESKY_HANDLE)")
+    parser.add_argument('--output', '-o', default='bluesky-backup', help="backup directory (default: bluesky-backup)")
+    parser.add_argument('--pds', help="PDS to download from (default: from the DID document, else BLUESKY_SERVICE)")
+    parser.add_argument('--full', action='store_true', help="discard the previous backup and download everything")
+    args = parser.parse_args(argv)
+
+    actor = args.actor or config.BLUESKY_HANDLE
+    try:
+        if actor.startswith('did:'):
+            did = actor
+        else:
+            import clients
+            from handle_cache import shared_cache
+            did = shared_cache().resolve(clients.client(login=False), actor)
+            if did is None:
+                print(f"[ERROR] Handle {actor} doesn't resolve", file=sys.stderr)
+                return False
+        pds = args.pds or resolve_pds(did) or config.BLUESKY_SERVICE
+        print(f"Backing up {did} from {pds}", file=sys.stderr)
+        summary = backup(did, args.output, pds, args.full)
+    except Exception as e:
+        print(f"[ERROR] Backup failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    print(json.dumps(summary))
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
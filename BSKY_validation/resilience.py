@@ -0,0 +1,74 @@
+"""
+Retries, backoff, request hedging and circuit breaking for Bluesky API calls.
+
+Failures are classified by type instead of by message text:
+
+- ``auth``: the credential was rejected; retrying can't help.
+- ``rate-limited``: the call may be retried once the ``retry-after`` or
+  ``ratelimit-reset`` time has passed.
+- ``unreachable``: the request never reached the server (connection
+  refused, DNS failure, connect timeout), so any call is safe to retry.
+- ``transient``: the request may have been processed (read timeout, reset
+  connection, 5xx), so only idempotent calls are retried.
+- ``permanent``: anything else.
+
+``call()`` retries with exponential backoff and full jitter, optionally
+hedges idempotent requests, and keeps a circuit breaker per host, so a
+degraded endpoint fails fast instead of tying up every check in timeouts.
+The retry loop is shared with the other project (see shared/resilience.py);
+this module classifies the errors.
+"""
+import time
+import shared_modules  # puts shared/ on the import path
+from shared import resilience as _shared
+from shared.resilience import (
+    AUTH, BASE_DELAY, HOST_FAILURES, PERMANENT, RATE_LIMITED, RETRYABLE, TRANSIENT, UNREACHABLE,
+    CircuitBreaker, CircuitOpenError, backoff_delay, breaker, hedged,
+)
+
+# XRPC error names of 400 responses that mean the credentials were rejected
+AUTH_ERRORS = ('AuthenticationRequired', 'InvalidToken', 'ExpiredToken', 'AccountTakedown')
+
+def _retry_after(error):
+    """Return the seconds to wait before retrying a rate-limited call, or None."""
+    if getattr(error, 'retry_after', None) is not None:
+        return error.retry_after
+    reset_at = getattr(error, 'reset_at', None)
+    if reset_at is not None:
+        return max(reset_at.timestamp() - time.time(), 0.0)
+    return None
+
+def classify(error):
+    """Return (kind, retry_after) for an exception from atproto or httpx."""
+    import httpx
+    from atproto_client import exceptions
+    if isinstance(error, CircuitOpenError):
+        return UNREACHABLE, None
+    response = getattr(error, 'response', None)
+    if isinstance(error, exceptions.NetworkError) and response is None:
+        # atproto wraps transport errors; look at the underlying httpx exception
+        error = error.__cause__ or error
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return UNREACHABLE, None
+    if isinstance(error, (httpx.TransportError, exceptions.NetworkError)) and response is None:
+        return TRANSIENT, None
+    if isinstance(error, exceptions.RateLimitExceededError):
+        return RATE_LIMITED, _retry_after(error)
+    if isinstance(error, exceptions.UnauthorizedError):
+        return AUTH, None
+    if isinstance(error, exceptions.BadRequestError):
+        code = getattr(response.content, 'error', None) if response is not None else None
+        return (AUTH if code in AUTH_ERRORS else PERMANENT), None
+    if response is not None and response.status_code >= 500:
+        return TRANSIENT, None
+    return PERMANENT, None
+
+def call(func, url=None, idempotent=False, **options):
+    """Call ``func()`` with retries, returning its result or raising its last error.
+
+    Failures are classified with classify(); see shared/resilience.py for
+    ``classify_result``, ``attempts``, ``max_delay`` and ``hedge_after``.
+    Calls are treated as non-idempotent unless ``idempotent`` is set. With
+    ``url`` the host's circuit breaker is consulted and updated.
+    """
+    return _shared.call(func, url, idempotent, classify=classify, **options)
@@ -0,0 +1,84 @@
+"""
+Rich-text facets for Bluesky posts.
+
+Detects @mentions, links and #hashtags in post text and builds the
+``app.bsky.richtext.facet`` annotations with UTF-8 byte offsets, which is
+what the app uses to render them. Mentions are resolved to DIDs through the
+shared handle -> DID cache, so repeated mentions cost one lookup per TTL.
+"""
+import re
+import unicodedata
+from handle_cache import shared_cache
+
+# Adapted from the patterns used by the official Bluesky clients
+MENTION_RE = re.compile(
+    r'(?:^|(?<=[\s(\[{"\']))@'
+    r'((?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)'
+)
+LINK_RE = re.compile(r'(?:^|(?<=[\s(\[{"\']))(https?://[^\s<>"]+)')
+TAG_RE = re.compile(r'(?:^|(?<=\s))[#\uff03]([^\s#\uff03\u00ad\u2060\u200a-\u200d\u20e2]+)')
+
+MAX_TAG_LENGTH = 64
+
+def _strip_trailing_punctuation(value):
+    while value and unicodedata.category(value[-1]).startswith('P') and value[-1] not in '/':
+        value = value[:-1]
+    return value
+
+def _byte_offset(text, index):
+    return len(text[:index].encode('utf-8'))
+
+def find_facets(text):
+    """Return (kind, byte_start, byte_end, value) for each mention, link and tag in ``text``.
+
+    ``kind`` is 'mention' (value is the handle), 'link' (the URL) or 'tag'
+    (the tag without '#').
+    """
+    spans = []
+    for match in MENTION_RE.finditer(text):
+        spans.append(('mention', match.start(), match.end(), match.group(1).lower()))
+    for match in LINK_RE.finditer(text):
+        url = _strip_trailing_punctuation(match.group(1))
+        # Keep a closing parenthesis only when the URL itself opened one
+        if match.group(1)[len(url):len(url) + 1] == ')' and '(' in url:
+            url += ')'
+        spans.append(('link', match.start(1), match.start(1) + len(url), url))
+    for match in TAG_RE.finditer(text):
+        tag = _strip_trailing_punctuation(match.group(1))
+        if not tag or tag.isdigit() or len(tag) > MAX_TAG_LENGTH:
+            continue
+        spans.append(('tag', match.start(1) - 1, match.start(1) + len(tag), tag))
+    spans.sort(key=lambda span: span[1])
+    return [
+        (kind, _byte_offset(text, start), _byte_offset(text, end), value)
+        for kind, start, end, value in spans
+    ]
+
+def build_facets(client, text, cache=None):
+    """Return the facet models for ``text``, or None if it has none.
+
+    Mentions of handles that don't resolve are left as plain text.
+    """
+    from atproto import models
+    from atproto.exceptions import AtProtocolError
+    if cache is None:
+        cache = shared_cache()
+    facets = []
+    for kind, byte_start, byte_end, value in find_facets(text):
+        if kind == 'mention':
+            try:
+                did = cache.resolve(client, value)
+            except AtProtocolError:
+                did = None
+            if did is None:
+                continue
+            feature = models.AppBskyRichtextFacet.Mention(did=did)
+        elif kind == 'link':
+            feature = models.AppBskyRichtextFacet.Link(uri=value)
+        else:
+            feature = models.AppBskyRichtextFacet.Tag(tag=value)
+        facets.append(models.AppBskyRichtextFacet.Main(
+            index=models.AppBskyRichtextFacet.ByteSlice(byte_start=byte_start, byte_end=byte_end),
+            features=[feature],
+        ))
+    return facets or None
@@ -0,0 +1,119 @@
+"""
+Persistent Bluesky session storage.
+
+The access and refresh JWTs from the first login are saved to disk so later
+runs can resume the session without calling ``createSession``, which is
+slow and heavily rate-limited. A stored session is only resumed with the
+app password it was created from, so changing the password in .env forces
+a fresh login.
+"""
+import hashlib
+import json
+import os
+import time
+import threading
+import config
+import resilience
+
+# Refresh the access token when it has less than this many seconds left
+REFRESH_MARGIN = 15 * 60
+
+def _load(path):
+    path = path or config.BLUESKY_SESSION_PATH
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save(path, sessions):
+    path = path or config.BLUESKY_SESSION_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # The file holds live JWTs, so keep it private to the current user
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(sessions, f)
+    os.replace(tmp_path, path)
+
+def _entry_key(service, handle):
+    return f"{service.rstrip('/')}|{handle.lower()}"
+
+def _profile_fields(me):
+    return {
+        'did': me.did,
+        'handle': me.handle,
+        'display_name': getattr(me, 'display_name', None),
+    }
+
+def load_session(service, handle, path=None):
+    """Return the stored session entry for an account, or None."""
+    return _load(path).get(_entry_key(service, handle))
+
+def _password_hash(handle, password):
+    # Only tells which app password a session came from; the file already holds live JWTs
+    return hashlib.sha256(f"{handle.lower()}\0{password}".encode('utf-8')).hexdigest()
+
+def save_session(service, handle, session_string, profile=None, path=None, password=None):
+    """Store a session string (and optional profile fields and password hash) for an account."""
+    sessions = _load(path)
+    entry = sessions.get(_entry_key(service, handle), {})
+    entry['session'] = session_string
+    if profile is not None:
+        entry['profile'] = profile
+    if password is not None:
+        entry['password_hash'] = _password_hash(handle, password)
+    sessions[_entry_key(service, handle)] = entry
+    _save(path, sessions)
+
+def clear_session(service, handle, path=None):
+    """Forget the stored session for an account."""
+    sessions = _load(path)
+    if sessions.pop(_entry_key(service, handle), None) is not None:
+        _save(path, sessions)
+
+def _expires_in(jwt_payload):
+    if not jwt_payload or not jwt_payload.exp:
+        return 0
+    return jwt_payload.exp - time.time()
+
+def login(client, service, handle, password, path=None, use_stored=True, verify=False):
+    """Authenticate ``client``, resuming a stored session when possible.
+
+    A stored session whose access token is still fresh is resumed with no
+    network round trip, unless ``verify`` asks the server to confirm it with
+    ``getSession``. One that is close to expiry is refreshed, and a full
+    ``createSession`` login is only made when there is no usable session or
+    the server rejects it. Returns 'resumed', 'refreshed' or 'login'.
+    """
+    from atproto import Session, SessionEvent, models
+    events = []
+
+    def on_session_change(event, session):
+        events.append(event)
+        save_session(service, handle, session.export(), path=path)
+    client.on_session_change(on_session_change)
+
+    entry = load_session(service, handle, path) if use_stored else None
+    if entry and entry.get('profile') and entry.get('password_hash') == _password_hash(handle, password):
+        session = Session.decode(entry['session'])
+        if _expires_in(session.refresh_jwt_payload) > REFRESH_MARGIN:
+            client.login(session_string=entry['session'], fetch_bsky_profile=False)
+            client.me = models.AppBskyActorDefs.ProfileViewDetailed(**entry['profile'])
+            if _expires_in(session.access_jwt_payload) > REFRESH_MARGIN and not verify:
+                return 'resumed'
+            try:
+                # The client refreshes an access token close to expiry before the call
+                client.com.atproto.server.get_session()
+                return 'refreshed' if SessionEvent.REFRESH in events else 'resumed'
+            except Exception as e:
+                if resilience.classify(e)[0] != resilience.AUTH:
+                    raise
+                # The session or its app password was revoked; fall back to a full login
+        clear_session(service, handle, path)
+
+    client.login(login=handle, password=password)
+    save_session(service, handle, client.export_session_string(), _profile_fields(client.me), path, password)
+    return 'login'
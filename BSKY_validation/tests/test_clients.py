@@ -0,0 +1,39 @@
+import httpx
+import pytest
+from atproto import Client
+from atproto_client import exceptions
+from atproto_client.request import _handle_response
+from mock_servers import BlueskyMock
+
+import clients
+
+
+@pytest.mark.parametrize('status', [400, 401, 403, 409, 413, 429, 500, 502, 503])
+def test_error_responses_raise_what_the_sdk_raises(status):
+    # Guards the mapping against SDK upgrades
+    response = httpx.Response(status, json={'error': 'Failed', 'message': 'no'})
+    with pytest.raises(exceptions.AtProtocolError) as ours:
+        clients.raise_for_status(response)
+    with pytest.raises(exceptions.AtProtocolError) as sdk:
+        _handle_response(response)
+    assert type(ours.value) is type(sdk.value)
+    assert ours.value.response.content.error == 'Failed'
+
+
+def test_success_response_is_returned():
+    response = httpx.Response(200, json={})
+    assert clients.raise_for_status(response) is response
+
+
+def test_pooled_request_logs_in_and_raises_sdk_errors(bluesky_mock):
+    client = Client(base_url=bluesky_mock, request=clients.PooledRequest())
+    client.login(BlueskyMock.HANDLE, BlueskyMock.PASSWORD)
+    assert client.me.did == BlueskyMock.DID
+    with pytest.raises(exceptions.RequestException):
+        client.app.bsky.graph.get_lists({'actor': BlueskyMock.DID})
+
+
+def test_unreachable_host_raises_network_error():
+    client = Client(base_url='http://127.0.0.1:9', request=clients.PooledRequest())
+    with pytest.raises(exceptions.NetworkError):
+        client.com.atproto.server.describe_server()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from atproto import Client
+from mock_servers import BlueskyMock
+
+import clients
+import notification_poller
+
+
+@pytest.fixture
+def server():
+    server = BlueskyMock()
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_poller(server, state_path):
+    client = Client(base_url=server.url, request=clients.PooledRequest())
+    client.login(BlueskyMock.HANDLE, BlueskyMock.PASSWORD)
+    return notification_poller.NotificationPoller(client, BlueskyMock.DID, server.url, str(state_path))
+
+
+def texts(rows):
+    return [row['text'] for row in rows]
+
+
+def test_empty_account_delivers_the_first_notifications(server, tmp_path):
+    poller = make_poller(server, tmp_path / 'state.json')
+    assert poller.poll() == ([], 0)
+    assert poller.seen_at is None
+    server.add_notification(text='first')
+    server.add_notification(text='second')
+    rows, new_count = poller.poll()
+    assert texts(rows) == ['first', 'second'] and new_count == 2
+    assert poller.seen_at == server.notifications[0]['indexedAt']
+
+
+def test_later_polls_deliver_only_new_notifications(server, tmp_path):
+    server.add_notification(text='old')
+    poller = make_poller(server, tmp_path / 'state.json')
+    # The first run starts after the existing notifications, at the server's newest indexedAt
+    assert poller.poll() == ([], 1)
+    assert poller.seen_at == server.notifications[0]['indexedAt']
+
+    requests = poller.requests
+    assert poller.poll() == ([], 0)
+    # A quiet poll is a single listNotifications(limit=1)
+    assert poller.requests == requests + 1
+
+    server.add_notification(text='new')
+    assert texts(poller.poll()[0]) == ['new']
+    assert poller.poll() == ([], 0)
+
+
+def test_marking_read_doesnt_hide_new_notifications(server, tmp_path):
+    state_path = tmp_path / 'state.json'
+    poller = make_poller(server, state_path)
+    delivered = []
+    poller.run(delivered.append, max_polls=1, mark_read=True, sleep=lambda delay: None)
+    server.add_notification(text='one')
+    poller.run(delivered.append, max_polls=1, mark_read=True, sleep=lambda delay: None)
+    assert server.seen_at == server.notifications[0]['indexedAt']
+    server.add_notification(text='two')
+    poller.run(delivered.append, max_polls=1, mark_read=True, sleep=lambda delay: None)
+    assert texts(delivered) == ['one', 'two']
+
+    # A restarted poller continues from the saved watermark
+    assert json.loads(state_path.read_text())[BlueskyMock.DID]['seen_at'] == server.notifications[0]['indexedAt']
+    server.add_notification(text='three')
+    assert texts(make_poller(server, state_path).poll()[0]) == ['three']
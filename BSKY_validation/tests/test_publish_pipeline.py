@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+from atproto import models
+from atproto.exceptions import NetworkError, RateLimitExceededError
+
+import config
+import publish_pipeline
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    config.load()
+    monkeypatch.setattr(config, 'RETRY_ATTEMPTS', 3)
+    monkeypatch.setattr(config, 'RETRY_MAX_DELAY', 0)
+
+
+class FakeClient:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.me = SimpleNamespace(did='did:plc:test')
+        self.com = SimpleNamespace(atproto=SimpleNamespace(repo=SimpleNamespace(apply_writes=self.apply_writes)))
+
+    def apply_writes(self, data):
+        self.calls += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FakeScheduler:
+    waits = 0
+
+    def wait_for_reset(self):
+        self.waits += 1
+
+
+def writes(count):
+    return [
+        (line, models.ComAtprotoRepoApplyWrites.Create(
+            collection=models.ids.AppBskyFeedPost,
+            value=models.AppBskyFeedPost.Record(text=f"post {line}", created_at='2026-01-01T00:00:00Z'),
+        ))
+        for line in range(1, count + 1)
+    ]
+
+
+def result(n):
+    return SimpleNamespace(uri=f"at://did:plc:test/app.bsky.feed.post/{n}", cid=f"cid{n}")
+
+
+def test_rate_limit_waits_are_capped():
+    client = FakeClient(RateLimitExceededError())
+    scheduler = FakeScheduler()
+    results = publish_pipeline._apply_batch(client, scheduler, writes(2))
+    assert scheduler.waits == config.RETRY_ATTEMPTS - 1
+    assert [r['line'] for r in results] == [1, 2]
+    assert all(r['error'].startswith('RateLimitExceededError') for r in results)
+
+
+def test_batch_is_sent_again_after_a_rate_limit_wait():
+    client = FakeClient(RateLimitExceededError(), SimpleNamespace(results=[result(1), result(2)]))
+    results = publish_pipeline._apply_batch(client, FakeScheduler(), writes(2))
+    assert [r['uri'] for r in results] == [result(1).uri, result(2).uri]
+
+
+def test_transient_failure_is_not_resent():
+    client = FakeClient(NetworkError())
+    results = publish_pipeline._apply_batch(client, FakeScheduler(), writes(2))
+    assert client.calls == 1
+    assert all(r['error'].startswith('NetworkError') for r in results)
+
+
+def test_writes_without_a_result_are_reported():
+    client = FakeClient(SimpleNamespace(results=[result(1)]))
+    results = publish_pipeline._apply_batch(client, FakeScheduler(), writes(3))
+    assert results[0] == {'line': 1, 'uri': result(1).uri, 'cid': 'cid1'}
+    assert [r['line'] for r in results[1:]] == [2, 3]
+    assert all(r['error'].startswith('unknown:') for r in results[1:])
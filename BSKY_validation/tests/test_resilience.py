@@ -0,0 +1,37 @@
+import pytest
+from atproto.exceptions import NetworkError
+
+import config
+import resilience
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    config.load()
+    monkeypatch.setattr(config, 'RETRY_ATTEMPTS', 3)
+    monkeypatch.setattr(config, 'HEDGE_AFTER', None)
+
+
+def failing(*errors):
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+    return func, calls
+
+
+def test_transport_error_is_retried_for_idempotent_calls():
+    func, calls = failing(NetworkError())
+    assert resilience.call(func, idempotent=True, sleep=lambda delay: None) == 'ok'
+    assert len(calls) == 2
+
+
+def test_transport_error_is_not_retried_for_other_calls():
+    func, calls = failing(NetworkError())
+    with pytest.raises(NetworkError):
+        resilience.call(func, sleep=lambda delay: None)
+    assert len(calls) == 1
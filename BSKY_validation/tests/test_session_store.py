@@ -0,0 +1,36 @@
+import json
+import threading
+
+import session_store
+
+SERVICE = 'https://bsky.social'
+
+
+def test_concurrent_saves_keep_the_file_intact(tmp_path):
+    path = str(tmp_path / 'sessions.json')
+    errors = []
+
+    def save(worker):
+        try:
+            for i in range(20):
+                session_store.save_session(SERVICE, f"user{worker}.bsky.social", f"session-{i}", path=path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with open(path, encoding='utf-8') as f:
+        json.load(f)
+    assert not [name for name in tmp_path.iterdir() if name.suffix == '.tmp']
+
+
+def test_session_is_tied_to_the_app_password(tmp_path):
+    path = str(tmp_path / 'sessions.json')
+    session_store.save_session(SERVICE, 'alice.bsky.social', 'session', path=path, password='app-pass')
+    entry = session_store.load_session(SERVICE, 'Alice.bsky.social', path)
+    assert entry['password_hash'] == session_store._password_hash('alice.bsky.social', 'app-pass')
+    assert 'app-pass' not in (tmp_path / 'sessions.json').read_text()
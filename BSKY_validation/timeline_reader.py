@@ -0,0 +1,176 @@
+"""
+Script to stream a Bluesky home timeline or author feed to NDJSON.
+
+Pages are followed through their ``cursor``, and the next page is fetched in
+the background while the current one is written. Reposts of a post that was
+already written are skipped. Only two pages and a bounded window of recent
+post URIs are held in memory. The cursor and that window are saved after
+every page, so an interrupted export can be resumed without repeating posts.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import validate_config
+
+PAGE_SIZE = 100
+# How many recent post URIs are remembered to skip duplicate reposts
+DEDUP_WINDOW = 10000
+
+def iter_pages(fetch_page, cursor=None):
+    """Yield (feed_items, next_cursor) pages, prefetching the next page.
+
+    ``fetch_page(cursor)`` must return a response with ``feed`` and
+    ``cursor`` attributes.
+    """
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(fetch_page, cursor)
+        while future is not None:
+            page = future.result()
+            next_cursor = page.cursor if page.feed else None
+            # Start the next request before handing this page to the caller
+            future = pool.submit(fetch_page, next_cursor) if next_cursor else None
+            yield page.feed, next_cursor
+
+def iter_posts(fetch_page, cursor=None, dedup_window=DEDUP_WINDOW, seen=None):
+    """Yield (post_row, page_cursor) for every unique post in a feed.
+
+    ``page_cursor`` is the cursor to resume from once every post of the
+    current page has been consumed; it is None for posts in the middle of a
+    page. ``seen`` is the OrderedDict of recent post URIs (updated in place),
+    so a resumed export can pass in the window saved with its cursor.
+    """
+    seen = OrderedDict() if seen is None else seen
+    for feed, next_cursor in iter_pages(fetch_page, cursor):
+        rows = []
+        for item in feed:
+            uri = item.post.uri
+            if uri in seen:
+                seen.move_to_end(uri)
+                continue
+            seen[uri] = None
+            if len(seen) > dedup_window:
+                seen.popitem(last=False)
+            rows.append(post_row(item))
+        for index, row in enumerate(rows):
+            yield row, (next_cursor or '') if index == len(rows) - 1 else None
+        if not rows:
+            yield None, next_cursor or ''
+
+def post_row(item):
+    """Flatten a feed item into an NDJSON row."""
+    post = item.post
+    row = {
+        'uri': post.uri,
+        'cid': post.cid,
+        'author_did': post.author.did,
+        'author_handle': post.author.handle,
+        'text': getattr(post.record, 'text', None),
+        'created_at': getattr(post.record, 'created_at', None),
+        'indexed_at': post.indexed_at,
+        'reply_count': post.reply_count,
+        'repost_count': post.repost_count,
+        'like_count': post.like_count,
+    }
+    reason = getattr(item, 'reason', None)
+    if reason is not None and getattr(reason, 'by', None) is not None:
+        row['reposted_by'] = reason.by.handle
+    return row
+
+def _read_state(state_path):
+    """Return (cursor, seen) saved by an interrupted export, or (None, empty window)."""
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None, OrderedDict()
+    return state.get('cursor'), OrderedDict.fromkeys(state.get('seen', []))
+
+def _write_state(state_path, cursor, seen):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'cursor': cursor, 'seen': list(seen)}, f)
+    os.replace(tmp_path, state_path)
+
+def export_feed(client, output_path, author=None, resume=True, max_posts=None, page_size=PAGE_SIZE):
+    """Write a feed to ``output_path`` ('-' for stdout) and return the post count.
+
+    With ``author`` the author's feed is read, otherwise the home timeline.
+    When writing to a file the cursor and the window of recent post URIs
+    are kept in ``<output>.cursor``.
+    """
+    if author:
+        def fetch_page(cursor):
+            return client.get_author_feed(actor=author, cursor=cursor, limit=page_size)
+    else:
+        def fetch_page(cursor):
+            return client.get_timeline(cursor=cursor, limit=page_size)
+
+    state_path = None if output_path == '-' else f"{output_path}.cursor"
+    cursor, seen = _read_state(state_path) if state_path and resume else (None, OrderedDict())
+    if cursor and os.path.exists(output_path):
+        output = open(output_path, 'a', encoding='utf-8')
+        print(f"Resuming after cursor {cursor}", file=sys.stderr)
+    elif output_path == '-':
+        output, cursor, seen = sys.stdout, None, OrderedDict()
+    else:
+        output, cursor, seen = open(output_path, 'w', encoding='utf-8'), None, OrderedDict()
+
+    count = 0
+    finished = True
+    try:
+        for row, page_cursor in iter_posts(fetch_page, cursor, seen=seen):
+            if row is not None:
+                output.write(json.dumps(row) + '\n')
+                count += 1
+            if page_cursor is not None:
+                output.flush()
+                if state_path and page_cursor:
+                    _write_state(state_path, page_cursor, seen)
+                if max_posts and count >= max_posts:
+                    # Stop on a page boundary so the saved cursor stays exact
+                    finished = not page_cursor
+                    break
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if finished and state_path and os.path.exists(state_path):
+        os.remove(state_path)
+    return count
+
+def main(argv=None):
+    """Parse command-line arguments and run the export."""
+    parser = argparse.ArgumentParser(description="Stream a Bluesky timeline or author feed to NDJSON.")
+    parser.add_argument('--author', metavar='HANDLE',
+                        help="read this account's feed instead of your home timeline")
+    parser.add_argument('--output', '-o', default='-', help="output file ('-' for stdout, the default)")
+    parser.add_argument('--max-posts', type=int,
+                        help="stop after about this many posts (at a page boundary, resumable)")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help=f"posts per request (max {PAGE_SIZE})")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore a saved cursor and start from the newest post")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_config()
+    except ValueError as e:
+        print(f"Configuration error: {e}", file=sys.stderr)
+        return False
+
+    import clients
+    try:
+        client = clients.client()
+        count = export_feed(client, args.output, args.author, not args.restart, args.max_posts,
+                            max(1, min(args.page_size, PAGE_SIZE)))
+    except Exception as e:
+        print(f"[ERROR] Failed to read feed: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    print(f"Wrote {count} posts", file=sys.stderr)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
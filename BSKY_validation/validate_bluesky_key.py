@@ -1,48 +1,100 @@
 """
 Script to validate Bluesky API credentials (handle and app password).
 """
+import argparse
+import contextlib
+import json
 import sys
-from config import BLUESKY_HANDLE, BLUESKY_PASSWORD, BLUESKY_SERVICE, validate_config
-from atproto import Client
+import time
+import config
+import instrumentation
+import resilience
+from config import validate_config
 
-def validate_bluesky_key():
-    """Validate the Bluesky credentials by testing authentication."""
-    print("=" * 60)
-    print("Bluesky API Credentials Validation")
-    print("=" * 60)
-    
-    # Step 1: Check if configuration is loaded
-    print("\n[1/3] Checking configuration...")
-    try:
-        validate_config()
-        print(f"   [OK] Configuration loaded")
-        print(f"   [OK] Bluesky Handle: {BLUESKY_HANDLE}")
-        print(f"   [OK] Bluesky Service: {BLUESKY_SERVICE}")
-        print(f"   [OK] App Password: {'*' * 10}...{BLUESKY_PASSWORD[-4:] if len(BLUESKY_PASSWORD) > 14 else '****'}")
-        
-        if not BLUESKY_HANDLE.endswith('.bsky.social'):
-            print(f"   [WARNING] Handle doesn't end with '.bsky.social' - ensure it's correct")
-    except ValueError as e:
-        print(f"   [ERROR] Configuration error: {e}")
-        print("\n   Please ensure:")
-        print("   1. A .env file exists in the project root")
-        print("   2. BLUESKY_PASSWORD is set in the .env file")
-        print("   3. BLUESKY_HANDLE is set (default: sallocat.bsky.social)")
-        return False
+# atproto and the result cache are imported where they are first needed,
+# so --help and --config-only don't pay for them.
+
+CACHE_SERVICE = 'bluesky'
+
+def make_cache():
+    """Create the validation result cache from configuration."""
+    from validation_cache import ValidationCache
+    return ValidationCache(config.VALIDATION_CACHE_PATH, config.VALIDATION_CACHE_TTL, config.VALIDATION_CACHE_MAX_ENTRIES)
+
+def make_history():
+    """Create the validation history from configuration, or return None when it is turned off."""
+    if not config.VALIDATION_HISTORY_PATH:
+        return None
+    from validation_history import ValidationHistory
+    return ValidationHistory(config.VALIDATION_HISTORY_PATH)
+
+def _cache_secret():
+    """Return the credential string the cache key is derived from."""
+    return f"{config.BLUESKY_HANDLE}\0{config.BLUESKY_PASSWORD}"
+
+def _record_rate_limit(result):
+    """Return an httpx response hook that keeps the latest ``ratelimit-*`` budget in ``result``."""
+    def on_response(response):
+        if 'ratelimit-remaining' in response.headers:
+            result['rate_limit'] = {
+                'remaining': int(response.headers['ratelimit-remaining']),
+                'limit': int(response.headers.get('ratelimit-limit', 0)),
+            }
+    return on_response
+
+def _validate(result, cache=None, refresh=False, use_session=True):
+    """Run steps [2/3] and [3/3] (or answer them from ``cache``), filling in ``result``."""
+    if cache is not None and not refresh:
+        cached = cache.get(CACHE_SERVICE, config.BLUESKY_SERVICE, _cache_secret())
+        if cached is not None:
+            result.update(valid=True, cached=True)
+            print("\n[2/3] Testing Bluesky connection...")
+            print(f"   [OK] Using cached result from {cached['cache_age']}s ago (use --refresh to force a live check)")
+            print(f"   [OK] Authenticated as: {cached['handle']}")
+            print(f"   [OK] DID: {cached['did']}")
+            print(f"   [OK] Display Name: {cached['display_name']}")
+            print("\n[3/3] Testing API permissions...")
+            print(f"   [OK] Profile and timeline access verified by cached result")
+            print("\n" + "=" * 60)
+            print("[SUCCESS] Validation successful! Your Bluesky credentials are working.")
+            print("=" * 60)
+            return True
     
     # Step 2: Test Bluesky connection
     print("\n[2/3] Testing Bluesky connection...")
+    instrumentation.step('[2/3] Testing Bluesky connection')
+    from atproto import Client, Session
+    import session_store
     try:
-        client = Client(base_url=BLUESKY_SERVICE)
-        # Login with handle and app password
-        client.login(login=BLUESKY_HANDLE, password=BLUESKY_PASSWORD)
-        print(f"   [OK] Successfully connected to Bluesky")
+        # A fresh client (on the shared connection pool), not a cached logged-in one
+        client = Client(base_url=config.BLUESKY_SERVICE,
+                        request=instrumentation.make_request({'response': [_record_rate_limit(result)]}))
+        # Resume a stored session of this app password, confirmed by the server with
+        # getSession, or log in with handle and app password
+        how = resilience.call(
+            lambda: session_store.login(client, config.BLUESKY_SERVICE, config.BLUESKY_HANDLE,
+                                        config.BLUESKY_PASSWORD, use_stored=use_session, verify=True),
+            config.BLUESKY_SERVICE,
+        )
+        result['valid'] = True
+        # App passwords carry no expiry; the scope tells a privileged one apart
+        scope = Session.decode(client.export_session_string()).access_jwt_payload.scope
+        if scope:
+            result['scopes'] = [scope]
+        if how == 'login':
+            print(f"   [OK] Successfully connected to Bluesky")
+        else:
+            print(f"   [OK] Reused stored session ({how}, use --no-session to log in again)")
         print(f"   [OK] Authenticated as: {client.me.handle}")
         print(f"   [OK] DID: {client.me.did}")
         print(f"   [OK] Display Name: {getattr(client.me, 'display_name', 'N/A')}")
     except Exception as e:
-        error_msg = str(e)
-        if 'Invalid identifier or password' in error_msg or '401' in error_msg:
+        kind, retry_after = resilience.classify(e)
+        result['error'] = f"{type(e).__name__}: {e}"
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+        if status is not None:
+            result['status'] = status
+        if kind == resilience.AUTH:
             print(f"   [ERROR] Authentication failed: Invalid handle or app password")
             print("\n   Please check:")
             print("   1. Your Bluesky handle is correct (e.g., sallocat.bsky.social)")
@@ -53,37 +105,143 @@ def validate_bluesky_key():
             print("   2. Create a new app password")
             print("   3. Copy it immediately (you'll only see it once!)")
             return False
-        elif 'Connection' in error_msg or 'Network' in error_msg:
+        elif kind in (resilience.UNREACHABLE, resilience.TRANSIENT):
             print(f"   [ERROR] Connection failed: Could not reach Bluesky")
             print("\n   Please check:")
             print("   1. Your internet connection")
             print("   2. The Bluesky service is accessible")
             return False
+        elif kind == resilience.RATE_LIMITED:
+            wait = f", retry in {retry_after:.0f}s" if retry_after is not None else ""
+            print(f"   [ERROR] Rate limit exceeded{wait}")
+            return False
         else:
             print(f"   [ERROR] Unexpected error: {type(e).__name__}: {e}")
             return False
     
     # Step 3: Test API permissions
     print("\n[3/3] Testing API permissions...")
+    instrumentation.step('[3/3] Testing API permissions')
     try:
         # Try to get profile information
-        profile = client.get_profile(actor=BLUESKY_HANDLE)
+        profile = resilience.call(lambda: client.get_profile(actor=config.BLUESKY_HANDLE), config.BLUESKY_SERVICE,
+                                  idempotent=True)
         print(f"   [OK] Can read profile information")
         
         # Try to get timeline (requires read permissions)
-        timeline = client.get_timeline(limit=1)
+        timeline = resilience.call(lambda: client.get_timeline(limit=1), config.BLUESKY_SERVICE, idempotent=True)
         print(f"   [OK] Can read timeline (read permissions working)")
         
+        if cache is not None:
+            cache.put(CACHE_SERVICE, config.BLUESKY_SERVICE, _cache_secret(), {
+                'handle': client.me.handle,
+                'did': client.me.did,
+                'display_name': getattr(client.me, 'display_name', 'N/A'),
+            })
+        
         print("\n" + "=" * 60)
         print("[SUCCESS] Validation successful! Your Bluesky credentials are working.")
         print("=" * 60)
         return True
     except Exception as e:
+        kind, _ = resilience.classify(e)
+        if kind == resilience.AUTH:
+            # The session was accepted a moment ago, so the credentials were revoked meanwhile
+            result.update(valid=False, error=f"{type(e).__name__}: {e}")
+            print(f"   [ERROR] Authentication failed: {type(e).__name__}: {e}")
+            print("\n   The app password or session was revoked. Run with --no-session to log in again.")
+            return False
         print(f"   [WARNING] Permission warning: {type(e).__name__}: {e}")
-        print("\n   Your credentials work but may have limited permissions.")
+        if how != 'login':
+            print("\n   The stored session may have been revoked. Run with --no-session to log in again.")
+        else:
+            print("\n   Your credentials work but may have limited permissions.")
         return True  # Still valid, just limited permissions
 
+def validate_bluesky_key(use_cache=True, refresh=False, use_session=True, config_only=False,
+                         record_history=True):
+    """Validate the Bluesky credentials by testing authentication.
+
+    Successful results are cached on disk unless ``use_cache`` is False;
+    ``refresh`` ignores the cached entry and forces a live check. A stored
+    login session of the configured app password is resumed, after the
+    server has confirmed it is still valid, unless ``use_session`` is False.
+    ``config_only`` stops after step [1/3]. Unless ``record_history`` is
+    False, the outcome is added to the validation history (see
+    validation_history.py).
+    """
+    print("=" * 60)
+    print("Bluesky API Credentials Validation")
+    print("=" * 60)
+    
+    # Step 1: Check if configuration is loaded
+    print("\n[1/3] Checking configuration...")
+    instrumentation.step('[1/3] Checking configuration')
+    try:
+        validate_config()
+        print(f"   [OK] Configuration loaded")
+        print(f"   [OK] Bluesky Handle: {config.BLUESKY_HANDLE}")
+        print(f"   [OK] Bluesky Service: {config.BLUESKY_SERVICE}")
+        print(f"   [OK] App Password: {'*' * 10}...{config.BLUESKY_PASSWORD[-4:] if len(config.BLUESKY_PASSWORD) > 14 else '****'}")
+        
+        if not config.BLUESKY_HANDLE.endswith('.bsky.social'):
+            print(f"   [WARNING] Handle doesn't end with '.bsky.social' - ensure it's correct")
+    except ValueError as e:
+        print(f"   [ERROR] Configuration error: {e}")
+        print("\n   Please ensure:")
+        print("   1. A .env file exists in the project root")
+        print("   2. BLUESKY_PASSWORD is set in the .env file")
+        print("   3. BLUESKY_HANDLE is set (default: sallocat.bsky.social)")
+        return False
+    
+    if config_only:
+        print("\n" + "=" * 60)
+        print("[SUCCESS] Configuration check passed (network steps skipped).")
+        print("=" * 60)
+        return True
+    
+    history = make_history() if record_history else None
+    result = {'valid': False}
+    start = time.perf_counter()
+    try:
+        return _validate(result, make_cache() if use_cache else None, refresh, use_session)
+    finally:
+        if history is not None:
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            history.record(CACHE_SERVICE, config.BLUESKY_SERVICE, _cache_secret(), result,
+                           label=config.BLUESKY_HANDLE)
+            history.close()
+
+def main(argv=None):
+    """Parse command-line arguments and run the validation."""
+    parser = argparse.ArgumentParser(description="Validate Bluesky API credentials.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't read or write the validation result cache")
+    parser.add_argument('--no-history', action='store_true',
+                        help="don't add the result to the validation history")
+    parser.add_argument('--refresh', action='store_true',
+                        help="ignore cached results and force a live check")
+    parser.add_argument('--no-session', action='store_true',
+                        help="log in with the app password instead of reusing a stored session")
+    parser.add_argument('--config-only', action='store_true',
+                        help="only check the configuration (step [1/3]) without any network calls")
+    parser.add_argument('--json', action='store_true',
+                        help="print a JSON report with per-step and per-request timings (text output goes to stderr)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="append per-step and per-request timing events to FILE as NDJSON")
+    args = parser.parse_args(argv)
+    if args.json or args.trace:
+        instrumentation.enable(args.trace)
+    with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+        success = validate_bluesky_key(use_cache=not args.no_cache, refresh=args.refresh,
+                                       use_session=not args.no_session, config_only=args.config_only,
+                                       record_history=not args.no_history)
+    if args.json:
+        print(json.dumps(instrumentation.recorder.report(tool='validate_bluesky_key', success=success), indent=2))
+    instrumentation.recorder.close()
+    return success
+
 if __name__ == "__main__":
-    success = validate_bluesky_key()
+    success = main()
     sys.exit(0 if success else 1)
 
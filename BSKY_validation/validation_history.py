@@ -0,0 +1,12 @@
+"""
+Append-only history of credential validation results, shared with the other project.
+
+See shared/validation_history.py. Run this module to query the history.
+"""
+import sys
+import shared_modules  # puts shared/ on the import path
+from shared.validation_history import DEFAULT_HISTORY_PATH, ValidationHistory, main
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,102 @@
+"""
+Shared, thread-safe clients for the GitHub API.
+
+Every requests session and PyGithub client built here sits on one
+process-wide keep-alive connection pool (per response cache and retry
+policy), so code that runs many operations in the same process, such as a
+job runner importing these modules, reuses open TCP/TLS connections instead
+of resolving and handshaking again for each client. PyGithub clients always
+get an explicit base URL, which removes the need to special-case
+``https://api.github.com``.
+"""
+import threading
+import config
+
+_lock = threading.Lock()
+# (http cache path, PyGithub retry) -> HTTPAdapter holding the connection pool
+_adapters = {}
+# http cache path -> requests.Session
+_sessions = {}
+
+def _cache_key(http_cache):
+    return http_cache.path if http_cache is not None else None
+
+def _adapter(pool_size, http_cache=None, github_retry=False):
+    """Return the shared adapter for a cache and retry policy, growing its pool to ``pool_size``.
+
+    Must be called with ``_lock`` held.
+    """
+    from requests.adapters import HTTPAdapter
+    key = (_cache_key(http_cache), github_retry)
+    adapter = _adapters.get(key)
+    if adapter is None or adapter._pool_maxsize < pool_size:
+        kwargs = {'pool_connections': pool_size, 'pool_maxsize': pool_size}
+        if github_retry:
+            # PyGithub's default: wait out secondary rate limits and retry 5xx
+            from github.GithubRetry import GithubRetry
+            kwargs['max_retries'] = GithubRetry()
+        if http_cache is not None:
+            from http_cache import CachingAdapter
+            adapter = CachingAdapter(http_cache, **kwargs)
+        else:
+            adapter = HTTPAdapter(**kwargs)
+        # Clients created earlier keep the smaller pool; new ones get this one
+        _adapters[key] = adapter
+    return adapter
+
+def session(pool_size=None, http_cache=None):
+    """Return the process-wide requests session, with a pool of at least ``pool_size`` connections.
+
+    The session is shared: don't close it. With ``http_cache`` repeated GETs
+    are sent as conditional requests and 304 responses are answered from
+    the cache.
+    """
+    import requests
+    pool_size = max(pool_size or 0, config.HTTP_POOL_SIZE)
+    with _lock:
+        key = _cache_key(http_cache)
+        shared = _sessions.get(key)
+        if shared is None:
+            shared = _sessions[key] = requests.Session()
+        adapter = _adapter(pool_size, http_cache)
+        if shared.get_adapter('https://') is not adapter:
+            shared.mount('https://', adapter)
+            shared.mount('http://', adapter)
+        return shared
+
+def _mount(client, adapter):
+    """Send a PyGithub client's requests through ``adapter``.
+
+    PyGithub has no public hook for its requests session, so this goes
+    through the connection factory of its Requester, which is the same
+    across the 2.x releases pinned in requirements.txt. A PyGithub without
+    it raises RuntimeError instead of silently bypassing the shared pool
+    and the HTTP cache.
+    """
+    create_connection = getattr(client.requester, '_Requester__createConnection', None)
+    session = getattr(create_connection(), 'session', None) if create_connection else None
+    if session is None:
+        from importlib.metadata import version
+        raise RuntimeError(f"PyGithub {version('PyGithub')} has no connection hook for the shared pool; "
+                           f"install a version allowed by requirements.txt (PyGithub>=2.1,<3)")
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+def github(token=None, base_url=None, rate_limit_retry=True, http_cache=None):
+    """Return a PyGithub client on the shared connection pool for a token and API URL.
+
+    Defaults to GITHUB_API_KEY and GITHUB_URL. PyGithub spaces out the
+    requests of each client, so clients aren't shared between operations:
+    one operation would wait for another's last request. With
+    ``rate_limit_retry=False`` PyGithub doesn't sleep and retry on its own,
+    so callers such as the token pool can reroute instead.
+    """
+    from github import Auth, Github
+    token = token or config.GITHUB_API_KEY
+    base_url = base_url or config.GITHUB_URL
+    kwargs = {} if rate_limit_retry else {'retry': None}
+    client = Github(base_url=base_url, auth=Auth.Token(token), pool_size=config.HTTP_POOL_SIZE, **kwargs)
+    with _lock:
+        adapter = _adapter(config.HTTP_POOL_SIZE, http_cache, rate_limit_retry)
+    _mount(client, adapter)
+    return client
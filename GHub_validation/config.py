@@ -1,22 +1,79 @@
 """
 Configuration module for loading environment variables.
+
+The .env file is parsed on first access to a setting, so importing this
+module (e.g. for --help) stays cheap.
 """
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+_loaded = False
+
+def load():
+    """Load environment variables and populate the settings (only once)."""
+    global _loaded, GITHUB_API_KEY, GITHUB_URL, GITHUB_API_KEYS
+    global VALIDATION_CACHE_PATH, VALIDATION_CACHE_TTL, VALIDATION_CACHE_MAX_ENTRIES, VALIDATION_HISTORY_PATH
+    global RETRY_ATTEMPTS, RETRY_MAX_DELAY, HEDGE_AFTER, CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN
+    global HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES, HTTP_POOL_SIZE
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # GitHub configuration
+    GITHUB_API_KEY = os.getenv('GITHUB_API_KEY')
+    GITHUB_URL = os.getenv('GITHUB_URL', 'https://api.github.com')
+    # Optional pool of tokens (comma-separated) to spread API calls across
+    GITHUB_API_KEYS = [key.strip() for key in os.getenv('GITHUB_API_KEYS', '').split(',') if key.strip()]
+
+    # Validation result cache
+    VALIDATION_CACHE_PATH = os.getenv(
+        'VALIDATION_CACHE_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'cache.sqlite3'),
+    )
+    VALIDATION_CACHE_TTL = int(os.getenv('VALIDATION_CACHE_TTL', '300'))  # seconds
+    VALIDATION_CACHE_MAX_ENTRIES = int(os.getenv('VALIDATION_CACHE_MAX_ENTRIES', '1000'))
 
-# GitHub configuration
-GITHUB_API_KEY = os.getenv('GITHUB_API_KEY')
-GITHUB_URL = os.getenv('GITHUB_URL', 'https://api.github.com')
+    # Append-only history of validation results (empty: don't record)
+    VALIDATION_HISTORY_PATH = os.getenv(
+        'VALIDATION_HISTORY_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'history.sqlite3'),
+    )
+
+    # Conditional-request (ETag) cache of GitHub API responses
+    HTTP_CACHE_PATH = os.getenv(
+        'HTTP_CACHE_PATH',
+        os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'http-cache.sqlite3'),
+    )
+    HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+    # Keep-alive connections per host in the process-wide pool (see clients.py)
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+
+    # Retries, request hedging and per-host circuit breaking (see resilience.py)
+    RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', '3'))
+    RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '30'))  # seconds
+    # Send a second copy of a slow idempotent request after this many seconds (unset: off)
+    HEDGE_AFTER = float(os.getenv('HEDGE_AFTER')) if os.getenv('HEDGE_AFTER') else None
+    CIRCUIT_BREAKER_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5'))
+    CIRCUIT_BREAKER_COOLDOWN = float(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '30'))  # seconds
+    _loaded = True
+
+def __getattr__(name):
+    """Load the configuration when a setting is first accessed."""
+    if name.isupper() and not _loaded:
+        load()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def validate_config():
     """Validate that required configuration is present."""
+    load()
     if not GITHUB_API_KEY:
         raise ValueError(
             "GITHUB_API_KEY not found in environment variables. "
             "Please create a .env file with your GitHub API key."
         )
     return True
-
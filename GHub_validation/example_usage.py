@@ -1,40 +1,44 @@
 """
 Example usage of GitHub API with the configured API key.
 """
-from github import Github
-from config import GITHUB_API_KEY, GITHUB_URL, validate_config
+from config import validate_config
+from rate_limit_scheduler import TokenPool
+
+def fetch_user(g):
+    """Return the login, name and email of the authenticated user."""
+    user = g.get_user()
+    return user.login, user.name, user.email
+
+def fetch_repos(g, count=5):
+    """Return (name, private, html_url) for the first ``count`` repositories."""
+    return [(repo.name, repo.private, repo.html_url) for repo in g.get_user().get_repos()[:count]]
 
 def main():
     # Validate configuration
     validate_config()
     
-    # Initialize GitHub client (use base_url for GitHub Enterprise)
-    from github import Auth
-    auth = Auth.Token(GITHUB_API_KEY)
-    if GITHUB_URL != 'https://api.github.com':
-        g = Github(base_url=GITHUB_URL, auth=auth)
-    else:
-        g = Github(auth=auth)
+    # Spread calls over the configured tokens (GITHUB_API_KEYS or GITHUB_API_KEY),
+    # waiting for rate-limit resets instead of failing
+    pool = TokenPool.from_config()
     
     # Test connection by getting current user
     try:
-        user = g.get_user()
-        print(f"Successfully connected to GitHub as: {user.login}")
-        print(f"Name: {user.name or 'N/A'}")
-        print(f"Email: {user.email or 'N/A (private)'}")
+        login, name, email = pool.call(fetch_user)
+        print(f"Successfully connected to GitHub as: {login}")
+        print(f"Name: {name or 'N/A'}")
+        print(f"Email: {email or 'N/A (private)'}")
     except Exception as e:
         print(f"Error connecting to GitHub: {e}")
     
     # Example: List your repositories
     try:
-        repos = user.get_repos()
+        repos = pool.call(fetch_repos)
         print(f"\nFound repositories:")
-        for repo in list(repos[:5]):  # Show first 5
-            print(f"  - {repo.name} ({repo.private and 'private' or 'public'})")
-            print(f"    URL: {repo.html_url}")
+        for name, private, html_url in repos:  # Show first 5
+            print(f"  - {name} ({private and 'private' or 'public'})")
+            print(f"    URL: {html_url}")
     except Exception as e:
         print(f"Error listing repositories: {e}")
 
 if __name__ == "__main__":
     main()
-
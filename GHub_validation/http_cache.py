@@ -0,0 +1,295 @@
+"""
+On-disk conditional-request cache for GitHub REST calls.
+
+GET responses that carry an ``ETag`` or ``Last-Modified`` header are stored
+per URL, token and ``Accept`` header. The next request for the same resource
+is sent with ``If-None-Match``/``If-Modified-Since``; a ``304 Not Modified``
+(which GitHub doesn't count against the primary rate limit) is answered from
+the cache as if it were the original ``200``. The store is a SQLite file in
+WAL mode, bounded by total body size with least-recently-used eviction, and
+keeps cumulative hit/miss counters. Counters and recency updates are
+buffered in memory and written together with the next stored response.
+If the file can't be used the cache warns once and requests are sent
+without it.
+
+Pass a cache to ``clients.session`` or ``clients.github`` to route a
+requests session or PyGithub client through it. Run this module to print
+or reset the cache statistics.
+"""
+import argparse
+import atexit
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+import sys
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'http-cache.sqlite3')
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+STAT_NAMES = ('hits', 'misses', 'stores', 'evictions')
+# Buffered counter and recency updates written in one go once this many pile up
+FLUSH_EVERY = 100
+
+class HTTPCache:
+    """Size-bounded store of validators and bodies for conditional GETs."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.disabled = False
+        self._salt = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._counts = dict.fromkeys(STAT_NAMES, 0)
+        self._used = {}
+        self._pending = 0
+        atexit.register(self.flush)
+
+    def _connect(self):
+        """Return this thread's connection, creating the file and tables on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock:
+            if not self._schema_ready:
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS responses ("
+                        " key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, headers TEXT NOT NULL,"
+                        " body BLOB NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used_at)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL)")
+                self._schema_ready = True
+        self._local.conn = conn
+        return conn
+
+    def _disable(self, error):
+        """Stop using the cache after an error, warning once."""
+        with self._lock:
+            self._counts = dict.fromkeys(STAT_NAMES, 0)
+            self._used = {}
+            self._pending = 0
+        if not self.disabled:
+            self.disabled = True
+            print(f"[WARNING] HTTP cache disabled ({self.path}): {type(error).__name__}: {error}", file=sys.stderr)
+
+    def _get_salt(self, conn):
+        if self._salt is None:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('salt', ?)", (os.urandom(32),))
+            self._salt = conn.execute("SELECT value FROM meta WHERE name = 'salt'").fetchone()[0]
+        return self._salt
+
+    def _key(self, conn, url, authorization, accept):
+        # Keyed with an HMAC so tokens are never written to disk
+        message = '\0'.join((url, authorization or '', accept or '')).encode('utf-8')
+        return hmac.new(self._get_salt(conn), message, hashlib.sha256).hexdigest()
+
+    def _count(self, name, amount=1, used_key=None):
+        """Buffer a counter update (and an entry's use); return True once a flush is due."""
+        with self._lock:
+            self._counts[name] += amount
+            if used_key is not None:
+                self._used[used_key] = time.time()
+            self._pending += 1
+            return self._pending >= FLUSH_EVERY
+
+    def _write_buffered(self, conn):
+        """Write the buffered counters and use times inside the caller's transaction."""
+        with self._lock:
+            counts, self._counts = self._counts, dict.fromkeys(STAT_NAMES, 0)
+            used, self._used = self._used, {}
+            self._pending = 0
+        for name, amount in counts.items():
+            if amount:
+                conn.execute(
+                    "INSERT INTO meta (name, value) VALUES (?, ?)"
+                    " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (f"stat:{name}", amount),
+                )
+        conn.executemany("UPDATE responses SET used_at = ? WHERE key = ?",
+                         [(used_at, key) for key, used_at in used.items()])
+
+    def flush(self):
+        """Write the buffered counters and use times to the cache file."""
+        with self._lock:
+            if not self._pending or self.disabled:
+                return
+        try:
+            conn = self._connect()
+            with conn:
+                self._write_buffered(conn)
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def lookup(self, url, authorization, accept):
+        """Return (key, entry) where entry is a dict with the stored validators, or None.
+
+        The key is None too when the cache is disabled.
+        """
+        if self.disabled:
+            return None, None
+        try:
+            conn = self._connect()
+            key = self._key(conn, url, authorization, accept)
+            row = conn.execute(
+                "SELECT etag, last_modified, headers, body FROM responses WHERE key = ?", (key,),
+            ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None, None
+        if row is None:
+            return key, None
+        return key, {'etag': row[0], 'last_modified': row[1], 'headers': json.loads(row[2]), 'body': row[3]}
+
+    def record_hit(self, key):
+        """Count a 304 served from the cache and mark the entry as recently used."""
+        if not self.disabled and self._count('hits', used_key=key):
+            self.flush()
+
+    def store(self, key, etag, last_modified, headers, body):
+        """Store a 200 response (counted as a miss) and evict least recently used entries over the size bound."""
+        if self.disabled:
+            return
+        self._count('misses')
+        if len(body) > self.max_bytes:
+            return
+        try:
+            self._store(key, etag, last_modified, headers, body)
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def _store(self, key, etag, last_modified, headers, body):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, headers, body, size, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(headers), body, len(body), time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = 0
+            while total > self.max_bytes:
+                oldest = conn.execute(
+                    "SELECT key, size FROM responses ORDER BY used_at LIMIT 1"
+                ).fetchone()
+                conn.execute("DELETE FROM responses WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                evicted += 1
+            self._count('stores')
+            if evicted:
+                self._count('evictions', evicted)
+            self._write_buffered(conn)
+
+    def record_miss(self):
+        """Count a response that couldn't be cached."""
+        if not self.disabled and self._count('misses'):
+            self.flush()
+
+    def stats(self):
+        """Return cumulative counters plus the current entry count and size."""
+        self.flush()
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM meta WHERE name LIKE 'stat:%'").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        stats = {name: counters.get(f"stat:{name}", 0) for name in STAT_NAMES}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['entries'] = entries
+        stats['bytes'] = size
+        return stats
+
+    def clear(self):
+        """Remove all cached responses and reset the counters."""
+        with self._lock:
+            self._counts = dict.fromkeys(STAT_NAMES, 0)
+            self._used = {}
+            self._pending = 0
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM meta WHERE name LIKE 'stat:%'")
+
+# Response headers worth replaying from the cache (rate-limit headers come from the live 304)
+_STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link', 'X-OAuth-Scopes',
+                   'X-Accepted-OAuth-Scopes', 'github-authentication-token-expiration')
+
+class CachingAdapter(HTTPAdapter):
+    """requests adapter that turns repeated GETs into conditional requests."""
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        conditional = 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+        if request.method != 'GET' or conditional or kwargs.get('stream'):
+            # Callers doing their own conditional requests get the raw 304
+            return super().send(request, **kwargs)
+        key, entry = self.cache.lookup(request.url, request.headers.get('Authorization'),
+                                       request.headers.get('Accept'))
+        if key is None:
+            # The cache is unusable; send the request as is
+            return super().send(request, **kwargs)
+        if entry is not None:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.record_hit(key)
+            # Replay the stored response, keeping the fresh headers of the 304
+            live_headers = dict(response.headers)
+            response.status_code = 200
+            response.reason = 'OK'
+            response.headers.clear()
+            response.headers.update(entry['headers'])
+            response.headers.update(live_headers)
+            response.headers['Content-Length'] = str(len(entry['body']))
+            response.headers['X-From-Cache'] = '1'
+            response._content = entry['body']
+            response._content_consumed = True
+            return response
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 200 and (etag or last_modified):
+            headers = {name: response.headers[name] for name in _STORED_HEADERS if name in response.headers}
+            self.cache.store(key, etag, last_modified, headers, response.content)
+        else:
+            self.cache.record_miss()
+        return response
+
+def main(argv=None):
+    """Print the cache statistics as JSON, or clear the cache."""
+    parser = argparse.ArgumentParser(description="Show or clear the GitHub HTTP response cache.")
+    parser.add_argument('--clear', action='store_true', help="remove all cached responses and reset the counters")
+    args = parser.parse_args(argv)
+    import config
+    cache = HTTPCache(config.HTTP_CACHE_PATH, config.HTTP_CACHE_MAX_BYTES)
+    try:
+        if args.clear:
+            cache.clear()
+            print(f"[OK] Cleared {cache.path}")
+        else:
+            print(json.dumps(cache.stats(), indent=2))
+    except (sqlite3.Error, OSError) as e:
+        print(f"[ERROR] Can't use the HTTP cache ({cache.path}): {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
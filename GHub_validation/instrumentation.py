@@ -0,0 +1,185 @@
+"""
+Per-request and per-step timing for the validation scripts.
+
+When enabled, every HTTP call made through ``requests`` (both our own
+sessions and PyGithub's) is recorded with endpoint, status, bytes,
+connect/TLS/response-header/total time and rate-limit headers, and each
+validation step is timed. The results are available as a JSON report and
+can be streamed to an NDJSON trace file as they happen.
+
+``requests`` and ``urllib3`` are only wrapped between enable() and
+disable(); disable() puts the original methods back.
+"""
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+class Recorder:
+    """Collects step timings and HTTP call records for one run."""
+
+    def __init__(self):
+        self.enabled = False
+        self.steps = []
+        self.requests = []
+        self._step_start = None
+        self._run_start = time.perf_counter()
+        self._trace = None
+        self._lock = threading.Lock()
+
+    def _emit(self, event):
+        if self._trace is not None:
+            self._trace.write(json.dumps(event) + '\n')
+            self._trace.flush()
+
+    def step(self, name):
+        """Start timing a step, ending the previous one."""
+        if not self.enabled:
+            return
+        self.end_step()
+        self.steps.append({'name': name, 'ms': None})
+        self._step_start = time.perf_counter()
+
+    def end_step(self):
+        """End the current step, if any."""
+        if self._step_start is None:
+            return
+        with self._lock:
+            self.steps[-1]['ms'] = _ms(time.perf_counter() - self._step_start)
+            self._emit({'event': 'step', **self.steps[-1]})
+        self._step_start = None
+
+    def record_request(self, entry):
+        """Record one HTTP call."""
+        with self._lock:
+            entry['step'] = self.steps[-1]['name'] if self.steps else None
+            self.requests.append(entry)
+            self._emit({'event': 'request', **entry})
+
+    def report(self, **extra):
+        """Return the run's report as a dict."""
+        self.end_step()
+        return {
+            **extra,
+            'total_ms': _ms(time.perf_counter() - self._run_start),
+            'steps': self.steps,
+            'requests': self.requests,
+        }
+
+    def close(self):
+        """Close the trace file."""
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+recorder = Recorder()
+_local = threading.local()
+# (owner, attribute, original) of every method wrapped by _install()
+_originals = []
+
+def step(name):
+    """Start timing a step on the module recorder (no-op when disabled)."""
+    recorder.step(name)
+
+def enable(trace_path=None):
+    """Start recording, optionally streaming events to an NDJSON trace file."""
+    recorder.enabled = True
+    if trace_path:
+        recorder._trace = open(trace_path, 'a', encoding='utf-8')
+    _install()
+
+def disable():
+    """Stop recording, close the trace file and restore the unwrapped methods.
+
+    The recorded steps and requests are kept for the report.
+    """
+    recorder.end_step()
+    recorder.enabled = False
+    recorder.close()
+    _uninstall()
+
+def _rate_limit_headers(headers):
+    return {
+        key.lower(): value for key, value in headers.items()
+        if key.lower().startswith(('x-ratelimit-', 'ratelimit-', 'retry-after'))
+    }
+
+def _install():
+    """Wrap requests and urllib3 so every HTTP call is timed."""
+    if _originals:
+        return
+    import requests
+    import urllib3.connection
+
+    original_new_conn = urllib3.connection.HTTPConnection._new_conn
+    original_https_connect = urllib3.connection.HTTPSConnection.connect
+    original_send = requests.Session.send
+
+    def _new_conn(conn):
+        # DNS resolution and the TCP handshake
+        start = time.perf_counter()
+        try:
+            return original_new_conn(conn)
+        finally:
+            _local.connect = getattr(_local, 'connect', 0.0) + time.perf_counter() - start
+
+    def https_connect(conn):
+        # TCP connect (timed by _new_conn above) followed by the TLS handshake
+        connect_before = getattr(_local, 'connect', 0.0)
+        start = time.perf_counter()
+        try:
+            return original_https_connect(conn)
+        finally:
+            elapsed = time.perf_counter() - start
+            tcp = getattr(_local, 'connect', 0.0) - connect_before
+            _local.tls = getattr(_local, 'tls', 0.0) + elapsed - tcp
+
+    def send(session, request, **kwargs):
+        _local.connect = _local.tls = 0.0
+        start = time.perf_counter()
+        entry = {'method': request.method, 'host': urlsplit(request.url).netloc,
+                 'endpoint': urlsplit(request.url).path}
+        try:
+            response = original_send(session, request, **kwargs)
+        except Exception as e:
+            entry.update(status=None, error=f"{type(e).__name__}: {e}",
+                         total_ms=_ms(time.perf_counter() - start))
+            recorder.record_request(entry)
+            raise
+        if kwargs.get('stream'):
+            size = int(response.headers.get('Content-Length', 0))
+        else:
+            size = len(response.content)
+        entry.update(
+            status=response.status_code,
+            bytes=size,
+            connect_ms=_ms(_local.connect),
+            tls_ms=_ms(_local.tls),
+            # requests measures from sending the request (including connect) to parsing the headers
+            headers_ms=_ms(response.elapsed.total_seconds()),
+            total_ms=_ms(time.perf_counter() - start),
+            rate_limit=_rate_limit_headers(response.headers),
+        )
+        recorder.record_request(entry)
+        return response
+
+    for owner, name, wrapper in (
+        (urllib3.connection.HTTPConnection, '_new_conn', _new_conn),
+        (urllib3.connection.HTTPSConnection, 'connect', https_connect),
+        (requests.Session, 'send', send),
+    ):
+        # Saved from the class's own dict, so an inherited method is restored by deleting the wrapper
+        _originals.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, wrapper)
+
+def _uninstall():
+    """Restore the methods wrapped by _install()."""
+    while _originals:
+        owner, name, original = _originals.pop()
+        if original is None:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
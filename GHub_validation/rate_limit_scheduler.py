@@ -0,0 +1,173 @@
+"""
+Rate-limit-aware scheduling of GitHub API calls across a pool of tokens.
+
+Each token's ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` budget and any
+secondary-limit ``Retry-After`` back-off is tracked, and work is sent to the
+token with the most headroom. When every token is exhausted the scheduler
+waits for the earliest reset instead of failing, up to a bounded number of
+attempts per call.
+"""
+import threading
+import time
+import config
+
+# Back-off used for a secondary rate limit that doesn't send Retry-After
+SECONDARY_LIMIT_BACKOFF = 60
+# Back-off for an exhausted token whose reset time is unknown or already past
+PRIMARY_LIMIT_BACKOFF = 60
+
+def classify_rate_limit(status, headers):
+    """Return 'primary', 'secondary' or None for a GitHub error response."""
+    if status not in (403, 429) or not headers:
+        return None
+    headers = {k.lower(): v for k, v in headers.items()}
+    if 'retry-after' in headers:
+        return 'secondary'
+    if headers.get('x-ratelimit-remaining') == '0':
+        return 'primary'
+    return None
+
+class TokenState:
+    """Known rate-limit budget of a single token."""
+
+    def __init__(self, token):
+        self.token = token
+        self.remaining = None  # unknown until the first response
+        self.limit = None
+        self.reset = 0
+        self.blocked_until = 0
+
+    def available_at(self, now):
+        """Return the time this token may next be used."""
+        if self.blocked_until > now:
+            return self.blocked_until
+        if self.remaining is not None and self.remaining <= 0 and self.reset > now:
+            return self.reset
+        return now
+
+class TokenPool:
+    """Spreads GitHub API calls over a pool of tokens by remaining rate limit.
+
+    All tokens in a pool should have the same access, since any of them may
+    serve a given call.
+    """
+
+    def __init__(self, tokens, base_url=None, clock=time.time, sleep=time.sleep, http_cache=None):
+        if not tokens:
+            raise ValueError("TokenPool needs at least one token")
+        self.base_url = base_url or config.GITHUB_URL
+        self.http_cache = http_cache
+        self._states = [TokenState(token) for token in dict.fromkeys(tokens)]
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+
+    @classmethod
+    def from_config(cls):
+        """Build a pool from GITHUB_API_KEYS, falling back to GITHUB_API_KEY.
+
+        Clients of the pool share the on-disk conditional-request cache.
+        """
+        from http_cache import HTTPCache
+        return cls(config.GITHUB_API_KEYS or [config.GITHUB_API_KEY],
+                   http_cache=HTTPCache(config.HTTP_CACHE_PATH, config.HTTP_CACHE_MAX_BYTES))
+
+    def acquire(self):
+        """Return the token with the most headroom, waiting while all are exhausted."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                ready = [s for s in self._states if s.available_at(now) <= now]
+                if ready:
+                    # Unknown budgets sort first so every token gets probed
+                    state = max(ready, key=lambda s: float('inf') if s.remaining is None else s.remaining)
+                    if state.remaining is not None:
+                        state.remaining -= 1
+                    return state.token
+                wait = min(s.available_at(now) for s in self._states) - now
+            self._sleep(max(wait, 0))
+
+    def _state(self, token):
+        return next(s for s in self._states if s.token == token)
+
+    def update(self, token, status, headers):
+        """Record the rate-limit headers of a response made with ``token``."""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        with self._lock:
+            state = self._state(token)
+            now = self._clock()
+            if 'x-ratelimit-remaining' in headers:
+                state.remaining = int(headers['x-ratelimit-remaining'])
+                state.limit = int(headers.get('x-ratelimit-limit', state.limit or 0))
+                state.reset = int(headers.get('x-ratelimit-reset', state.reset))
+            kind = classify_rate_limit(status, headers)
+            if kind == 'secondary':
+                retry_after = int(headers.get('retry-after', SECONDARY_LIMIT_BACKOFF))
+                state.blocked_until = now + retry_after
+            elif kind == 'primary':
+                state.remaining = 0
+            if state.remaining is not None and state.remaining <= 0 and state.reset <= now:
+                # Without a usable reset the token would be picked again at once
+                state.reset = now + PRIMARY_LIMIT_BACKOFF
+
+    def _max_attempts(self):
+        # Every token once, plus the usual retries after waiting for a reset
+        return len(self._states) + config.RETRY_ATTEMPTS
+
+    def github(self, token):
+        """Return the (cached) PyGithub client for a token in the pool."""
+        import clients
+        with self._lock:
+            if token not in self._clients:
+                # Rate-limit retries are handled here by rerouting, not by sleeping in PyGithub
+                self._clients[token] = clients.github(token, self.base_url, rate_limit_retry=False,
+                                                      http_cache=self.http_cache)
+            return self._clients[token]
+
+    def call(self, func):
+        """Run ``func(github_client)`` on the best token, rerouting on rate limits.
+
+        Rate-limited calls are retried on another token (or after the reset);
+        once the attempts run out, and for any other error, the exception is
+        raised to the caller.
+        """
+        from github.GithubException import GithubException
+        attempts = self._max_attempts()
+        for attempt in range(attempts):
+            token = self.acquire()
+            g = self.github(token)
+            try:
+                result = func(g)
+            except GithubException as e:
+                # RateLimitExceededException is classified here too
+                if classify_rate_limit(e.status, e.headers) and attempt < attempts - 1:
+                    self.update(token, e.status, e.headers)
+                    continue
+                raise
+            remaining, limit = g.requester.rate_limiting
+            if limit >= 0:
+                self.update(token, 200, {
+                    'X-RateLimit-Remaining': str(remaining),
+                    'X-RateLimit-Limit': str(limit),
+                    'X-RateLimit-Reset': str(g.requester.rate_limiting_resettime),
+                })
+            return result
+
+    def request(self, session, method, path, **kwargs):
+        """Send a raw REST request through ``session`` on the best token.
+
+        ``path`` is relative to the pool's base URL unless it is an absolute
+        URL. Rate-limited responses are retried on another token, up to a
+        bounded number of attempts; the final response is returned.
+        """
+        url = path if path.startswith(('http://', 'https://')) else f"{self.base_url.rstrip('/')}{path}"
+        headers = dict(kwargs.pop('headers', None) or {})
+        attempts = self._max_attempts()
+        for attempt in range(attempts):
+            token = self.acquire()
+            headers['Authorization'] = f"token {token}"
+            response = session.request(method, url, headers=headers, **kwargs)
+            self.update(token, response.status_code, response.headers)
+            if not classify_rate_limit(response.status_code, response.headers) or attempt == attempts - 1:
+                return response
@@ -0,0 +1,233 @@
+"""
+Script to export a repository inventory for a user or organization.
+
+Repositories are fetched with cursor-paginated GraphQL queries (100 repos
+and all exported fields per request) and streamed as NDJSON or CSV, so
+memory use stays constant regardless of repository count. The last cursor
+is saved after every page, so an interrupted export can be resumed.
+Repositories the token can't read (for example in an organization that
+enforces SAML SSO) are skipped with a warning instead of ending the export.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import config
+import resilience
+from config import validate_config
+from rate_limit_scheduler import TokenPool
+
+PAGE_SIZE = 100
+
+FIELDS = [
+    'name_with_owner', 'name', 'private', 'archived', 'fork', 'url', 'description',
+    'language', 'stars', 'forks', 'disk_usage_kb', 'default_branch',
+    'created_at', 'updated_at', 'pushed_at',
+]
+
+_REPOSITORY_CONNECTION = '''
+    repositories(first: $first, after: $cursor, orderBy: {field: CREATED_AT, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        nameWithOwner name isPrivate isArchived isFork url description
+        primaryLanguage { name }
+        stargazerCount forkCount diskUsage
+        defaultBranchRef { name }
+        createdAt updatedAt pushedAt
+      }
+    }
+'''
+
+OWNER_QUERY = '''
+query($login: String!, $first: Int!, $cursor: String) {
+  owner: repositoryOwner(login: $login) {%s}
+}
+''' % _REPOSITORY_CONNECTION
+
+VIEWER_QUERY = '''
+query($first: Int!, $cursor: String) {
+  owner: viewer {%s}
+}
+''' % _REPOSITORY_CONNECTION
+
+class InventoryError(Exception):
+    """Raised when the GraphQL API returns an error."""
+
+def graphql_url(api_url):
+    """Return the GraphQL endpoint for a REST API base URL."""
+    api_url = api_url.rstrip('/')
+    # GitHub Enterprise serves REST at /api/v3 and GraphQL at /api/graphql
+    if api_url.endswith('/api/v3'):
+        return api_url[:-len('/v3')] + '/graphql'
+    return api_url + '/graphql'
+
+def _row(node):
+    """Flatten a GraphQL repository node into an export row."""
+    return {
+        'name_with_owner': node['nameWithOwner'],
+        'name': node['name'],
+        'private': node['isPrivate'],
+        'archived': node['isArchived'],
+        'fork': node['isFork'],
+        'url': node['url'],
+        'description': node['description'],
+        'language': (node['primaryLanguage'] or {}).get('name'),
+        'stars': node['stargazerCount'],
+        'forks': node['forkCount'],
+        'disk_usage_kb': node['diskUsage'],
+        'default_branch': (node['defaultBranchRef'] or {}).get('name'),
+        'created_at': node['createdAt'],
+        'updated_at': node['updatedAt'],
+        'pushed_at': node['pushedAt'],
+    }
+
+def _server_error(response):
+    """resilience.classify_response() without rate limits, which the token pool already reroutes."""
+    failure = resilience.classify_response(response)
+    return failure if failure and failure[0] != resilience.RATE_LIMITED else None
+
+def iter_repository_pages(pool, session, login=None, cursor=None, page_size=PAGE_SIZE):
+    """Yield (rows, end_cursor) for each page of repositories.
+
+    ``login`` may be a user or organization; None lists the authenticated
+    user's repositories. Pagination starts after ``cursor`` if given.
+    """
+    url = graphql_url(pool.base_url)
+    variables = {'first': page_size}
+    if login:
+        query = OWNER_QUERY
+        variables['login'] = login
+    else:
+        query = VIEWER_QUERY
+    while True:
+        variables['cursor'] = cursor
+        body = {'query': query, 'variables': variables}
+        # A query is read-only, so 5xx responses and timeouts are safe to retry;
+        # rate limits are left to the pool, which moves on to another token
+        response = resilience.call(
+            lambda: pool.request(session, 'POST', url, json=body, timeout=30),
+            url, idempotent=True, classify_result=_server_error,
+        )
+        if response.status_code != 200:
+            raise InventoryError(f"HTTP {response.status_code}: {response.text[:200]}")
+        payload = response.json()
+        errors = payload.get('errors') or []
+        owner = (payload.get('data') or {}).get('owner')
+        if owner is None or owner.get('repositories') is None:
+            if errors:
+                raise InventoryError('; '.join(error.get('message', str(error)) for error in errors))
+            raise InventoryError(f"No user or organization named '{login}'")
+        # Partial errors null out the affected repositories; the rest of the page is still valid
+        for error in errors:
+            path = '.'.join(str(part) for part in error.get('path') or [])
+            print(f"[WARNING] Skipped {path or 'a repository'}: {error.get('message', error)}", file=sys.stderr)
+        connection = owner['repositories']
+        cursor = connection['pageInfo']['endCursor']
+        yield [_row(node) for node in connection['nodes'] if node is not None], cursor
+        if not connection['pageInfo']['hasNextPage']:
+            return
+
+def _read_cursor(state_path, export):
+    """Return the saved cursor if it belongs to the same ``export`` (API URL, owner, format), else None."""
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get('export') != export:
+        print(f"Saved cursor in {state_path} is for a different export, starting over", file=sys.stderr)
+        return None
+    return state.get('cursor')
+
+def _write_cursor(state_path, export, cursor):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'export': export, 'cursor': cursor}, f)
+    os.replace(tmp_path, state_path)
+
+def export_inventory(output_path, fmt='ndjson', login=None, resume=True, page_size=PAGE_SIZE):
+    """Stream the repository inventory to ``output_path`` ('-' for stdout).
+
+    When writing to a file, the last cursor is kept in ``<output>.cursor``
+    and, with ``resume``, an interrupted export of the same owner and
+    format continues from it.
+    Returns the number of repositories written.
+    """
+    from validate_github_key import make_session
+
+    state_path = None if output_path == '-' else f"{output_path}.cursor"
+    export = {'url': config.GITHUB_URL, 'owner': login, 'format': fmt}
+    cursor = _read_cursor(state_path, export) if state_path and resume else None
+    if cursor and os.path.exists(output_path):
+        output = open(output_path, 'a', newline='', encoding='utf-8')
+        print(f"Resuming export after cursor {cursor}", file=sys.stderr)
+    elif output_path == '-':
+        output, cursor = sys.stdout, None
+    else:
+        output, cursor = open(output_path, 'w', newline='', encoding='utf-8'), None
+
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        if cursor is None:
+            writer.writeheader()
+
+    pool = TokenPool.from_config()
+    session = make_session(1)
+    count = 0
+    try:
+        for rows, end_cursor in iter_repository_pages(pool, session, login, cursor, page_size):
+            for row in rows:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    output.write(json.dumps(row) + '\n')
+            output.flush()
+            count += len(rows)
+            if state_path and end_cursor:
+                _write_cursor(state_path, export, end_cursor)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    # A finished export doesn't need to be resumed
+    if state_path and os.path.exists(state_path):
+        os.remove(state_path)
+    return count
+
+def main(argv=None):
+    """Parse command-line arguments and run the export."""
+    parser = argparse.ArgumentParser(description="Export every repository of a GitHub user or organization.")
+    parser.add_argument('owner', nargs='?',
+                        help="user or organization login (default: the authenticated user)")
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson',
+                        help="output format (default: ndjson)")
+    parser.add_argument('--output', '-o', default='-',
+                        help="output file ('-' for stdout, the default)")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore a saved cursor and start the export from the beginning")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help=f"repositories per GraphQL request (max {PAGE_SIZE})")
+    args = parser.parse_args(argv)
+
+    try:
+        validate_config()
+    except ValueError as e:
+        print(f"Configuration error: {e}", file=sys.stderr)
+        return False
+    import requests
+    try:
+        count = export_inventory(args.output, args.format, args.owner, not args.restart,
+                                 max(1, min(args.page_size, PAGE_SIZE)))
+    except InventoryError as e:
+        print(f"[ERROR] GitHub GraphQL error: {e}", file=sys.stderr)
+        return False
+    except (requests.RequestException, resilience.CircuitOpenError) as e:
+        print(f"[ERROR] Failed to reach GitHub: {type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    print(f"Exported {count} repositories from {config.GITHUB_URL}", file=sys.stderr)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,85 @@
+"""
+Retries, backoff, request hedging and circuit breaking for GitHub API calls.
+
+Failures are classified by type instead of by message text:
+
+- ``auth``: the credential was rejected; retrying can't help.
+- ``rate-limited``: the call may be retried once the ``Retry-After`` or
+  rate-limit reset has passed.
+- ``unreachable``: the request never reached the server (connection
+  refused, DNS failure, connect timeout), so any call is safe to retry.
+- ``transient``: the request may have been processed (read timeout, reset
+  connection, 5xx), so only idempotent calls are retried.
+- ``permanent``: anything else.
+
+``call()`` retries with exponential backoff and full jitter, optionally
+hedges idempotent requests, and keeps a circuit breaker per host, so a
+degraded endpoint fails fast instead of tying up every check in timeouts.
+The retry loop is shared with the other project (see shared/resilience.py);
+this module classifies the errors.
+"""
+import time
+import shared_modules  # puts shared/ on the import path
+from shared import resilience as _shared
+from shared.resilience import (
+    AUTH, BASE_DELAY, HOST_FAILURES, PERMANENT, RATE_LIMITED, RETRYABLE, TRANSIENT, UNREACHABLE,
+    CircuitBreaker, CircuitOpenError, backoff_delay, breaker, hedged,
+)
+
+def _retry_after(headers):
+    """Return the seconds to wait from Retry-After or X-RateLimit-Reset headers, or None."""
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    try:
+        if 'retry-after' in headers:
+            return max(float(headers['retry-after']), 0.0)
+        if headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in headers:
+            return max(float(headers['x-ratelimit-reset']) - time.time(), 0.0)
+    except ValueError:
+        pass
+    return None
+
+def classify_response(response):
+    """Return (kind, retry_after) for a failed requests response, or None if it should be returned as is."""
+    from rate_limit_scheduler import classify_rate_limit
+    status = response.status_code
+    if status in (403, 429) and classify_rate_limit(status, response.headers):
+        return RATE_LIMITED, _retry_after(response.headers)
+    if status >= 500:
+        return TRANSIENT, _retry_after(response.headers)
+    return None
+
+def classify(error):
+    """Return (kind, retry_after) for an exception from requests or PyGithub."""
+    import requests
+    if isinstance(error, CircuitOpenError):
+        return UNREACHABLE, None
+    if isinstance(error, requests.ConnectTimeout):
+        return UNREACHABLE, None
+    if isinstance(error, requests.ConnectionError):
+        from urllib3.exceptions import NewConnectionError
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return (UNREACHABLE if isinstance(reason, NewConnectionError) else TRANSIENT), None
+    if isinstance(error, requests.RequestException):
+        return TRANSIENT, None
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        # PyGithub's GithubException
+        from rate_limit_scheduler import classify_rate_limit
+        headers = getattr(error, 'headers', None) or {}
+        if status == 401:
+            return AUTH, None
+        if status in (403, 429) and classify_rate_limit(status, headers):
+            return RATE_LIMITED, _retry_after(headers)
+        if status >= 500:
+            return TRANSIENT, _retry_after(headers)
+    return PERMANENT, None
+
+def call(func, url=None, idempotent=False, **options):
+    """Call ``func()`` with retries, returning its result or raising its last error.
+
+    Failures are classified with classify(); see shared/resilience.py for
+    ``classify_result``, ``attempts``, ``max_delay`` and ``hedge_after``.
+    Calls are treated as non-idempotent unless ``idempotent`` is set. With
+    ``url`` the host's circuit breaker is consulted and updated.
+    """
+    return _shared.call(func, url, idempotent, classify=classify, **options)
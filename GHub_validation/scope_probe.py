@@ -0,0 +1,207 @@
+"""
+Script to probe what GitHub tokens are actually allowed to do.
+
+Each token is checked against a matrix of capabilities (org membership,
+private repositories, gists, packages, Actions, ...) using the cheapest
+request for each: ``HEAD`` where the status code is enough and
+``per_page=1`` everywhere. All (token, check) requests run concurrently
+with bounded parallelism, and one capability row is produced per token.
+"""
+import argparse
+import json
+import sys
+import config
+import resilience
+from config import validate_config
+from rate_limit_scheduler import classify_rate_limit
+
+DEFAULT_WORKERS = 16
+
+# name, HTTP method and path of each check. Paths with {repo} need --repo.
+# 'nonempty' checks use GET and only count as granted if a result is listed.
+CHECKS = [
+    {'name': 'user', 'method': 'HEAD', 'path': '/user'},
+    {'name': 'user_email', 'method': 'HEAD', 'path': '/user/emails?per_page=1'},
+    {'name': 'org_membership', 'method': 'HEAD', 'path': '/user/memberships/orgs?per_page=1'},
+    {'name': 'private_repos', 'method': 'GET', 'path': '/user/repos?visibility=private&per_page=1', 'nonempty': True},
+    {'name': 'gists', 'method': 'HEAD', 'path': '/gists?per_page=1'},
+    {'name': 'packages', 'method': 'HEAD', 'path': '/user/packages?package_type=container&per_page=1'},
+    {'name': 'notifications', 'method': 'HEAD', 'path': '/notifications?per_page=1'},
+    {'name': 'ssh_keys', 'method': 'HEAD', 'path': '/user/keys?per_page=1'},
+    {'name': 'gpg_keys', 'method': 'HEAD', 'path': '/user/gpg_keys?per_page=1'},
+    {'name': 'repo_contents', 'method': 'HEAD', 'path': '/repos/{repo}/contents/'},
+    {'name': 'repo_issues', 'method': 'HEAD', 'path': '/repos/{repo}/issues?per_page=1'},
+    {'name': 'repo_actions', 'method': 'HEAD', 'path': '/repos/{repo}/actions/runs?per_page=1'},
+    {'name': 'repo_secrets', 'method': 'HEAD', 'path': '/repos/{repo}/actions/secrets?per_page=1'},
+    {'name': 'repo_hooks', 'method': 'HEAD', 'path': '/repos/{repo}/hooks?per_page=1'},
+]
+
+def load_matrix(path):
+    """Load a check matrix from a JSON file in the same shape as CHECKS.
+
+    Raises ValueError if a check is malformed, a name is used twice or a
+    'nonempty' check doesn't use GET (HEAD responses have no body).
+    """
+    with open(path, encoding='utf-8') as f:
+        checks = json.load(f)
+    if not isinstance(checks, list):
+        raise ValueError("The matrix must be a JSON list of checks")
+    names = set()
+    for check in checks:
+        if not isinstance(check, dict) or not {'name', 'path'} <= check.keys():
+            raise ValueError(f"Check {check!r} needs a 'name' and a 'path'")
+        if check['name'] in names:
+            raise ValueError(f"Check name {check['name']!r} is used more than once")
+        names.add(check['name'])
+        check['method'] = check.get('method', 'HEAD').upper()
+        if check.get('nonempty') and check['method'] != 'GET':
+            raise ValueError(f"Check {check['name']!r} is 'nonempty' and must use GET")
+    return checks
+
+def select_checks(checks, names=None, repo=None):
+    """Return the checks to run: only ``names`` if given, and repo checks only with ``repo``."""
+    selected = []
+    for check in checks:
+        if names and check['name'] not in names:
+            continue
+        if '{repo}' in check['path']:
+            if not repo:
+                continue
+            check = {**check, 'path': check['path'].replace('{repo}', repo)}
+        selected.append(check)
+    return selected
+
+def run_check(session, token, api_url, check):
+    """Run one check and return (status, scopes) where status is yes/no/empty/rate-limited/error."""
+    import requests
+    try:
+        response = resilience.call(
+            lambda: session.request(
+                check['method'], f"{api_url}{check['path']}",
+                headers={'Authorization': f"token {token}", 'Accept': 'application/vnd.github+json'},
+                timeout=10,
+            ),
+            api_url, idempotent=True, classify_result=resilience.classify_response,
+        )
+    except (requests.RequestException, resilience.CircuitOpenError) as e:
+        return f"error: {type(e).__name__}", None
+    scopes = response.headers.get('X-OAuth-Scopes')
+    if response.status_code in (403, 429) and classify_rate_limit(response.status_code, response.headers):
+        return 'rate-limited', scopes
+    if response.status_code in (401, 403, 404):
+        return 'no', scopes
+    if not 200 <= response.status_code < 300:
+        return f"error: HTTP {response.status_code}", scopes
+    if check.get('nonempty'):
+        try:
+            if response.json() == []:
+                return 'empty', scopes
+        except ValueError:
+            return 'error: invalid JSON', scopes
+    return 'yes', scopes
+
+def probe_tokens(tokens, checks, workers=DEFAULT_WORKERS):
+    """Yield one capability dict per (token, api_url) pair, in input order.
+
+    Every check of every token goes through one pool of ``workers``
+    threads; at most ``workers * 2`` requests are in flight, so long token
+    lists are probed with bounded memory.
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    from validate_github_key import make_session, mask_token
+    session = make_session(workers)
+    jobs = ((index, token, api_url, check) for index, (token, api_url) in enumerate(tokens) for check in checks)
+    rows = {}
+    next_index = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                try:
+                    index, token, api_url, check = next(jobs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                row = rows.setdefault(index, {'token': mask_token(token), 'url': api_url, 'scopes': None,
+                                              'capabilities': {}})
+                pending[pool.submit(run_check, session, token, api_url, check)] = (row, check['name'])
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                row, name = pending.pop(future)
+                status, scopes = future.result()
+                row['capabilities'][name] = status
+                if scopes is not None and row['scopes'] is None:
+                    row['scopes'] = [scope.strip() for scope in scopes.split(',') if scope.strip()]
+            # Emit finished tokens in input order
+            while next_index in rows and len(rows[next_index]['capabilities']) == len(checks):
+                yield rows.pop(next_index)
+                next_index += 1
+
+def format_table(rows, checks):
+    """Return the capability rows as a text table (one row per token)."""
+    names = [check['name'] for check in checks]
+    header = ['token'] + names
+    lines = [[row['token']] + [row['capabilities'].get(name, '') for name in names] for row in rows]
+    widths = [max(len(str(line[i])) for line in [header] + lines) for i in range(len(header))]
+    return '\n'.join('  '.join(str(cell).ljust(width) for cell, width in zip(line, widths)).rstrip()
+                     for line in [header] + lines)
+
+def main(argv=None):
+    """Parse command-line arguments and print a capability table."""
+    from validate_github_key import read_tokens
+    parser = argparse.ArgumentParser(description="Probe the capabilities of GitHub tokens.")
+    parser.add_argument('--tokens', metavar='FILE',
+                        help="probe tokens from FILE ('-' for stdin), one 'TOKEN [GITHUB_URL]' per line "
+                             "(default: GITHUB_API_KEY and GITHUB_API_KEYS)")
+    parser.add_argument('--repo', metavar='OWNER/NAME', help="repository used for the repo_* checks")
+    parser.add_argument('--checks', type=lambda value: value.split(','),
+                        help="comma-separated check names to run (default: all)")
+    parser.add_argument('--matrix', metavar='FILE', help="JSON file replacing the built-in check matrix")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--json', action='store_true', help="print one JSON line per token instead of a table")
+    args = parser.parse_args(argv)
+
+    try:
+        matrix = load_matrix(args.matrix) if args.matrix else CHECKS
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Can't load the check matrix: {e}", file=sys.stderr)
+        return False
+    names = [check['name'] for check in matrix]
+    unknown = [name for name in args.checks or () if name not in names]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)} (available: {', '.join(names)})")
+    checks = select_checks(matrix, args.checks, args.repo)
+    if not checks:
+        print("[ERROR] No checks selected", file=sys.stderr)
+        return False
+    if args.tokens:
+        stream = sys.stdin if args.tokens == '-' else open(args.tokens, encoding='utf-8')
+        tokens = list(read_tokens(stream))
+        if stream is not sys.stdin:
+            stream.close()
+    else:
+        try:
+            validate_config()
+        except ValueError as e:
+            print(f"Configuration error: {e}", file=sys.stderr)
+            return False
+        keys = dict.fromkeys([config.GITHUB_API_KEY] + config.GITHUB_API_KEYS)
+        tokens = [(key, config.GITHUB_URL.rstrip('/')) for key in keys]
+
+    rows = []
+    for row in probe_tokens(tokens, checks, max(1, args.workers)):
+        if args.json:
+            print(json.dumps(row), flush=True)
+        else:
+            rows.append(row)
+    if not args.json:
+        print(format_table(rows, checks))
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
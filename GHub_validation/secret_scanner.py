@@ -0,0 +1,249 @@
+"""
+Script to scan directory trees for leaked GitHub and GitLab tokens.
+
+Files are read through ``mmap`` and searched with one precompiled pattern
+that matches every supported token shape at once. The work is split into
+tasks of whole small files or slices of large files and spread over a
+process pool, so scanning is bound by disk throughput rather than a single
+CPU. Binary files and, inside a git work tree, ignored files are skipped.
+With ``--validate`` every GitHub token found is checked against the API.
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import subprocess
+import sys
+import time
+
+# One alternation per token shape. The pattern starts with literal prefixes
+# so the regex engine can skip ahead quickly; a leading lookbehind would
+# disable that and make scanning about 20x slower, so the character before a
+# match is checked in scan_task() instead.
+TOKEN_RE = re.compile(
+    rb'(?:ghp_[A-Za-z0-9]{36}|github_pat_[A-Za-z0-9_]{82}|glpat-[A-Za-z0-9_-]{20,64})'
+    rb'(?![A-Za-z0-9_-])'
+)
+# Bytes that mean a match is part of a longer identifier
+WORD_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_')
+TOKEN_KINDS = ((b'ghp_', 'github_classic'), (b'github_pat_', 'github_fine_grained'), (b'glpat-', 'gitlab'))
+GITHUB_KINDS = ('github_classic', 'github_fine_grained')
+
+# Large files are split into slices of this size, and small files are grouped
+# into tasks of roughly the same size
+CHUNK_SIZE = 32 * 1024 * 1024
+# Slices overlap by more than the longest token so none is cut in half
+OVERLAP = 256
+# A NUL byte in the first block marks a file as binary
+BINARY_SNIFF_BYTES = 8192
+SKIP_DIRS = {'.git', '.hg', '.svn'}
+
+def token_kind(token):
+    """Return the kind of a matched token from its prefix."""
+    return next(kind for prefix, kind in TOKEN_KINDS if token.startswith(prefix))
+
+def is_binary(f):
+    """Return True if the start of an open binary file contains a NUL byte."""
+    f.seek(0)
+    return b'\0' in f.read(BINARY_SNIFF_BYTES)
+
+def scan_task(task):
+    """Scan a list of (path, start, end) slices and return (hits, bytes_scanned, binary_files).
+
+    Only matches that start inside [start, end) are reported; the search
+    runs ``OVERLAP`` bytes past ``end`` to see tokens straddling the edge.
+    """
+    hits = []
+    scanned = binary = 0
+    for path, start, end in task:
+        try:
+            with open(path, 'rb') as f:
+                if is_binary(f):
+                    binary += start == 0
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for match in TOKEN_RE.finditer(mm, start, min(len(mm), end + OVERLAP)):
+                        offset = match.start()
+                        if offset < end and not (offset and mm[offset - 1] in WORD_BYTES):
+                            token = match.group()
+                            hits.append((path, offset, token_kind(token), token.decode('ascii')))
+                    scanned += min(len(mm), end) - start
+        except (OSError, ValueError):
+            # Unreadable, vanished or truncated while scanning
+            continue
+    return hits, scanned, binary
+
+def _git_files(root):
+    """Return the tracked and untracked, non-ignored files under ``root``, or None outside a git work tree."""
+    try:
+        output = subprocess.run(
+            ['git', '-C', root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            capture_output=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [os.path.join(root, os.fsdecode(name)) for name in output.split(b'\0') if name]
+
+def iter_files(roots, respect_ignore=True):
+    """Yield (path, size) for every regular, non-empty file under ``roots``."""
+    for root in roots:
+        if os.path.isfile(root):
+            paths = [root]
+        else:
+            paths = _git_files(root) if respect_ignore else None
+            if paths is None:
+                paths = _walk(root)
+        for path in paths:
+            try:
+                stat = os.lstat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path) and not os.path.islink(path) and stat.st_size:
+                yield path, stat.st_size
+
+def _walk(root):
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+        for name in files:
+            yield os.path.join(directory, name)
+
+def iter_tasks(files, chunk_size=CHUNK_SIZE):
+    """Group (path, size) pairs into scan tasks of about ``chunk_size`` bytes each."""
+    task, task_bytes = [], 0
+    for path, size in files:
+        if size > chunk_size:
+            for start in range(0, size, chunk_size):
+                yield [(path, start, min(size, start + chunk_size))]
+            continue
+        task.append((path, 0, size))
+        task_bytes += size
+        # Cap the file count too, so trees of tiny files still spread over the pool
+        if task_bytes >= chunk_size or len(task) >= 256:
+            yield task
+            task, task_bytes = [], 0
+    if task:
+        yield task
+
+def line_numbers(path, offsets):
+    """Return {offset: line} for byte offsets in a file (only called for files with hits)."""
+    lines = {}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        line, position = 1, 0
+        for offset in sorted(offsets):
+            # Count in bounded slices so huge files aren't copied at once
+            while position < offset:
+                step = min(offset, position + (1 << 20))
+                line += mm[position:step].count(b'\n')
+                position = step
+            lines[offset] = line
+    return lines
+
+def scan(roots, workers=None, respect_ignore=True, chunk_size=CHUNK_SIZE, stats=None):
+    """Yield (path, offset, kind, token) for every token found under ``roots``.
+
+    At most ``workers * 2`` tasks are in flight, so the file list is walked
+    lazily and memory stays bounded. Bytes scanned, file count and binary
+    files skipped are added to ``stats`` if given.
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    workers = workers or os.cpu_count() or 1
+    stats = stats if stats is not None else {}
+    stats.setdefault('files', 0)
+    stats.setdefault('bytes', 0)
+    stats.setdefault('binary_skipped', 0)
+
+    def counted(files):
+        for path, size in files:
+            stats['files'] += 1
+            yield path, size
+
+    tasks = iter_tasks(counted(iter_files(roots, respect_ignore)), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                try:
+                    task = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(scan_task, task))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                hits, scanned, binary = future.result()
+                stats['bytes'] += scanned
+                stats['binary_skipped'] += binary
+                yield from hits
+
+def validate_hits(tokens, workers=8):
+    """Check GitHub tokens against the API and return {token: result}."""
+    from concurrent.futures import ThreadPoolExecutor
+    from validate_github_key import check_token, make_session
+    tokens = list(tokens)
+    session = make_session(workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(tokens, pool.map(lambda token: check_token(session, token), tokens)))
+
+def main(argv=None):
+    """Parse command-line arguments, scan the given paths and print one JSON line per token found."""
+    from validate_github_key import mask_token
+    parser = argparse.ArgumentParser(description="Scan files for leaked GitHub and GitLab tokens.")
+    parser.add_argument('paths', nargs='*', default=['.'], help="files or directories to scan (default: .)")
+    parser.add_argument('-o', '--output', help="write findings to this file instead of stdout")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="scanner processes (default: number of CPUs)")
+    parser.add_argument('--no-ignore', action='store_true',
+                        help="also scan files ignored by git (.gitignore and friends)")
+    parser.add_argument('--validate', action='store_true',
+                        help="check whether found GitHub tokens are still live (uses GITHUB_URL)")
+    parser.add_argument('--show-secrets', action='store_true',
+                        help="print full tokens instead of masked ones")
+    args = parser.parse_args(argv)
+
+    stats = {}
+    started = time.perf_counter()
+    hits = list(scan(args.paths, args.workers, not args.no_ignore, stats=stats))
+    elapsed = time.perf_counter() - started
+
+    by_path = {}
+    for path, offset, _, _ in hits:
+        by_path.setdefault(path, set()).add(offset)
+    lines = {}
+    for path, offsets in by_path.items():
+        try:
+            lines[path] = line_numbers(path, offsets)
+        except (OSError, ValueError):
+            lines[path] = {}
+    results = {}
+    if args.validate:
+        results = validate_hits(dict.fromkeys(token for _, _, kind, token in hits if kind in GITHUB_KINDS))
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for path, offset, kind, token in sorted(hits):
+            row = {'path': path, 'line': lines[path].get(offset), 'offset': offset, 'kind': kind,
+                   'token': token if args.show_secrets else mask_token(token)}
+            if token in results:
+                result = results[token]
+                row['live'] = result['valid']
+                if result['valid']:
+                    row['login'] = result['login']
+                elif result.get('error'):
+                    row['error'] = result['error']
+            output.write(json.dumps(row) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    megabytes = stats['bytes'] / 1e6
+    print(f"{len(hits)} tokens found in {stats['files']} files ({megabytes:.1f} MB, "
+          f"{stats['binary_skipped']} binary skipped) in {elapsed:.2f}s "
+          f"({megabytes / elapsed if elapsed else 0:.0f} MB/s)", file=sys.stderr)
+    return not hits
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,13 @@
+"""
+Make the repository's shared/ package importable from this project's scripts.
+
+The modules both projects use live in ../shared. The repository root is
+added after this directory, so the project's own modules, including its
+config, still take precedence.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,21 @@
+"""
+Test setup: import the project's modules the way its scripts do, from this directory,
+and serve the benchmark suite's GitHub stand-in for tests that make HTTP calls.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, 'GHub_validation'))
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+
+@pytest.fixture(scope='session')
+def github_mock():
+    """Base URL of a local GitHub API stand-in (see benchmarks/mock_servers.py)."""
+    from mock_servers import GitHubMock
+    server = GitHubMock()
+    yield server.start()
+    server.stop()
@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+import pytest
+
+import clients
+
+
+def test_pygithub_client_uses_the_shared_pool(github_mock):
+    g = clients.github('ghp_' + 'a' * 36, github_mock)
+    session = g.requester._Requester__createConnection().session
+    assert session.get_adapter(github_mock) in clients._adapters.values()
+    assert g.get_user().login == 'octocat'
+
+
+def test_pygithub_without_the_connection_hook_fails_loudly():
+    client = SimpleNamespace(requester=SimpleNamespace())
+    with pytest.raises(RuntimeError, match='requirements.txt'):
+        clients._mount(client, None)
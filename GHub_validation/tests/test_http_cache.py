@@ -0,0 +1,35 @@
+import requests
+
+import config
+import http_cache
+import validate_github_key
+
+UNWRITABLE = '/proc/nonexistent/http-cache.sqlite3'
+
+
+def test_stored_response_is_found_again(tmp_path):
+    cache = http_cache.HTTPCache(str(tmp_path / 'http-cache.sqlite3'))
+    key, entry = cache.lookup('https://api.github.com/user', 'token secret', None)
+    assert entry is None
+    cache.store(key, '"etag"', None, {'Content-Type': 'application/json'}, b'{}')
+    assert cache.lookup('https://api.github.com/user', 'token secret', None)[1]['etag'] == '"etag"'
+    assert cache.stats()['entries'] == 1
+
+
+def test_unwritable_cache_sends_requests_without_it(github_mock, capsys):
+    cache = http_cache.HTTPCache(UNWRITABLE)
+    session = requests.Session()
+    session.mount('http://', http_cache.CachingAdapter(cache))
+    for _ in range(2):
+        assert session.get(f"{github_mock}/user", headers={'Authorization': 'token secret'}).status_code == 200
+    assert cache.disabled
+    assert capsys.readouterr().err.count('[WARNING] HTTP cache disabled') == 1
+
+
+def test_batch_validation_with_unwritable_cache(github_mock, tmp_path, monkeypatch):
+    config.load()
+    monkeypatch.setattr(config, 'HTTP_CACHE_PATH', UNWRITABLE)
+    monkeypatch.setattr(config, 'VALIDATION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    tokens = tmp_path / 'tokens.txt'
+    tokens.write_text(f"ghp_{'a' * 36} {github_mock}\n")
+    assert validate_github_key.main(['--batch', str(tokens), '--refresh', '--no-history'])
@@ -0,0 +1,32 @@
+import requests
+import urllib3.connection
+
+import instrumentation
+
+
+def methods():
+    return (requests.Session.send, urllib3.connection.HTTPConnection._new_conn,
+            urllib3.connection.HTTPSConnection.connect)
+
+
+def test_requests_are_only_wrapped_while_enabled(tmp_path):
+    originals = methods()
+    trace = tmp_path / 'trace.ndjson'
+    instrumentation.enable(str(trace))
+    try:
+        assert all(wrapped is not original for wrapped, original in zip(methods(), originals))
+        instrumentation.step('work')
+    finally:
+        instrumentation.disable()
+    assert methods() == originals
+    assert not instrumentation.recorder.enabled
+    assert instrumentation.recorder.report()['steps'][-1]['name'] == 'work'
+    assert '"event": "step"' in trace.read_text()
+
+
+def test_enable_twice_restores_the_originals_once():
+    originals = methods()
+    instrumentation.enable()
+    instrumentation.enable()
+    instrumentation.disable()
+    assert methods() == originals
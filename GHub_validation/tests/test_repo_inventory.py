@@ -0,0 +1,52 @@
+import pytest
+import requests
+
+import config
+import repo_inventory
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    config.load()
+    monkeypatch.setattr(config, 'RETRY_ATTEMPTS', 3)
+    monkeypatch.setattr(config, 'RETRY_MAX_DELAY', 0)
+
+
+class FakePool:
+    base_url = 'https://api.github.com'
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def request(self, session, method, url, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        if response.status_code == 429:
+            response.headers['Retry-After'] = '0'
+        response._content = b'{"data": {"owner": {"repositories": {"nodes": [], "pageInfo": {"endCursor": null, "hasNextPage": false}}}}}'
+        return response
+
+
+def test_rate_limited_response_is_not_retried_again():
+    # The pool has already rerouted the request across its tokens
+    pool = FakePool(429, 200)
+    with pytest.raises(repo_inventory.InventoryError, match='HTTP 429'):
+        list(repo_inventory.iter_repository_pages(pool, None))
+    assert pool.calls == 1
+
+
+def test_server_error_is_retried():
+    pool = FakePool(502, 200)
+    assert list(repo_inventory.iter_repository_pages(pool, None)) == [([], None)]
+    assert pool.calls == 2
+
+
+def test_connection_error_is_reported(monkeypatch, capsys):
+    def unreachable(*args):
+        raise requests.ConnectionError('connection refused')
+    monkeypatch.setattr(repo_inventory, 'validate_config', lambda: None)
+    monkeypatch.setattr(repo_inventory, 'export_inventory', unreachable)
+    assert repo_inventory.main([]) is False
+    assert '[ERROR] Failed to reach GitHub: ConnectionError: connection refused' in capsys.readouterr().err
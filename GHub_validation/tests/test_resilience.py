@@ -0,0 +1,59 @@
+import pytest
+import requests
+
+import config
+import resilience
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    config.load()
+    monkeypatch.setattr(config, 'RETRY_ATTEMPTS', 3)
+    monkeypatch.setattr(config, 'HEDGE_AFTER', None)
+
+
+def failing(*errors, result='ok'):
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    return func, calls
+
+
+def test_backoff_is_capped():
+    assert all(0 <= resilience.backoff_delay(attempt, cap=2) <= 2 for attempt in range(10))
+
+
+def test_idempotent_call_is_retried_after_a_read_timeout():
+    func, calls = failing(requests.ReadTimeout())
+    delays = []
+    assert resilience.call(func, idempotent=True, sleep=delays.append) == 'ok'
+    assert len(calls) == 2 and len(delays) == 1
+
+
+def test_non_idempotent_call_is_not_retried_after_a_read_timeout():
+    func, calls = failing(requests.ReadTimeout())
+    with pytest.raises(requests.ReadTimeout):
+        resilience.call(func, sleep=lambda delay: None)
+    assert len(calls) == 1
+
+
+def test_retries_stop_after_the_attempts():
+    func, calls = failing(*[requests.ConnectTimeout()] * 5)
+    with pytest.raises(requests.ConnectTimeout):
+        resilience.call(func, sleep=lambda delay: None)
+    assert len(calls) == config.RETRY_ATTEMPTS
+
+
+def test_breaker_opens_after_repeated_host_failures(monkeypatch):
+    monkeypatch.setattr(config, 'CIRCUIT_BREAKER_THRESHOLD', 2)
+    url = 'http://breaker-test.invalid'
+    for _ in range(2):
+        with pytest.raises(requests.ConnectTimeout):
+            resilience.call(failing(requests.ConnectTimeout())[0], url, attempts=1)
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.call(lambda: 'ok', url)
@@ -0,0 +1,33 @@
+import pytest
+import requests
+
+import scope_probe
+
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.body
+        return response
+
+
+def test_non_json_body_is_an_error():
+    check = {'name': 'private_repos', 'method': 'GET', 'path': '/user/repos', 'nonempty': True}
+    assert scope_probe.run_check(FakeSession(b'<html>'), 'token', 'http://127.0.0.1:9', check) == \
+        ('error: invalid JSON', None)
+
+
+def test_empty_list_is_empty():
+    check = {'name': 'private_repos', 'method': 'GET', 'path': '/user/repos', 'nonempty': True}
+    assert scope_probe.run_check(FakeSession(b'[]'), 'token', 'http://127.0.0.1:9', check) == ('empty', None)
+
+
+def test_unknown_check_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        scope_probe.main(['--checks', 'user,nope'])
+    assert exit_info.value.code == 2
+    assert 'unknown check(s): nope' in capsys.readouterr().err
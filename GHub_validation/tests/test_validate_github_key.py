@@ -0,0 +1,21 @@
+import io
+
+import pytest
+
+import validate_github_key
+
+
+def test_empty_batch_is_a_usage_error(tmp_path, capsys):
+    tokens = tmp_path / 'tokens.txt'
+    tokens.write_text('\n# no tokens here\n')
+    with pytest.raises(SystemExit) as exit_info:
+        validate_github_key.main(['--batch', str(tokens), '--no-cache', '--no-history'])
+    assert exit_info.value.code == 2
+    assert 'no tokens found' in capsys.readouterr().err
+
+
+def test_empty_batch_from_stdin_is_a_usage_error(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO(''))
+    with pytest.raises(SystemExit) as exit_info:
+        validate_github_key.main(['--batch', '-', '--no-cache', '--no-history'])
+    assert exit_info.value.code == 2
@@ -0,0 +1,28 @@
+from validation_cache import ValidationCache
+
+UNWRITABLE = '/proc/nonexistent/cache.sqlite3'
+
+
+def test_round_trip(tmp_path):
+    cache = ValidationCache(str(tmp_path / 'cache.sqlite3'))
+    cache.put('github', 'https://api.github.com', 'ghp_secret', {'valid': True})
+    result = cache.get('github', 'https://api.github.com', 'ghp_secret')
+    assert result['valid'] and result['cached']
+    assert cache.get('github', 'https://api.github.com', 'ghp_other') is None
+    cache.clear()
+    assert cache.get('github', 'https://api.github.com', 'ghp_secret') is None
+
+
+def test_secret_is_not_stored(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    ValidationCache(str(path)).put('github', 'https://api.github.com', 'ghp_secret', {'valid': True})
+    assert b'ghp_secret' not in path.read_bytes()
+
+
+def test_unwritable_path_disables_the_cache(capsys):
+    cache = ValidationCache(UNWRITABLE)
+    cache.clear()
+    assert cache.get('github', 'https://api.github.com', 'ghp_secret') is None
+    cache.put('github', 'https://api.github.com', 'ghp_secret', {'valid': True})
+    assert cache.disabled
+    assert capsys.readouterr().err.count('[WARNING] Validation cache disabled') == 1
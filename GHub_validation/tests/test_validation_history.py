@@ -0,0 +1,37 @@
+import json
+
+import validation_history
+
+SERVICE = 'github'
+URL = 'https://api.github.com'
+
+
+def result(valid=True, elapsed_ms=120.0):
+    return {'valid': valid, 'status': 200 if valid else 401, 'elapsed_ms': elapsed_ms,
+            'rate_limit': {'remaining': 4999, 'limit': 5000}, 'scopes': ['repo']}
+
+
+def test_recorded_runs_are_written_on_flush(tmp_path):
+    history = validation_history.ValidationHistory(str(tmp_path / 'history.sqlite3'), batch_size=10)
+    history.record(SERVICE, URL, 'secret-1', result())
+    history.record(SERVICE, URL, 'secret-2', result(valid=False))
+    history.flush()
+    assert history.summary() == {'runs': 2, 'credentials': 2}
+    assert b'secret-1' not in (tmp_path / 'history.sqlite3').read_bytes()
+
+
+def test_unwritable_history_stops_recording(capsys):
+    history = validation_history.ValidationHistory('/proc/nonexistent/history.sqlite3', batch_size=1)
+    history.record(SERVICE, URL, 'secret', result())
+    history.record(SERVICE, URL, 'secret', result())
+    history.close()
+    assert history.disabled
+    assert capsys.readouterr().err.count('[WARNING] Validation history disabled') == 1
+
+
+def test_query_command_prints_the_summary(tmp_path, capsys):
+    path = str(tmp_path / 'history.sqlite3')
+    with validation_history.ValidationHistory(path) as history:
+        history.record(SERVICE, URL, 'secret', result())
+    assert validation_history.main(['--path', path])
+    assert json.loads(capsys.readouterr().out) == {'runs': 1, 'credentials': 1}
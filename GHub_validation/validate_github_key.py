@@ -1,51 +1,290 @@
 """
 Script to validate GitHub API key configuration.
 """
+import argparse
+import contextlib
+import json
 import sys
-from config import GITHUB_API_KEY, GITHUB_URL, validate_config
-from github import Github
-from github.GithubException import BadCredentialsException, GithubException
+import time
+import config
+import instrumentation
+import resilience
+from config import validate_config
+from rate_limit_scheduler import classify_rate_limit
 
-def validate_github_key():
-    """Validate the GitHub API key by testing authentication."""
-    print("=" * 60)
-    print("GitHub API Key Validation")
-    print("=" * 60)
-    
-    # Step 1: Check if configuration is loaded
-    print("\n[1/3] Checking configuration...")
+# The GitHub SDK, requests and the result cache are imported where they are
+# first needed, so --help and --config-only don't pay for them.
+
+DEFAULT_WORKERS = 32
+REQUEST_TIMEOUT = 10
+CACHE_SERVICE = 'github'
+
+def mask_token(token):
+    """Return a printable form of a token that hides the secret part."""
+    return f"{token[:10]}...{token[-4:] if len(token) > 14 else '****'}"
+
+def token_format_warning(token):
+    """Return a warning if the token doesn't look like a GitHub token, else None."""
+    if token.startswith('glpat-'):
+        return "Token starts with 'glpat-' - this looks like a GitLab token, not a GitHub token"
+    if not (token.startswith('ghp_') or token.startswith('github_pat_') or len(token) > 20):
+        return "Token format doesn't match typical GitHub token patterns"
+    return None
+
+def make_session(pool_size=DEFAULT_WORKERS, http_cache=None):
+    """Return the shared requests session with a keep-alive pool sized for the worker count.
+
+    The session comes from ``clients.session`` and is reused by every caller
+    in the process, so don't close it. With ``http_cache`` repeated GETs are
+    sent as conditional requests and 304 responses are answered from the cache.
+    """
+    import clients
+    return clients.session(pool_size, http_cache)
+
+def read_tokens(stream, default_url=None):
+    """Yield (token, api_url) pairs from lines of 'TOKEN [GITHUB_URL]'."""
+    default_url = default_url or config.GITHUB_URL
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split()
+        url = parts[1] if len(parts) > 1 else default_url
+        yield parts[0], url.rstrip('/')
+
+def check_token(session, token, api_url=None):
+    """Validate one token with a single /user request and return a result dict.
+
+    Transient failures and short rate-limit waits are retried, and hosts
+    that keep failing are skipped by their circuit breaker (see resilience.py).
+    """
+    import requests
+    api_url = api_url or config.GITHUB_URL
+    result = {
+        'token': mask_token(token),
+        'url': api_url,
+        'valid': False,
+    }
+    warning = token_format_warning(token)
+    if warning:
+        result['warning'] = warning
+    start = time.perf_counter()
     try:
-        validate_config()
-        print(f"   [OK] Configuration loaded")
-        print(f"   [OK] GitHub API URL: {GITHUB_URL}")
-        print(f"   [OK] API Key: {GITHUB_API_KEY[:10]}...{GITHUB_API_KEY[-4:] if len(GITHUB_API_KEY) > 14 else '****'}")
-        
-        # Check if the token format looks like a GitHub token
-        if GITHUB_API_KEY.startswith('glpat-'):
-            print(f"   [WARNING] Token starts with 'glpat-' - this looks like a GitLab token, not a GitHub token!")
-            print(f"            GitHub tokens typically start with 'ghp_' or 'github_pat_'.")
-        elif not (GITHUB_API_KEY.startswith('ghp_') or GITHUB_API_KEY.startswith('github_pat_') or len(GITHUB_API_KEY) > 20):
-            print(f"   [WARNING] Token format doesn't match typical GitHub token patterns.")
-            print(f"            GitHub tokens usually start with 'ghp_' or 'github_pat_'.")
+        response = resilience.call(
+            lambda: session.get(
+                f"{api_url.rstrip('/')}/user",
+                headers={
+                    'Authorization': f"token {token}",
+                    'Accept': 'application/vnd.github+json',
+                },
+                timeout=REQUEST_TIMEOUT,
+            ),
+            api_url, idempotent=True, classify_result=resilience.classify_response,
+        )
+    except (requests.RequestException, resilience.CircuitOpenError) as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    result['status'] = response.status_code
+    try:
+        return _read_user_response(response, result)
     except ValueError as e:
-        print(f"   [ERROR] Configuration error: {e}")
-        print("\n   Please ensure:")
-        print("   1. A .env file exists in the project root")
-        print("   2. GITHUB_API_KEY is set in the .env file")
+        # A proxy's HTML page or a malformed header fails this token only
+        result['valid'] = False
+        result['error'] = f"Unexpected response: {type(e).__name__}: {e}"
+        return result
+
+def _read_user_response(response, result):
+    """Fill in ``result`` from a /user response; raises ValueError on a malformed one."""
+    headers = response.headers
+    if 'X-OAuth-Scopes' in headers:
+        result['scopes'] = [s.strip() for s in headers['X-OAuth-Scopes'].split(',') if s.strip()]
+    if 'X-RateLimit-Remaining' in headers:
+        result['rate_limit'] = {
+            'remaining': int(headers['X-RateLimit-Remaining']),
+            'limit': int(headers.get('X-RateLimit-Limit', 0)),
+            'reset': int(headers.get('X-RateLimit-Reset', 0)),
+        }
+    if 'github-authentication-token-expiration' in headers:
+        result['expires_at'] = headers['github-authentication-token-expiration']
+    if response.status_code == 200:
+        user = response.json()
+        if not isinstance(user, dict):
+            raise ValueError(f"expected a JSON object, got {type(user).__name__}")
+        result['valid'] = True
+        for field in ('login', 'id', 'name', 'email', 'public_repos',
+                      'total_private_repos', 'followers'):
+            result[field] = user.get(field)
+    elif response.status_code == 401:
+        result['error'] = 'Authentication failed: Invalid API key'
+    elif response.status_code in (403, 429):
+        kind = classify_rate_limit(response.status_code, headers)
+        if kind == 'primary':
+            result['error'] = 'Rate limit exceeded'
+        elif kind == 'secondary':
+            result['error'] = f"Secondary rate limit, retry after {headers['Retry-After']}s"
+        else:
+            result['error'] = 'Access forbidden: insufficient permissions'
+        result['rate_limited'] = kind is not None
+    else:
+        result['error'] = f"GitHub API error: HTTP {response.status_code}"
+    return result
+
+def make_cache():
+    """Create the validation result cache from configuration."""
+    from validation_cache import ValidationCache
+    return ValidationCache(config.VALIDATION_CACHE_PATH, config.VALIDATION_CACHE_TTL,
+                           config.VALIDATION_CACHE_MAX_ENTRIES)
+
+def make_http_cache():
+    """Create the conditional-request cache from configuration."""
+    from http_cache import HTTPCache
+    return HTTPCache(config.HTTP_CACHE_PATH, config.HTTP_CACHE_MAX_BYTES)
+
+def make_history():
+    """Create the validation history from configuration, or return None when it is turned off."""
+    if not config.VALIDATION_HISTORY_PATH:
+        return None
+    from validation_history import ValidationHistory
+    return ValidationHistory(config.VALIDATION_HISTORY_PATH)
+
+def cached_check_token(session, token, api_url=None, cache=None, refresh=False):
+    """Like check_token(), but serve and store successful results through ``cache``.
+
+    With ``refresh`` the cached entry is ignored and replaced by a live check.
+    """
+    api_url = api_url or config.GITHUB_URL
+    if cache is not None and not refresh:
+        result = cache.get(CACHE_SERVICE, api_url, token)
+        if result is not None:
+            result['token'] = mask_token(token)
+            return result
+    result = check_token(session, token, api_url)
+    if cache is not None and result['valid']:
+        # Even the masked token stays out of the cache file
+        cache.put(CACHE_SERVICE, api_url, token, {k: v for k, v in result.items() if k != 'token'})
+    return result
+
+def validate_tokens_batch(tokens, output=None, workers=DEFAULT_WORKERS, cache=None, refresh=False,
+                          http_cache=None, history=None):
+    """Validate (token, api_url) pairs concurrently, writing one JSON line per token.
+
+    At most ``workers * 2`` tokens are in flight, so arbitrarily long token
+    streams are validated with bounded memory. Each result is also added to
+    ``history`` when given. Returns (valid, total).
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    output = output or sys.stdout
+    session = make_session(workers, http_cache)
+    valid = total = 0
+    tokens = iter(tokens)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # future -> (token, api_url)
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                try:
+                    token, api_url = next(tokens)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = pool.submit(cached_check_token, session, token, api_url, cache, refresh)
+                pending[future] = (token, api_url)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                token, api_url = pending.pop(future)
+                result = future.result()
+                if history is not None:
+                    history.record(CACHE_SERVICE, api_url, token, result, label=result['token'])
+                total += 1
+                valid += result['valid']
+                output.write(json.dumps(result) + '\n')
+            output.flush()
+    return valid, total
+
+def _print_capabilities(repo=None):
+    """Probe the configured token's capabilities and print one line per check."""
+    from scope_probe import CHECKS, probe_tokens, select_checks
+    checks = select_checks(CHECKS, repo=repo)
+    row = next(probe_tokens([(config.GITHUB_API_KEY, config.GITHUB_URL.rstrip('/'))], checks))
+    for check in checks:
+        name, status = check['name'], row['capabilities'][check['name']]
+        if status == 'yes':
+            print(f"   [OK] Capability {name}: granted")
+        elif status == 'empty':
+            print(f"   [OK] Capability {name}: granted (nothing listed)")
+        else:
+            print(f"   [WARNING] Capability {name}: {'not granted' if status == 'no' else status}")
+
+def _validate_fast(result, cache=None, refresh=False, probe=False, http_cache=None):
+    """Run steps [2/3] and [3/3] from the headers of a single /user request, filling in ``result``."""
+    print("\n[2/3] Testing GitHub connection...")
+    instrumentation.step('[2/3] Testing GitHub connection')
+    session = make_session(1, http_cache)
+    result.update(cached_check_token(session, config.GITHUB_API_KEY, config.GITHUB_URL, cache, refresh))
+    if not result['valid']:
+        print(f"   [ERROR] {result['error']}")
+        if result.get('status') == 401:
+            print("\n   Please check:")
+            print("   1. Your API key is correct")
+            print("   2. The API key hasn't expired")
+            print("   3. The API key has the required permissions")
+        elif result.get('rate_limited'):
+            rate_limit = result.get('rate_limit')
+            if rate_limit:
+                print(f"\n   The rate limit resets at {time.strftime('%H:%M:%S', time.localtime(rate_limit['reset']))}.")
         return False
-    
+    if result.get('cached'):
+        print(f"   [OK] Using cached result from {result['cache_age']}s ago (use --refresh to force a live check)")
+    else:
+        print(f"   [OK] Successfully connected to GitHub")
+    print(f"   [OK] Authenticated as: {result['login']} ({result['name'] or 'N/A'})")
+    print(f"   [OK] User ID: {result['id']}")
+    print(f"   [OK] Email: {result['email'] or 'N/A (private)'}")
+    print(f"   [OK] Public Repos: {result['public_repos']}")
+    print(f"   [OK] Followers: {result['followers']}")
+
+    print("\n[3/3] Testing API permissions...")
+    instrumentation.step('[3/3] Testing API permissions')
+    scopes = result.get('scopes')
+    if scopes is None:
+        # Fine-grained tokens and GitHub Apps don't report OAuth scopes
+        print(f"   [OK] Token does not report OAuth scopes (fine-grained token)")
+    elif 'repo' in scopes:
+        print(f"   [OK] Token scopes: {', '.join(scopes)} (repo scope working)")
+    else:
+        print(f"   [WARNING] Token scopes: {', '.join(scopes) or 'none'}")
+        print("   Consider adding: repo, read:user, read:org")
+    if 'rate_limit' in result:
+        rate_limit = result['rate_limit']
+        print(f"   [OK] API rate limit: {rate_limit['remaining']}/{rate_limit['limit']} remaining")
+    if 'expires_at' in result:
+        print(f"   [OK] Token expires: {result['expires_at']}")
+    if probe:
+        _print_capabilities()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] Validation successful! Your GitHub API key is working.")
+    print("=" * 60)
+    return True
+
+def _validate_verbose(result, use_cache=True, probe=False):
+    """Run steps [2/3] and [3/3] through PyGithub (user, repositories and rate limit lookups), filling in ``result``."""
     # Step 2: Test GitHub connection
     print("\n[2/3] Testing GitHub connection...")
+    instrumentation.step('[2/3] Testing GitHub connection')
+    import clients
+    from github.GithubException import BadCredentialsException, GithubException
     try:
-        # Initialize GitHub client (use base_url for GitHub Enterprise)
-        from github import Auth
-        auth = Auth.Token(GITHUB_API_KEY)
-        if GITHUB_URL != 'https://api.github.com':
-            g = Github(base_url=GITHUB_URL, auth=auth)
-        else:
-            g = Github(auth=auth)
+        # Shared client for GITHUB_URL (GitHub.com or GitHub Enterprise)
+        g = clients.github(config.GITHUB_API_KEY, http_cache=make_http_cache() if use_cache else None)
         # Test authentication by getting current user
         user = g.get_user()
+        result.update(valid=True, login=user.login)
         print(f"   [OK] Successfully connected to GitHub")
         print(f"   [OK] Authenticated as: {user.login} ({user.name or 'N/A'})")
         print(f"   [OK] User ID: {user.id}")
@@ -53,6 +292,7 @@ def validate_github_key():
         print(f"   [OK] Public Repos: {user.public_repos}")
         print(f"   [OK] Followers: {user.followers}")
     except BadCredentialsException:
+        result.update(status=401, error='Authentication failed: Invalid API key')
         print(f"   [ERROR] Authentication failed: Invalid API key")
         print("\n   Please check:")
         print("   1. Your API key is correct")
@@ -60,40 +300,49 @@ def validate_github_key():
         print("   3. The API key has the required permissions")
         return False
     except GithubException as e:
+        result.update(status=e.status, error=f"GitHub API error: {e}")
         if e.status == 401:
             print(f"   [ERROR] Authentication failed: {e}")
             return False
-        elif e.status == 403:
-            print(f"   [ERROR] Access forbidden: {e}")
-            print("\n   This might indicate:")
-            print("   1. Rate limit exceeded")
-            print("   2. Insufficient permissions")
+        elif e.status in (403, 429):
+            kind = classify_rate_limit(e.status, e.headers)
+            if kind == 'primary':
+                print(f"   [ERROR] Rate limit exceeded: {e}")
+            elif kind == 'secondary':
+                print(f"   [ERROR] Secondary rate limit hit, retry after {e.headers.get('retry-after')}s: {e}")
+            else:
+                print(f"   [ERROR] Access forbidden: insufficient permissions: {e}")
             return False
         else:
             print(f"   [ERROR] GitHub API error: {e}")
             return False
     except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
         print(f"   [ERROR] Unexpected error: {type(e).__name__}: {e}")
         return False
     
     # Step 3: Test API permissions
     print("\n[3/3] Testing API permissions...")
+    instrumentation.step('[3/3] Testing API permissions')
     try:
         # Try to list repositories (requires repo scope)
-        repos = user.get_repos()
-        repo_count = sum(1 for _ in repos[:5])  # Count first 5
+        next(iter(user.get_repos()), None)  # Fetches the first page
+        if g.oauth_scopes is not None:
+            result['scopes'] = g.oauth_scopes
         print(f"   [OK] Can read repositories (repo scope working)")
         
         # Try to get rate limit info
         try:
             rate_limit = g.get_rate_limit()
             # Handle different versions of PyGithub
-            if hasattr(rate_limit, 'core'):
-                print(f"   [OK] API rate limit: {rate_limit.core.remaining}/{rate_limit.core.limit} remaining")
-            elif hasattr(rate_limit, 'rate'):
-                print(f"   [OK] API rate limit: {rate_limit.rate.remaining}/{rate_limit.rate.limit} remaining")
+            core = getattr(rate_limit, 'core', None) or getattr(rate_limit, 'rate', None)
+            if core is not None:
+                result['rate_limit'] = {'remaining': core.remaining, 'limit': core.limit}
+                print(f"   [OK] API rate limit: {core.remaining}/{core.limit} remaining")
         except Exception:
             pass  # Rate limit info is optional
+        if probe:
+            _print_capabilities()
         
         print("\n" + "=" * 60)
         print("[SUCCESS] Validation successful! Your GitHub API key is working.")
@@ -103,12 +352,126 @@ def validate_github_key():
         print(f"   [WARNING] Permission warning: {e}")
         print("\n   Your API key works but may be missing some permissions.")
         print("   Consider adding: repo, read:user, read:org")
+        print("   Run scope_probe.py (or pass --probe) to see exactly which capabilities are granted.")
         return True  # Still valid, just limited permissions
     except Exception as e:
         print(f"   [WARNING] Warning: {type(e).__name__}: {e}")
         return True  # Connection works, minor issue with permissions test
 
+def validate_github_key(verbose=False, use_cache=True, refresh=False, config_only=False, probe=False,
+                        record_history=True):
+    """Validate the GitHub API key by testing authentication.
+
+    By default steps [2/3] and [3/3] are answered from one /user request,
+    and successful results are cached on disk unless ``use_cache`` is False.
+    Unless ``use_cache`` is False, API responses also go through the
+    conditional-request cache, so unchanged resources cost no rate limit.
+    With ``verbose`` the full PyGithub flow (user, repositories and rate
+    limit lookups) is used instead. ``config_only`` stops after step [1/3].
+    ``probe`` adds the scope_probe capability matrix to step [3/3].
+    Unless ``record_history`` is False, the outcome of steps [2/3] and
+    [3/3] is added to the validation history (see validation_history.py).
+    """
+    print("=" * 60)
+    print("GitHub API Key Validation")
+    print("=" * 60)
+    
+    # Step 1: Check if configuration is loaded
+    print("\n[1/3] Checking configuration...")
+    instrumentation.step('[1/3] Checking configuration')
+    try:
+        validate_config()
+        print(f"   [OK] Configuration loaded")
+        print(f"   [OK] GitHub API URL: {config.GITHUB_URL}")
+        print(f"   [OK] API Key: {mask_token(config.GITHUB_API_KEY)}")
+        
+        # Check if the token format looks like a GitHub token
+        warning = token_format_warning(config.GITHUB_API_KEY)
+        if warning:
+            print(f"   [WARNING] {warning}!")
+            print(f"            GitHub tokens usually start with 'ghp_' or 'github_pat_'.")
+    except ValueError as e:
+        print(f"   [ERROR] Configuration error: {e}")
+        print("\n   Please ensure:")
+        print("   1. A .env file exists in the project root")
+        print("   2. GITHUB_API_KEY is set in the .env file")
+        return False
+    
+    if config_only:
+        print("\n" + "=" * 60)
+        print("[SUCCESS] Configuration check passed (network steps skipped).")
+        print("=" * 60)
+        return True
+    
+    history = make_history() if record_history else None
+    result = {'token': mask_token(config.GITHUB_API_KEY), 'url': config.GITHUB_URL, 'valid': False}
+    start = time.perf_counter()
+    try:
+        if not verbose:
+            return _validate_fast(result, make_cache() if use_cache else None, refresh, probe,
+                                  make_http_cache() if use_cache else None)
+        return _validate_verbose(result, use_cache, probe)
+    finally:
+        if history is not None:
+            result.setdefault('elapsed_ms', round((time.perf_counter() - start) * 1000, 1))
+            history.record(CACHE_SERVICE, config.GITHUB_URL, config.GITHUB_API_KEY, result, label=result['token'])
+            history.close()
+
+def main(argv=None):
+    """Parse command-line arguments and run the requested validation mode."""
+    parser = argparse.ArgumentParser(description="Validate GitHub API key configuration.")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="validate tokens from FILE ('-' for stdin), one 'TOKEN [GITHUB_URL]' per line")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent requests in batch mode (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--verbose', action='store_true',
+                        help="use the full multi-request PyGithub validation flow")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't read or write the validation result and HTTP response caches")
+    parser.add_argument('--no-history', action='store_true',
+                        help="don't add the results to the validation history")
+    parser.add_argument('--refresh', action='store_true',
+                        help="ignore cached results and force a live check")
+    parser.add_argument('--config-only', action='store_true',
+                        help="only check the configuration (step [1/3]) without any network calls")
+    parser.add_argument('--probe', action='store_true',
+                        help="also probe the token's capabilities (org membership, gists, packages, ...) in step [3/3]")
+    parser.add_argument('--json', action='store_true',
+                        help="print a JSON report with per-step and per-request timings (text output goes to stderr)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="append per-step and per-request timing events to FILE as NDJSON")
+    args = parser.parse_args(argv)
+    if args.json or args.trace:
+        instrumentation.enable(args.trace)
+
+    if args.batch:
+        cache = None if args.no_cache else make_cache()
+        http_cache = None if args.no_cache else make_http_cache()
+        history = None if args.no_history else make_history()
+        stream = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+        try:
+            valid, total = validate_tokens_batch(read_tokens(stream), workers=args.workers, cache=cache,
+                                                 refresh=args.refresh, http_cache=http_cache, history=history)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if history is not None:
+                history.close()
+            instrumentation.disable()
+        if not total:
+            parser.error(f"no tokens found in {'stdin' if args.batch == '-' else args.batch}")
+        print(f"{valid}/{total} tokens valid", file=sys.stderr)
+        return valid == total
+    with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+        success = validate_github_key(verbose=args.verbose, use_cache=not args.no_cache, refresh=args.refresh,
+                                      config_only=args.config_only, probe=args.probe,
+                                      record_history=not args.no_history)
+    if args.json:
+        print(json.dumps(instrumentation.recorder.report(tool='validate_github_key', success=success), indent=2))
+    instrumentation.disable()
+    return success
+
 if __name__ == "__main__":
-    success = validate_github_key()
+    success = main()
     sys.exit(0 if success else 1)
 
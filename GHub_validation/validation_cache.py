@@ -0,0 +1,7 @@
+"""
+On-disk cache of credential validation results, shared with the other project.
+
+See shared/validation_cache.py.
+"""
+import shared_modules  # puts shared/ on the import path
+from shared.validation_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, DEFAULT_TTL, ValidationCache
@@ -0,0 +1,307 @@
+"""
+Local stand-in servers for the GitHub and Bluesky endpoints used by the scripts.
+
+Each server can inject latency, errors and rate limits, and counts the
+requests it serves per endpoint. They are used by the benchmark harness
+and can be started on their own for manual testing:
+
+    python benchmarks/mock_servers.py github --port 8080 --latency-ms 50
+    python benchmarks/mock_servers.py bluesky --port 8081 --rate-limit 100
+"""
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+class MockConfig:
+    """Fault injection settings shared by the mock servers."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=None,
+                 rate_limit_window=3600, secondary_every=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate  # fraction of requests answered with a 502
+        self.rate_limit = rate_limit  # requests allowed per window, None for unlimited
+        self.rate_limit_window = rate_limit_window
+        self.secondary_every = secondary_every  # every Nth request hits a secondary limit
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # body waits for the client's delayed ACK of the headers (~40ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        mock = self.server.mock
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        mock.handle(self, self.command, url.path, parse_qs(url.query), body)
+
+    do_GET = do_POST = do_HEAD = _handle
+
+    def send_json(self, status, payload, headers=None):
+        """Send a JSON response with extra headers."""
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+class MockServer:
+    """Threaded HTTP server with latency, error and rate-limit injection."""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockConfig()
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._served = 0
+        self._window_start = time.time()
+        self._window_used = 0
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """Serve requests until stopped."""
+        self._httpd.serve_forever()
+
+    def start(self):
+        """Serve in a background thread and return the base URL."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Shut the server down."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counts(self):
+        """Clear the per-endpoint request counters."""
+        with self._lock:
+            self.counts.clear()
+
+    def _rate_limit_state(self):
+        """Count one request and return (limited, remaining, reset, secondary)."""
+        with self._lock:
+            self._served += 1
+            now = time.time()
+            if now - self._window_start >= self.config.rate_limit_window:
+                self._window_start, self._window_used = now, 0
+            self._window_used += 1
+            reset = int(self._window_start + self.config.rate_limit_window)
+            secondary = bool(self.config.secondary_every) and self._served % self.config.secondary_every == 0
+            if self.config.rate_limit is None:
+                return False, 5000, reset, secondary
+            remaining = max(self.config.rate_limit - self._window_used, 0)
+            return self._window_used > self.config.rate_limit, remaining, reset, secondary
+
+    def handle(self, handler, method, path, query, body):
+        config = self.config
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        with self._lock:
+            self.counts[path] += 1
+        limited, remaining, reset, secondary = self._rate_limit_state()
+        if config.error_rate and random.random() < config.error_rate:
+            handler.send_json(502, {'message': 'Injected server error'})
+            return
+        self.route(handler, method, path, query, body, limited, remaining, reset, secondary)
+
+    def route(self, handler, method, path, query, body, limited, remaining, reset, secondary):
+        raise NotImplementedError
+
+class GitHubMock(MockServer):
+    """Stand-in for the GitHub REST endpoints /user, /user/repos and /rate_limit."""
+
+    REPO_COUNT = 30
+
+    def route(self, handler, method, path, query, body, limited, remaining, reset, secondary):
+        headers = {
+            'X-RateLimit-Limit': self.config.rate_limit or 5000,
+            'X-RateLimit-Remaining': remaining,
+            'X-RateLimit-Reset': reset,
+        }
+        if secondary:
+            handler.send_json(403, {'message': 'You have exceeded a secondary rate limit.'},
+                              {**headers, 'Retry-After': 1})
+            return
+        if limited:
+            handler.send_json(403, {'message': 'API rate limit exceeded'}, headers)
+            return
+        if not handler.headers.get('Authorization'):
+            handler.send_json(401, {'message': 'Requires authentication'}, headers)
+            return
+        headers['X-OAuth-Scopes'] = 'repo, read:org, read:user'
+        headers['github-authentication-token-expiration'] = '2099-01-01 00:00:00 UTC'
+        base = f"http://{handler.headers.get('Host')}"
+        if path == '/user':
+            handler.send_json(200, {
+                'login': 'octocat', 'id': 1, 'name': 'The Octocat', 'email': None,
+                'public_repos': self.REPO_COUNT, 'followers': 10, 'type': 'User',
+                'url': f"{base}/users/octocat",
+            }, headers)
+        elif path == '/user/repos':
+            per_page = int(query.get('per_page', ['30'])[0])
+            handler.send_json(200, [
+                {'id': i, 'name': f"repo-{i}", 'full_name': f"octocat/repo-{i}", 'private': i % 2 == 0,
+                 'html_url': f"https://github.com/octocat/repo-{i}", 'url': f"{base}/repos/octocat/repo-{i}"}
+                for i in range(min(per_page, self.REPO_COUNT))
+            ], headers)
+        elif path == '/rate_limit':
+            core = {'limit': headers['X-RateLimit-Limit'], 'remaining': remaining, 'reset': reset, 'used': 0}
+            handler.send_json(200, {'resources': {'core': core, 'search': core, 'graphql': core}, 'rate': core},
+                              headers)
+        else:
+            handler.send_json(404, {'message': 'Not Found'}, headers)
+
+def _iso(timestamp):
+    """Format a Unix time the way Bluesky does (UTC, milliseconds)."""
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}Z"
+
+def _jwt(scope, ttl):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b'=').decode()
+    now = int(time.time())
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'scope': scope, 'sub': BlueskyMock.DID, 'iat': now, 'exp': now + ttl})}.c2ln"
+
+class BlueskyMock(MockServer):
+    """Stand-in for the Bluesky XRPC endpoints used by the scripts."""
+
+    DID = 'did:plc:mockmockmockmockmockmock'
+    HANDLE = 'mock.bsky.social'
+    PASSWORD = 'mock-mock-mock-mock'
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        super().__init__(config, host, port)
+        # The account's notifications, newest first as listNotifications returns them
+        self.notifications = []
+        self.seen_at = None
+
+    def add_notification(self, reason='mention', text='Mock mention'):
+        """Add a notification for the account, indexed now, and return it."""
+        now = time.time()
+        with self._lock:
+            notification = {
+                'uri': f"at://did:plc:mockauthor/app.bsky.feed.post/{len(self.notifications)}",
+                'cid': 'bafyreimock',
+                'author': {'did': 'did:plc:mockauthor', 'handle': 'author.bsky.social'},
+                'reason': reason,
+                'record': {'$type': 'app.bsky.feed.post', 'text': text, 'createdAt': _iso(now)},
+                'isRead': False,
+                'indexedAt': _iso(now),
+            }
+            self.notifications.insert(0, notification)
+        return notification
+
+    def _session(self):
+        return {
+            'accessJwt': _jwt('com.atproto.access', 7200),
+            'refreshJwt': _jwt('com.atproto.refresh', 90 * 86400),
+            'handle': self.HANDLE, 'did': self.DID, 'active': True,
+        }
+
+    def _profile(self, actor):
+        return {
+            'did': self.DID, 'handle': actor, 'displayName': 'Mock User',
+            'followersCount': 1, 'followsCount': 2, 'postsCount': 3,
+        }
+
+    def route(self, handler, method, path, query, body, limited, remaining, reset, secondary):
+        nsid = path.rsplit('/', 1)[-1]
+        headers = {
+            'ratelimit-limit': self.config.rate_limit or 3000,
+            'ratelimit-remaining': remaining,
+            'ratelimit-reset': reset,
+            'ratelimit-policy': f"{self.config.rate_limit or 3000};w={self.config.rate_limit_window}",
+        }
+        if limited or secondary:
+            handler.send_json(429, {'error': 'RateLimitExceeded', 'message': 'Rate Limit Exceeded'}, headers)
+            return
+        data = json.loads(body) if body and handler.headers.get('Content-Type', '').startswith('application/json') else {}
+        if nsid == 'com.atproto.server.createSession':
+            if data.get('password') != self.PASSWORD:
+                handler.send_json(401, {'error': 'AuthenticationRequired', 'message': 'Invalid identifier or password'},
+                                  headers)
+                return
+            handler.send_json(200, self._session(), headers)
+        elif nsid == 'com.atproto.server.refreshSession':
+            handler.send_json(200, self._session(), headers)
+        elif nsid == 'com.atproto.server.getSession':
+            handler.send_json(200, {'handle': self.HANDLE, 'did': self.DID}, headers)
+        elif nsid == 'app.bsky.actor.getProfile':
+            handler.send_json(200, self._profile(query.get('actor', [self.HANDLE])[0]), headers)
+        elif nsid == 'app.bsky.feed.getTimeline':
+            limit = int(query.get('limit', ['50'])[0])
+            author = {'did': self.DID, 'handle': self.HANDLE}
+            handler.send_json(200, {'feed': [
+                {'post': {'uri': f"at://{self.DID}/app.bsky.feed.post/{i}", 'cid': 'bafyreimock', 'author': author,
+                          'record': {'$type': 'app.bsky.feed.post', 'text': f"Mock post {i}",
+                                     'createdAt': '2024-01-01T00:00:00.000Z'},
+                          'indexedAt': '2024-01-01T00:00:00.000Z'}}
+                for i in range(limit)
+            ], 'cursor': 'next'}, headers)
+        elif nsid == 'app.bsky.notification.listNotifications':
+            limit = int(query.get('limit', ['50'])[0])
+            start = int(query.get('cursor', ['0'])[0])
+            with self._lock:
+                page = self.notifications[start:start + limit]
+                more = start + limit < len(self.notifications)
+            payload = {'notifications': page, 'seenAt': self.seen_at}
+            if more:
+                payload['cursor'] = str(start + limit)
+            handler.send_json(200, payload, headers)
+        elif nsid == 'app.bsky.notification.updateSeen':
+            self.seen_at = data.get('seenAt')
+            handler.send_json(200, {}, headers)
+        elif nsid == 'com.atproto.repo.createRecord':
+            handler.send_json(200, {'uri': f"at://{self.DID}/{data.get('collection')}/mock",
+                                    'cid': 'bafyreimock'}, headers)
+        else:
+            handler.send_json(501, {'error': 'MethodNotImplemented', 'message': f"{nsid} is not mocked"}, headers)
+
+SERVERS = {'github': GitHubMock, 'bluesky': BlueskyMock}
+
+def main(argv=None):
+    """Run one mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Run a local GitHub or Bluesky stand-in server.")
+    parser.add_argument('service', choices=sorted(SERVERS))
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=None, help="requests allowed per window")
+    parser.add_argument('--rate-limit-window', type=int, default=3600, help="window length in seconds")
+    parser.add_argument('--secondary-every', type=int, default=0, help="every Nth request hits a secondary limit")
+    args = parser.parse_args(argv)
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit,
+                        args.rate_limit_window, args.secondary_every)
+    server = SERVERS[args.service](config, port=args.port)
+    print(f"{args.service} mock listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
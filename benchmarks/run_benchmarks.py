@@ -0,0 +1,138 @@
+"""
+Offline benchmark harness for the validation and publishing scripts.
+
+Each scenario runs against a local stand-in server (see mock_servers.py)
+and reports requests per operation, p50/p99 latency and throughput under
+concurrency. Results can be saved as a baseline and later runs are compared
+against it:
+
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --latency-ms 50 --concurrency 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from mock_servers import BlueskyMock, GitHubMock, MockConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker.py')
+
+# scenario name -> (mock server class, project directory)
+SCENARIOS = {
+    'github_fast': (GitHubMock, 'GHub_validation'),
+    'github_verbose': (GitHubMock, 'GHub_validation'),
+    'bluesky_login': (BlueskyMock, 'BSKY_validation'),
+    'bluesky_session': (BlueskyMock, 'BSKY_validation'),
+    'bluesky_publish': (BlueskyMock, 'BSKY_validation'),
+}
+
+# Relative p50 slowdown (or any increase in requests per operation) that counts as a regression
+REGRESSION_THRESHOLD = 0.20
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def run_scenario(name, config, iterations, concurrency, workdir):
+    """Run one scenario against a fresh mock server and return its metrics."""
+    server_class, project = SCENARIOS[name]
+    server = server_class(config)
+    url = server.start()
+    env = {
+        **os.environ,
+        'GITHUB_URL': url,
+        'GITHUB_API_KEY': 'ghp_' + 'b' * 36,
+        'GITHUB_API_KEYS': '',
+        'BLUESKY_SERVICE': url,
+        'BLUESKY_HANDLE': BlueskyMock.HANDLE,
+        'BLUESKY_PASSWORD': BlueskyMock.PASSWORD,
+        'BLUESKY_SESSION_PATH': os.path.join(workdir, f"{name}-sessions.json"),
+        'VALIDATION_CACHE_PATH': os.path.join(workdir, f"{name}-cache.sqlite3"),
+        'VALIDATION_HISTORY_PATH': os.path.join(workdir, f"{name}-history.sqlite3"),
+    }
+    try:
+        result = subprocess.run(
+            [sys.executable, WORKER, name, str(iterations), str(concurrency)],
+            cwd=os.path.join(ROOT, project), env=env, capture_output=True, text=True, check=True,
+        )
+    finally:
+        server.stop()
+    data = json.loads(result.stdout)
+    latencies = data['latencies_ms']
+    # The worker makes one warm-up call before the measured ones
+    requests = sum(server.counts.values())
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'failures': data['failures'],
+        'requests_per_op': round(requests / (iterations + 1), 2),
+        'endpoints': dict(server.counts),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'throughput_ops': round(iterations / data['wall_s'], 2),
+    }
+
+def compare(name, result, baseline):
+    """Print the change against a baseline result; return False on regression."""
+    if not baseline:
+        return True
+    ok = True
+    notes = []
+    if result['requests_per_op'] > baseline['requests_per_op']:
+        notes.append(f"requests/op {baseline['requests_per_op']} -> {result['requests_per_op']}")
+        ok = False
+    change = (result['p50_ms'] - baseline['p50_ms']) / baseline['p50_ms'] if baseline['p50_ms'] else 0
+    notes.append(f"p50 {change:+.0%} vs baseline")
+    if change > REGRESSION_THRESHOLD:
+        ok = False
+    print(f"  {'OK' if ok else 'REGRESSION'}: {', '.join(notes)}")
+    return ok
+
+def main(argv=None):
+    """Run the selected scenarios and compare or save the baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark the scripts against local stand-in servers.")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="injected server latency")
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with a 502")
+    parser.add_argument('--rate-limit', type=int, default=None, help="requests allowed per rate-limit window")
+    parser.add_argument('--secondary-every', type=int, default=0, help="every Nth request hits a secondary limit")
+    parser.add_argument('--save-baseline', action='store_true', help=f"store results in {BASELINE_PATH}")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit,
+                        secondary_every=args.secondary_every)
+    baseline = {}
+    if os.path.exists(BASELINE_PATH) and not args.save_baseline:
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.scenario or SCENARIOS:
+            result = run_scenario(name, config, args.iterations, args.concurrency, workdir)
+            results[name] = result
+            print(f"{name:<16} {result['requests_per_op']:>5} req/op  p50 {result['p50_ms']:8.2f}ms  "
+                  f"p99 {result['p99_ms']:8.2f}ms  {result['throughput_ops']:8.2f} ops/s  "
+                  f"failures {result['failures']}")
+            ok = compare(name, result, baseline.get(name)) and ok
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Baseline saved to {BASELINE_PATH}")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,88 @@
+"""
+Startup-time benchmark for the validation entry points.
+
+Runs the cheap paths (--help and --config-only) of each CLI in fresh
+interpreters, reports median wall time and fails if a run exceeds the time
+budget or imports a network SDK it shouldn't need.
+
+    python benchmarks/startup.py --runs 20 --budget-ms 200
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (project directory, script arguments) for each path that must stay cheap
+CASES = [
+    ('GHub_validation', ['validate_github_key.py', '--help']),
+    ('GHub_validation', ['validate_github_key.py', '--config-only']),
+    ('BSKY_validation', ['validate_bluesky_key.py', '--help']),
+    ('BSKY_validation', ['validate_bluesky_key.py', '--config-only']),
+    ('BSKY_validation', ['publish_post.py', '--help']),
+]
+
+# Modules whose import means the cheap path is paying for network support
+FORBIDDEN_MODULES = ('github', 'atproto', 'atproto_client', 'httpx', 'requests', 'urllib3')
+
+# Dummy credentials so --config-only passes without a .env file
+DUMMY_ENV = {
+    'GITHUB_API_KEY': 'ghp_' + 'x' * 36,
+    'BLUESKY_PASSWORD': 'xxxx-xxxx-xxxx-xxxx',
+}
+
+def imported_modules(project, args, env):
+    """Return the top-level module names imported by one run."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=os.path.join(ROOT, project), env=env, capture_output=True, text=True,
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip()
+            modules.add(name.split('.')[0])
+    return modules
+
+def time_runs(project, args, env, runs):
+    """Return wall times in milliseconds for ``runs`` fresh-interpreter runs."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args], cwd=os.path.join(ROOT, project), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def main(argv=None):
+    """Run every case and return True if all stayed within budget."""
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time.")
+    parser.add_argument('--runs', type=int, default=10, help="runs per case (default: 10)")
+    parser.add_argument('--budget-ms', type=float, default=250.0,
+                        help="fail if a case's median exceeds this many milliseconds (default: 250)")
+    args = parser.parse_args(argv)
+
+    env = {**DUMMY_ENV, **os.environ}
+    ok = True
+    for project, case in CASES:
+        label = f"{project}/{' '.join(case)}"
+        leaked = sorted(imported_modules(project, case, env) & set(FORBIDDEN_MODULES))
+        times = time_runs(project, case, env, args.runs)
+        median = statistics.median(times)
+        status = 'OK'
+        if leaked:
+            status = f"FAIL (imports {', '.join(leaked)})"
+            ok = False
+        elif median > args.budget_ms:
+            status = f"FAIL (over {args.budget_ms:.0f}ms budget)"
+            ok = False
+        print(f"{label:<55} median {median:7.1f}ms  min {min(times):7.1f}ms  {status}")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,55 @@
+"""
+Benchmark worker: runs one scenario repeatedly inside a project directory.
+
+Started by run_benchmarks.py with the project directory as the working
+directory, so the scripts' own ``config`` module is imported. The SDKs are
+imported once, then the target function runs ITERATIONS times across
+CONCURRENCY threads. Timings are printed as JSON on stdout.
+"""
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# scenario name -> (module, function, keyword arguments)
+SCENARIOS = {
+    'github_fast': ('validate_github_key', 'validate_github_key', {'use_cache': False}),
+    'github_verbose': ('validate_github_key', 'validate_github_key', {'verbose': True, 'use_cache': False}),
+    'bluesky_login': ('validate_bluesky_key', 'validate_bluesky_key', {'use_cache': False, 'use_session': False}),
+    'bluesky_session': ('validate_bluesky_key', 'validate_bluesky_key', {'use_cache': False}),
+    'bluesky_publish': ('publish_post', 'publish_post', {}),
+}
+
+def main():
+    scenario, iterations, concurrency = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    sys.path.insert(0, os.getcwd())
+    module_name, function_name, kwargs = SCENARIOS[scenario]
+    target = getattr(importlib.import_module(module_name), function_name)
+
+    def run_once(_):
+        start = time.perf_counter()
+        try:
+            ok = target(**kwargs)
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    # The scripts print progress; keep it out of the JSON result
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_once(None)  # warm-up: first-call imports and session setup
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(run_once, range(iterations)))
+        wall = time.perf_counter() - start
+    json.dump({
+        'latencies_ms': [latency for latency, _ in results],
+        'failures': sum(1 for _, ok in results if not ok),
+        'wall_s': wall,
+    }, sys.stdout)
+
+if __name__ == "__main__":
+    main()
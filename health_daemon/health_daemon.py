@@ -0,0 +1,325 @@
+"""
+Long-running health checks for the GitHub and Bluesky credentials.
+
+Instead of starting a fresh validation process from cron, this daemon keeps
+one warm async HTTP client per service and re-checks every configured
+credential on a schedule with jitter. GitHub tokens are checked with a
+single ``/user`` request; the Bluesky session is created once and then
+verified with ``getSession``, refreshing or logging in again only when the
+tokens expire. Results and latency histograms are served in the Prometheus
+text format on a local HTTP endpoint:
+
+    python health_daemon/health_daemon.py --interval 300 --port 9464
+    curl http://127.0.0.1:9464/metrics
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import signal
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Check latency buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def load_project_config(project):
+    """Import a project's config.py under a unique module name."""
+    path = os.path.join(ROOT, project, 'config.py')
+    spec = importlib.util.spec_from_file_location(f"{project.lower()}_config", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def mask_token(token):
+    """Return a printable form of a token that hides the secret part."""
+    return f"{token[:10]}...{token[-4:] if len(token) > 14 else '****'}"
+
+class Histogram:
+    """Cumulative latency histogram per label set, rendered in Prometheus format."""
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., count, sum]
+
+    def observe(self, labels, value):
+        series = self._series.setdefault(labels, [0] * (len(self.buckets) + 2))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            label_text = _labels(labels)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_count{{{label_text}}} {series[-2]}")
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]:.6f}")
+        return lines
+
+def _labels(labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels)
+
+class Metrics:
+    """Latest check results and counters for every credential."""
+
+    def __init__(self):
+        self.latency = Histogram('credential_check_duration_seconds', "Duration of credential checks.")
+        self.results = {}  # labels -> latest result dict
+        self.totals = {}  # labels + result -> count
+
+    def record(self, service, credential, ok, duration, error=None, **gauges):
+        labels = (('service', service), ('credential', credential))
+        self.latency.observe(labels, duration)
+        outcome = labels + (('result', 'ok' if ok else 'error'),)
+        self.totals[outcome] = self.totals.get(outcome, 0) + 1
+        previous = self.results.get(labels, {})
+        self.results[labels] = {
+            'up': int(ok),
+            'last_check': time.time(),
+            'last_success': time.time() if ok else previous.get('last_success', 0),
+            'error': error,
+            **gauges,
+        }
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP credential_up Whether the last check of a credential succeeded.",
+            "# TYPE credential_up gauge",
+        ]
+        lines += [f"credential_up{{{_labels(labels)}}} {result['up']}" for labels, result in sorted(self.results.items())]
+        lines += [
+            "# HELP credential_last_check_timestamp_seconds Time of the last check.",
+            "# TYPE credential_last_check_timestamp_seconds gauge",
+        ]
+        lines += [f"credential_last_check_timestamp_seconds{{{_labels(labels)}}} {result['last_check']:.3f}"
+                  for labels, result in sorted(self.results.items())]
+        lines += [
+            "# HELP credential_last_success_timestamp_seconds Time of the last successful check.",
+            "# TYPE credential_last_success_timestamp_seconds gauge",
+        ]
+        lines += [f"credential_last_success_timestamp_seconds{{{_labels(labels)}}} {result['last_success']:.3f}"
+                  for labels, result in sorted(self.results.items())]
+        lines += [
+            "# HELP credential_rate_limit_remaining Requests left in the current rate-limit window.",
+            "# TYPE credential_rate_limit_remaining gauge",
+        ]
+        lines += [f"credential_rate_limit_remaining{{{_labels(labels)}}} {result['rate_limit_remaining']}"
+                  for labels, result in sorted(self.results.items())
+                  if result.get('rate_limit_remaining') is not None]
+        lines += [
+            "# HELP credential_checks_total Credential checks by result.",
+            "# TYPE credential_checks_total counter",
+        ]
+        lines += [f"credential_checks_total{{{_labels(labels)}}} {count}" for labels, count in sorted(self.totals.items())]
+        lines += self.latency.render()
+        return '\n'.join(lines) + '\n'
+
+class GitHubChecker:
+    """Checks one GitHub token with a single /user request."""
+
+    service = 'github'
+
+    def __init__(self, client, api_url, token):
+        self.client = client
+        self.api_url = api_url.rstrip('/')
+        self.token = token
+        self.credential = mask_token(token)
+
+    async def check(self):
+        """Return (ok, error, gauges)."""
+        response = await self.client.get(
+            f"{self.api_url}/user",
+            headers={'Authorization': f"token {self.token}", 'Accept': 'application/vnd.github+json'},
+        )
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        gauges = {'rate_limit_remaining': int(remaining) if remaining is not None else None}
+        if response.status_code != 200:
+            return False, f"HTTP {response.status_code}", gauges
+        return True, None, gauges
+
+class BlueskyChecker:
+    """Keeps one Bluesky session alive and checks it with getSession."""
+
+    service = 'bluesky'
+
+    def __init__(self, client, service_url, handle, password):
+        self.client = client
+        self.xrpc = f"{service_url.rstrip('/')}/xrpc"
+        self.handle = handle
+        self.password = password
+        self.credential = handle
+        self.access_jwt = self.refresh_jwt = None
+
+    async def _post(self, nsid, token=None, json=None):
+        headers = {'Authorization': f"Bearer {token}"} if token else {}
+        return await self.client.post(f"{self.xrpc}/{nsid}", headers=headers, json=json)
+
+    def _store(self, response):
+        data = response.json()
+        self.access_jwt, self.refresh_jwt = data['accessJwt'], data['refreshJwt']
+
+    async def check(self):
+        """Return (ok, error, gauges), logging in only when the session is gone."""
+        response = None
+        if self.access_jwt:
+            response = await self.client.get(
+                f"{self.xrpc}/com.atproto.server.getSession",
+                headers={'Authorization': f"Bearer {self.access_jwt}"},
+            )
+            if response.status_code in (400, 401):
+                # Expired access token: try the refresh token before a full login
+                response = await self._post('com.atproto.server.refreshSession', self.refresh_jwt)
+                if response.status_code == 200:
+                    self._store(response)
+        if response is None or response.status_code in (400, 401):
+            response = await self._post('com.atproto.server.createSession',
+                                        json={'identifier': self.handle, 'password': self.password})
+            if response.status_code == 200:
+                self._store(response)
+        remaining = response.headers.get('ratelimit-remaining')
+        gauges = {'rate_limit_remaining': int(remaining) if remaining is not None else None}
+        if response.status_code != 200:
+            return False, f"HTTP {response.status_code}", gauges
+        return True, None, gauges
+
+async def check_once(checker, metrics):
+    """Run one check, record it and return whether it succeeded."""
+    start = time.perf_counter()
+    try:
+        ok, error, gauges = await checker.check()
+    except Exception as e:
+        ok, error, gauges = False, f"{type(e).__name__}: {e}", {}
+    duration = time.perf_counter() - start
+    metrics.record(checker.service, checker.credential, ok, duration, error, **gauges)
+    status = '[OK]' if ok else f"[ERROR] {error}"
+    print(f"   {status} {checker.service} {checker.credential} ({duration * 1000:.0f}ms)", file=sys.stderr, flush=True)
+    return ok
+
+async def run_checker(checker, metrics, interval, jitter, stop):
+    """Check one credential every ``interval`` seconds (+/- ``jitter``) until stopped."""
+    # Spread the first checks so all credentials don't fire at once
+    delay = random.uniform(0, jitter)
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+            return
+        except asyncio.TimeoutError:
+            pass
+        await check_once(checker, metrics)
+        delay = max(1.0, interval + random.uniform(-jitter, jitter))
+
+async def serve_metrics(metrics, host, port):
+    """Serve /metrics (Prometheus text format) and /healthz."""
+    async def handle(reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+            if path == '/metrics':
+                status, body = '200 OK', metrics.render()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/healthz':
+                status, body, content_type = '200 OK', 'ok\n', 'text/plain'
+            else:
+                status, body, content_type = '404 Not Found', 'not found\n', 'text/plain'
+            data = body.encode('utf-8')
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, host, port)
+
+def build_checkers(services, github_client, bluesky_client):
+    """Create a checker for every configured credential of the selected services."""
+    checkers = []
+    if 'github' in services:
+        github = load_project_config('GHub_validation')
+        github.load()
+        tokens = list(dict.fromkeys(([github.GITHUB_API_KEY] if github.GITHUB_API_KEY else []) + github.GITHUB_API_KEYS))
+        if not tokens:
+            print("   [WARNING] No GitHub tokens configured - skipping GitHub checks", file=sys.stderr)
+        checkers += [GitHubChecker(github_client, github.GITHUB_URL, token) for token in tokens]
+    if 'bluesky' in services:
+        bluesky = load_project_config('BSKY_validation')
+        try:
+            bluesky.validate_config()
+            checkers.append(BlueskyChecker(bluesky_client, bluesky.BLUESKY_SERVICE,
+                                           bluesky.BLUESKY_HANDLE, bluesky.BLUESKY_PASSWORD))
+        except ValueError as e:
+            print(f"   [WARNING] Skipping Bluesky checks: {e}", file=sys.stderr)
+    return checkers
+
+async def run(args):
+    """Start the checkers and the metrics server; return False if nothing can be checked."""
+    import httpx
+
+    metrics = Metrics()
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_keepalive_connections=args.max_connections, max_connections=args.max_connections)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as github_client, \
+            httpx.AsyncClient(timeout=args.timeout, limits=limits) as bluesky_client:
+        checkers = build_checkers(args.services, github_client, bluesky_client)
+        if not checkers:
+            print("[ERROR] No credentials to check", file=sys.stderr)
+            return False
+        if args.once:
+            # Check everything concurrently right away, print the metrics and exit
+            results = await asyncio.gather(*(check_once(checker, metrics) for checker in checkers))
+            print(metrics.render(), end='')
+            return all(results)
+        server = await serve_metrics(metrics, args.host, args.port)
+        print(f"Checking {len(checkers)} credential(s) every {args.interval}s (+/- {args.jitter}s); "
+              f"metrics on http://{args.host}:{args.port}/metrics", file=sys.stderr, flush=True)
+        tasks = [asyncio.create_task(run_checker(checker, metrics, args.interval, args.jitter, stop))
+                 for checker in checkers]
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        except NotImplementedError:
+            pass  # Windows
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+    return True
+
+def main(argv=None):
+    """Parse command-line arguments and run the daemon."""
+    parser = argparse.ArgumentParser(description="Continuously check GitHub and Bluesky credentials and export metrics.")
+    parser.add_argument('--services', type=lambda value: value.split(','), default=['github', 'bluesky'],
+                        help="comma-separated services to check (default: github,bluesky)")
+    parser.add_argument('--interval', type=float, default=300.0, help="seconds between checks (default: 300)")
+    parser.add_argument('--jitter', type=float, default=30.0,
+                        help="random +/- seconds added to each interval (default: 30)")
+    parser.add_argument('--host', default='127.0.0.1', help="metrics listen address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=9464, help="metrics port (default: 9464)")
+    parser.add_argument('--timeout', type=float, default=10.0, help="HTTP timeout in seconds")
+    parser.add_argument('--max-connections', type=int, default=10, help="pooled connections per service")
+    parser.add_argument('--once', action='store_true', help="check every credential once, print the metrics and exit")
+    args = parser.parse_args(argv)
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
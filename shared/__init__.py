@@ -0,0 +1,6 @@
+"""
+Modules used by both GHub_validation and BSKY_validation.
+
+Each project runs from its own directory, so its scripts don't see this
+package directly; they import it through the project's shared_modules.py.
+"""
@@ -0,0 +1,167 @@
+"""
+Retry loop, backoff, request hedging and circuit breaking for API calls.
+
+Failures are classified by kind (see the constants below) by a
+project-specific ``classify`` function; ``call()`` retries with
+exponential backoff and full jitter, optionally hedges idempotent
+requests, and keeps a circuit breaker per host, so a degraded endpoint
+fails fast instead of tying up every check in timeouts. Settings are read
+from the importing project's config module.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import config
+
+AUTH = 'auth'
+RATE_LIMITED = 'rate-limited'
+UNREACHABLE = 'unreachable'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# Kinds retried for idempotent and for non-idempotent calls
+RETRYABLE = {
+    True: (RATE_LIMITED, UNREACHABLE, TRANSIENT),
+    False: (RATE_LIMITED, UNREACHABLE),
+}
+# Kinds that count against a host's circuit breaker
+HOST_FAILURES = (UNREACHABLE, TRANSIENT)
+BASE_DELAY = 0.5
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit open for {host} after repeated failures, retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=None):
+    """Return the delay before retry number ``attempt`` (0-based): exponential with full jitter."""
+    cap = config.RETRY_MAX_DELAY if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class CircuitBreaker:
+    """Opens after consecutive host failures and lets one trial call through after a cooldown."""
+
+    def __init__(self, host, threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    @property
+    def state(self):
+        """Return 'closed', 'open' or 'half-open'."""
+        if self.opened_at is None:
+            return 'closed'
+        return 'open' if self._clock() - self.opened_at < self.cooldown else 'half-open'
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call to the host may go ahead."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial:
+                # Let a single trial call probe whether the host recovered
+                self._trial = True
+                return
+            retry_in = max(self.cooldown - (self._clock() - self.opened_at), 0)
+            raise CircuitOpenError(self.host, retry_in)
+
+    def record(self, failed):
+        """Record the outcome of a call; ``failed`` means the host looked down."""
+        with self._lock:
+            self._trial = False
+            if not failed:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                # Open, or stay open for another cooldown after a failed trial
+                self.opened_at = self._clock()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker(url):
+    """Return the process-wide circuit breaker for the host of ``url``."""
+    host = urlsplit(url).netloc or url
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host, config.CIRCUIT_BREAKER_THRESHOLD,
+                                             config.CIRCUIT_BREAKER_COOLDOWN)
+        return _breakers[host]
+
+def hedged(func, delay):
+    """Run ``func()``, starting a second identical call if the first takes longer than ``delay``.
+
+    The first call to succeed wins; the other is left to finish in the
+    background. Only use this for idempotent requests.
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = [pool.submit(func)]
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            futures.append(pool.submit(func))
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None or not futures:
+                    return future.result()
+    finally:
+        pool.shutdown(wait=False)
+
+def call(func, url=None, idempotent=False, classify_result=None, attempts=None, max_delay=None,
+         hedge_after=None, sleep=time.sleep, *, classify):
+    """Call ``func()`` with retries, returning its result or raising its last error.
+
+    Failures are classified with ``classify(error)``, which returns (kind,
+    retry_after); ``classify_result`` may also mark a returned value (such
+    as a 5xx response) as a failure, in which case the last value is
+    returned once retries run out. Calls are treated as non-idempotent
+    unless ``idempotent`` is set: only idempotent calls are retried after
+    ``transient`` failures or hedged (after ``hedge_after`` seconds). A
+    ``Retry-After`` longer than ``max_delay`` isn't waited for. With
+    ``url`` the host's circuit breaker is consulted and updated.
+    """
+    attempts = config.RETRY_ATTEMPTS if attempts is None else attempts
+    max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+    if hedge_after is None and idempotent:
+        hedge_after = config.HEDGE_AFTER
+    circuit = breaker(url) if url else None
+    for attempt in range(max(attempts, 1)):
+        if circuit is not None:
+            circuit.before_call()
+        error = None
+        try:
+            result = hedged(func, hedge_after) if hedge_after and idempotent else func()
+        except Exception as e:
+            error = e
+            kind, retry_after = classify(e)
+        else:
+            failure = classify_result(result) if classify_result else None
+            if failure is None:
+                if circuit is not None:
+                    circuit.record(False)
+                return result
+            kind, retry_after = failure
+        if circuit is not None:
+            circuit.record(kind in HOST_FAILURES)
+        delay = backoff_delay(attempt, cap=max_delay) if retry_after is None else retry_after
+        if kind not in RETRYABLE[idempotent] or attempt == attempts - 1 or delay > max_delay:
+            break
+        sleep(delay)
+    if error is not None:
+        raise error
+    return result
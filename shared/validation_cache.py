@@ -0,0 +1,130 @@
+"""
+On-disk cache of credential validation results.
+
+Entries are keyed by an HMAC of the credential using a random per-cache salt,
+so the secret itself is never written to disk. The cache is a SQLite file in
+WAL mode, which gives safe concurrent access from parallel processes; each
+thread keeps its own connection. If the file can't be used the cache warns
+once and then acts as if it were empty, so validation still works.
+"""
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'cache.sqlite3')
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1000
+
+class ValidationCache:
+    """TTL-bounded, size-bounded store of validation results."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disabled = False
+        self._salt = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        """Return this thread's connection, creating the file and tables on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        # Readers don't block the writer, so batch workers rarely wait on each other
+        conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock:
+            if not self._schema_ready:
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS entries ("
+                        " key TEXT PRIMARY KEY, result TEXT NOT NULL,"
+                        " created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created_at)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL)")
+                self._schema_ready = True
+        self._local.conn = conn
+        return conn
+
+    def _disable(self, error):
+        """Turn the cache into a no-op after an error, warning once."""
+        if not self.disabled:
+            self.disabled = True
+            print(f"[WARNING] Validation cache disabled ({self.path}): {type(error).__name__}: {error}",
+                  file=sys.stderr)
+
+    def _get_salt(self, conn):
+        if self._salt is None:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('salt', ?)", (os.urandom(32),))
+            self._salt = conn.execute("SELECT value FROM meta WHERE name = 'salt'").fetchone()[0]
+        return self._salt
+
+    def _key(self, conn, service, url, secret):
+        message = '\0'.join((service, url, secret)).encode('utf-8')
+        return hmac.new(self._get_salt(conn), message, hashlib.sha256).hexdigest()
+
+    def get(self, service, url, secret):
+        """Return the cached result for a credential, or None if missing or expired."""
+        if self.disabled:
+            return None
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT result, created_at FROM entries WHERE key = ? AND expires_at > ?",
+                (self._key(conn, service, url, secret), time.time()),
+            ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        result['cached'] = True
+        result['cache_age'] = round(time.time() - row[1], 1)
+        return result
+
+    def put(self, service, url, secret, result):
+        """Store a result for a credential and evict expired and surplus entries."""
+        if self.disabled:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            key = self._key(conn, service, url, secret)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, result, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(result), now, now + self.ttl),
+                )
+                conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM entries WHERE key NOT IN"
+                    " (SELECT key FROM entries ORDER BY created_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def clear(self):
+        """Remove all cached results."""
+        if self.disabled:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entries")
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
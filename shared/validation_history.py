@@ -0,0 +1,320 @@
+"""
+Append-only history of credential validation results.
+
+Every validation run adds one row to ``runs`` with its time, outcome,
+latency and remaining rate limit. Credentials are stored once in
+``credentials``, keyed by an HMAC of the secret using a random per-file
+salt (so the secret itself is never written), together with their label,
+latest scopes and expiry. Rows are buffered and written in batches, each in
+a single transaction.
+
+The same transactions keep hourly aggregates: per credential (runs,
+failures, lowest remaining rate limit) and per host (a latency histogram
+with buckets about 5% wide). Trend, percentile and expiry queries read only
+these small indexed tables, so they stay fast however many runs are stored.
+If the file can't be written the history warns once and stops recording,
+so validation still works.
+
+Both validators write to the same history file. Run a project's
+validation_history.py to query it.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'credential-validation', 'history.sqlite3')
+# Rows are written once this many are buffered, or when the oldest buffered
+# row is this many seconds old
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 5.0
+# Latency histogram buckets grow by this factor, bounding percentile error
+LATENCY_GROWTH = 1.05
+HOUR = 3600
+DAY = 24 * HOUR
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS credentials ("
+    " id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, service TEXT NOT NULL, host TEXT NOT NULL,"
+    " label TEXT, scopes TEXT, expires_at REAL, last_valid INTEGER, first_seen REAL NOT NULL,"
+    " last_seen REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS credentials_expires ON credentials (expires_at) WHERE expires_at IS NOT NULL",
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " credential INTEGER NOT NULL, ts REAL NOT NULL, valid INTEGER NOT NULL, cached INTEGER NOT NULL,"
+    " status INTEGER, elapsed_ms REAL, rate_remaining INTEGER, rate_limit INTEGER, error TEXT)",
+    "CREATE TABLE IF NOT EXISTS hourly ("
+    " credential INTEGER NOT NULL, hour INTEGER NOT NULL, runs INTEGER NOT NULL, failures INTEGER NOT NULL,"
+    " min_remaining INTEGER, rate_limit INTEGER, PRIMARY KEY (hour, credential)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS latency ("
+    " service TEXT NOT NULL, host TEXT NOT NULL, hour INTEGER NOT NULL, bucket INTEGER NOT NULL,"
+    " count INTEGER NOT NULL, PRIMARY KEY (hour, service, host, bucket)) WITHOUT ROWID",
+)
+
+def _epoch(value):
+    """Return a timestamp (epoch seconds, ISO 8601 or GitHub's expiry header format) as epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    for parse in (lambda v: datetime.fromisoformat(v.replace('Z', '+00:00')),
+                  lambda v: datetime.strptime(v.replace('UTC', '+0000'), '%Y-%m-%d %H:%M:%S %z')):
+        try:
+            return parse(value.strip()).timestamp()
+        except ValueError:
+            continue
+    return None
+
+def _bucket(elapsed_ms):
+    return int(math.log(max(elapsed_ms, 1.0)) / math.log(LATENCY_GROWTH))
+
+def _bucket_ms(bucket):
+    return round(LATENCY_GROWTH ** (bucket + 0.5), 1)
+
+class ValidationHistory:
+    """Batched, append-only store of validation results with trend queries."""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._salt = None
+        self._pending = []
+        self._pending_since = None
+        self._lock = threading.Lock()
+        self.disabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        # Readers don't block the writers of parallel validation runs
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def _disable(self, error):
+        """Stop recording after an error, warning once."""
+        if not self.disabled:
+            self.disabled = True
+            print(f"[WARNING] Validation history disabled ({self.path}): {type(error).__name__}: {error}",
+                  file=sys.stderr)
+
+    def _get_salt(self, conn):
+        if self._salt is None:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('salt', ?)", (os.urandom(32),))
+            self._salt = conn.execute("SELECT value FROM meta WHERE name = 'salt'").fetchone()[0]
+        return self._salt
+
+    def record(self, service, url, secret, result, label=None, ts=None):
+        """Buffer one validation result (a dict shaped like check_token()'s) for writing.
+
+        ``secret`` is only kept as a salted hash. The buffer is written when
+        it is full or old enough; call flush() or close() at the end.
+        """
+        if self.disabled:
+            return
+        rate_limit = result.get('rate_limit') or {}
+        scopes = result.get('scopes')
+        row = {
+            'service': service,
+            'host': urlsplit(url).netloc or url,
+            'secret': '\0'.join((service, url, secret)),
+            'label': label,
+            'ts': time.time() if ts is None else ts,
+            'valid': bool(result.get('valid')),
+            'cached': bool(result.get('cached')),
+            'status': result.get('status'),
+            'elapsed_ms': result.get('elapsed_ms'),
+            'rate_remaining': rate_limit.get('remaining'),
+            'rate_limit': rate_limit.get('limit'),
+            'error': result.get('error'),
+            'scopes': ','.join(scopes) if scopes is not None else None,
+            'expires_at': _epoch(result.get('expires_at')),
+        }
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(row)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._pending_since >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered results in one transaction; on errors warn and stop recording."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows or self.disabled:
+            return
+        try:
+            self._write(rows)
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+
+    def _write(self, rows):
+        conn = self._connect()
+        try:
+            salt = self._get_salt(conn)
+            # One credentials update per credential and batch, from its latest result
+            latest = {}
+            for row in rows:
+                key = row['key'] = hmac.new(salt, row['secret'].encode('utf-8'), hashlib.sha256).hexdigest()
+                if key not in latest or row['ts'] >= latest[key]['ts']:
+                    latest[key] = row
+            with conn:
+                ids = {}
+                for key, row in latest.items():
+                    conn.execute(
+                        "INSERT INTO credentials (key, service, host, label, scopes, expires_at, last_valid,"
+                        " first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                        " ON CONFLICT (key) DO UPDATE SET label = coalesce(excluded.label, label),"
+                        " scopes = coalesce(excluded.scopes, scopes),"
+                        " expires_at = coalesce(excluded.expires_at, expires_at),"
+                        " last_valid = excluded.last_valid, last_seen = max(last_seen, excluded.last_seen)",
+                        (key, row['service'], row['host'], row['label'], row['scopes'], row['expires_at'],
+                         row['valid'], row['ts'], row['ts']),
+                    )
+                    ids[key] = conn.execute("SELECT id FROM credentials WHERE key = ?", (key,)).fetchone()[0]
+                for row in rows:
+                    row['credential'] = ids[row['key']]
+                conn.executemany(
+                    "INSERT INTO runs (credential, ts, valid, cached, status, elapsed_ms, rate_remaining,"
+                    " rate_limit, error) VALUES (:credential, :ts, :valid, :cached, :status, :elapsed_ms,"
+                    " :rate_remaining, :rate_limit, :error)",
+                    rows,
+                )
+                # Cached results repeat an earlier live check, so they stay out of the trends
+                live = [dict(row, hour=int(row['ts'] // HOUR)) for row in rows if not row['cached']]
+                conn.executemany(
+                    "INSERT INTO hourly (credential, hour, runs, failures, min_remaining, rate_limit)"
+                    " VALUES (:credential, :hour, 1, NOT :valid, :rate_remaining, :rate_limit)"
+                    " ON CONFLICT (hour, credential) DO UPDATE SET runs = runs + 1,"
+                    " failures = failures + excluded.failures,"
+                    " min_remaining = min(coalesce(min_remaining, excluded.min_remaining),"
+                    " coalesce(excluded.min_remaining, min_remaining)),"
+                    " rate_limit = coalesce(excluded.rate_limit, rate_limit)",
+                    live,
+                )
+                conn.executemany(
+                    "INSERT INTO latency (service, host, hour, bucket, count) VALUES (?, ?, ?, ?, 1)"
+                    " ON CONFLICT (hour, service, host, bucket) DO UPDATE SET count = count + 1",
+                    [(row['service'], row['host'], row['hour'], _bucket(row['elapsed_ms']))
+                     for row in live if row['elapsed_ms'] is not None],
+                )
+        finally:
+            conn.close()
+
+    def close(self):
+        """Write any buffered results."""
+        self.flush()
+
+    def _query(self, sql, params=()):
+        self.flush()
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def expiring(self, within, now=None):
+        """Return credentials valid at their last check that expire within ``within`` seconds, soonest first.
+
+        ``expires_in_days`` is negative for credentials that have already expired.
+        """
+        now = time.time() if now is None else now
+        rows = self._query(
+            "SELECT service, host, label, scopes, expires_at, last_seen FROM credentials"
+            " WHERE expires_at IS NOT NULL AND expires_at <= ? AND last_valid = 1 ORDER BY expires_at",
+            (now + within,),
+        )
+        for row in rows:
+            row['expires_in_days'] = round((row['expires_at'] - now) / DAY, 1)
+        return rows
+
+    def latency(self, since, until=None, percentile=95, service=None):
+        """Return the run count and latency percentile (ms, within about 5%) per host for live checks."""
+        until = time.time() if until is None else until
+        sql = ("SELECT service, host, bucket, sum(count) AS count FROM latency WHERE hour BETWEEN ? AND ?"
+               + (" AND service = ?" if service else "")
+               + " GROUP BY service, host, bucket ORDER BY service, host, bucket")
+        params = (int(since // HOUR), int(until // HOUR)) + ((service,) if service else ())
+        histograms = {}
+        for row in self._query(sql, params):
+            histograms.setdefault((row['service'], row['host']), []).append((row['bucket'], row['count']))
+        results = []
+        for (svc, host), buckets in histograms.items():
+            total = sum(count for _, count in buckets)
+            rank, seen = math.ceil(total * percentile / 100), 0
+            for bucket, count in buckets:
+                seen += count
+                if seen >= rank:
+                    break
+            results.append({'service': svc, 'host': host, 'runs': total,
+                            f"p{percentile:g}_ms": _bucket_ms(bucket)})
+        return results
+
+    def rate_limit_trend(self, since, until=None, period=DAY, service=None):
+        """Return runs, failures and the lowest remaining rate limit per credential and ``period`` seconds."""
+        until = time.time() if until is None else until
+        step = max(int(period // HOUR), 1)
+        sql = ("SELECT c.service, c.host, c.label, (h.hour / ?) * ? * 3600 AS period_start,"
+               " sum(h.runs) AS runs, sum(h.failures) AS failures, min(h.min_remaining) AS min_remaining,"
+               " max(h.rate_limit) AS rate_limit FROM hourly h JOIN credentials c ON c.id = h.credential"
+               " WHERE h.hour BETWEEN ? AND ?" + (" AND c.service = ?" if service else "")
+               + " GROUP BY h.credential, period_start ORDER BY c.label, period_start")
+        params = (step, step, int(since // HOUR), int(until // HOUR)) + ((service,) if service else ())
+        return self._query(sql, params)
+
+    def summary(self):
+        """Return the number of stored runs and credentials."""
+        return self._query("SELECT (SELECT count(*) FROM runs) AS runs,"
+                           " (SELECT count(*) FROM credentials) AS credentials")[0]
+
+def main(argv=None):
+    """Answer a history query and print the result as JSON lines."""
+    parser = argparse.ArgumentParser(description="Query the validation history.")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument('--expiring', type=float, metavar='DAYS',
+                       help="credentials that expire within DAYS days")
+    query.add_argument('--latency', type=float, metavar='DAYS',
+                       help="validation latency percentile per host over the last DAYS days")
+    query.add_argument('--rate-limits', type=float, metavar='DAYS',
+                       help="daily runs, failures and lowest remaining rate limit per credential")
+    parser.add_argument('--percentile', type=float, default=95, help="percentile for --latency (default: 95)")
+    parser.add_argument('--service', help="only this service (github or bluesky)")
+    parser.add_argument('--path', help="history file (default: VALIDATION_HISTORY_PATH)")
+    args = parser.parse_args(argv)
+
+    # The config of the project whose validation_history.py was run
+    import config
+    history = ValidationHistory(args.path or config.VALIDATION_HISTORY_PATH or DEFAULT_HISTORY_PATH)
+    now = time.time()
+    if args.expiring is not None:
+        rows = [row for row in history.expiring(args.expiring * DAY, now)
+                if not args.service or row['service'] == args.service]
+    elif args.latency is not None:
+        rows = history.latency(now - args.latency * DAY, now, args.percentile, args.service)
+    elif args.rate_limits is not None:
+        rows = history.rate_limit_trend(now - args.rate_limits * DAY, now, DAY, args.service)
+    else:
+        rows = [history.summary()]
+    for row in rows:
+        print(json.dumps(row))
+    return True